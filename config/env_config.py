@@ -39,7 +39,18 @@ def cleanup_previous_env():
         'SOURCE_DB_NAME', 'SOURCE_DB_USER', 'SOURCE_DB_PASSWORD',
         'SOURCE_DB_HOST', 'SOURCE_DB_PORT',
         'TARGET_DB_NAME', 'TARGET_DB_USER', 'TARGET_DB_PASSWORD',
-        'TARGET_DB_HOST', 'TARGET_DB_PORT'
+        'TARGET_DB_HOST', 'TARGET_DB_PORT',
+        'ETL_EXTRACT_CHUNK_SIZE', 'ETL_EXTRACT_INCREMENTAL',
+        'ETL_EXTRACT_PARTITIONS', 'ETL_EXTRACT_PARTITION_COLUMN',
+        'ETL_EXTRACT_ENGINE', 'ETL_CUSTOMERS_CSV_ENGINE',
+        'ETL_CUSTOMERS_MEMORY_MAP', 'ETL_NATIVE_DATES',
+        'ETL_OPTIMISE_DTYPES', 'ETL_STREAMING', 'ETL_TRANSFORM_ENGINE',
+        'ETL_TRANSFORM_WORKERS', 'ETL_SPEND_TIERS',
+        'ETL_BACKGROUND_CHECKPOINTS', 'ETL_CHECKPOINT_FORMAT',
+        'ETL_CHECKPOINT_CSV_ENGINE', 'ETL_STAGE_CACHE',
+        'ETL_STAGE_CACHE_MAX_MB', 'ETL_LOAD_ENGINE', 'ETL_DIFFERENTIAL_LOAD',
+        'ETL_DIFFERENTIAL_DELETE', 'ETL_LOAD_OUTPUTS', 'ETL_LOAD_CONNECTIONS',
+        'ETL_LOAD_PARTITION_ROWS', 'ETL_STAGE_CACHE_KEY'
     ]
     for key in keys_to_clear:
         if key in os.environ:
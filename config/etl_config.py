@@ -0,0 +1,254 @@
+import os
+import logging
+from utils.logging_utils import setup_logger
+from typing import Any, Dict, List, Tuple
+
+
+class EtlConfigError(Exception):
+    pass
+
+
+# Configure the logger
+logger = setup_logger(__name__, 'etl_config.log', level=logging.DEBUG)
+
+DEFAULT_EXTRACT_CHUNK_SIZE = 50000
+
+DEFAULT_EXTRACT_PARTITION_COLUMN = 'transaction_id'
+
+EXTRACT_ENGINE_NAMES = ['read_sql', 'copy']
+
+CSV_ENGINE_NAMES = ['c', 'pyarrow']
+
+TRANSFORM_ENGINE_NAMES = ['pandas', 'polars']
+
+CHECKPOINT_FORMAT_NAMES = ['csv', 'parquet', 'arrow']
+
+LOAD_ENGINE_NAMES = ['to_sql', 'copy']
+
+# Transform outputs that can be loaded into target tables
+LOAD_OUTPUT_NAMES = [
+    'merged_data', 'customer_aggregates', 'high_value_customers',
+    'cleaned_high_value_customers', 'customer_spend_tiers'
+]
+
+DEFAULT_LOAD_PARTITION_ROWS = 1000000
+
+CHECKPOINT_CSV_ENGINE_NAMES = ['pandas', 'pyarrow']
+
+# Tier name and lower bound pairs. A bound is a total spend, or with a %
+# a percentile of all customers' total spend
+DEFAULT_SPEND_TIERS = 'high_value:500'
+
+DEFAULT_STAGE_CACHE_MAX_MB = 1024
+
+# How the stage cache tells that the source transactions changed: summary
+# compares the row count and key range, hash every row's contents
+STAGE_CACHE_KEY_NAMES = ['summary', 'hash']
+
+TRUE_VALUES = ['true', '1', 'yes']
+FALSE_VALUES = ['false', '0', 'no', '']
+
+
+def load_etl_config() -> Dict[str, Any]:
+    """
+    Load pipeline tuning options from environment variables
+    Set these in the .env file or in the deployment environment
+    alongside the database settings. Every option has a default,
+    so an empty environment runs the pipeline as before.
+    :return: Dictionary of pipeline options.
+    """
+    config = {
+        'extract_chunk_size': get_int_setting(
+            'ETL_EXTRACT_CHUNK_SIZE', DEFAULT_EXTRACT_CHUNK_SIZE
+        ),
+        'extract_incremental': get_bool_setting(
+            'ETL_EXTRACT_INCREMENTAL', False
+        ),
+        'full_refresh': get_bool_setting('ETL_FULL_REFRESH', False),
+        'extract_partitions': get_int_setting('ETL_EXTRACT_PARTITIONS', 1),
+        'extract_partition_column': get_identifier_setting(
+            'ETL_EXTRACT_PARTITION_COLUMN', DEFAULT_EXTRACT_PARTITION_COLUMN
+        ),
+        'extract_engine': get_choice_setting(
+            'ETL_EXTRACT_ENGINE', 'read_sql', EXTRACT_ENGINE_NAMES
+        ),
+        'customers_csv_engine': get_choice_setting(
+            'ETL_CUSTOMERS_CSV_ENGINE', 'c', CSV_ENGINE_NAMES
+        ),
+        'customers_memory_map': get_bool_setting(
+            'ETL_CUSTOMERS_MEMORY_MAP', False
+        ),
+        'native_dates': get_bool_setting('ETL_NATIVE_DATES', False),
+        'optimise_dtypes': get_bool_setting('ETL_OPTIMISE_DTYPES', False),
+        'streaming': get_bool_setting('ETL_STREAMING', False),
+        'transform_engine': get_choice_setting(
+            'ETL_TRANSFORM_ENGINE', 'pandas', TRANSFORM_ENGINE_NAMES
+        ),
+        'transform_workers': get_int_setting('ETL_TRANSFORM_WORKERS', 1),
+        'spend_tiers': get_spend_tiers_setting(
+            'ETL_SPEND_TIERS', DEFAULT_SPEND_TIERS
+        ),
+        'background_checkpoints': get_bool_setting(
+            'ETL_BACKGROUND_CHECKPOINTS', False
+        ),
+        'checkpoint_format': get_choice_setting(
+            'ETL_CHECKPOINT_FORMAT', 'csv', CHECKPOINT_FORMAT_NAMES
+        ),
+        'checkpoint_csv_engine': get_choice_setting(
+            'ETL_CHECKPOINT_CSV_ENGINE', 'pandas', CHECKPOINT_CSV_ENGINE_NAMES
+        ),
+        'stage_cache': get_bool_setting('ETL_STAGE_CACHE', False),
+        'stage_cache_max_mb': get_int_setting(
+            'ETL_STAGE_CACHE_MAX_MB', DEFAULT_STAGE_CACHE_MAX_MB
+        ),
+        'stage_cache_key': get_choice_setting(
+            'ETL_STAGE_CACHE_KEY', 'summary', STAGE_CACHE_KEY_NAMES
+        ),
+        'load_engine': get_choice_setting(
+            'ETL_LOAD_ENGINE', 'to_sql', LOAD_ENGINE_NAMES
+        ),
+        'differential_load': get_bool_setting(
+            'ETL_DIFFERENTIAL_LOAD', False
+        ),
+        'differential_delete': get_bool_setting(
+            'ETL_DIFFERENTIAL_DELETE', False
+        ),
+        'load_outputs': get_choices_setting(
+            'ETL_LOAD_OUTPUTS', 'merged_data', LOAD_OUTPUT_NAMES
+        ),
+        'load_connections': get_int_setting('ETL_LOAD_CONNECTIONS', 1),
+        'load_partition_rows': get_int_setting(
+            'ETL_LOAD_PARTITION_ROWS', DEFAULT_LOAD_PARTITION_ROWS
+        )
+    }
+
+    return config
+
+
+def get_int_setting(key: str, default: int) -> int:
+    value = os.getenv(key, str(default))
+    try:
+        setting = int(value)
+    except ValueError:
+        setting = 0
+
+    if setting <= 0:
+        logger.setLevel(logging.ERROR)
+        logger.error(
+            f"Configuration error: {key} must be a positive integer, "
+            f"got '{value}'"
+        )
+        raise EtlConfigError(
+            f"Configuration error: {key} must be a positive integer, "
+            f"got '{value}'"
+        )
+
+    return setting
+
+
+def get_bool_setting(key: str, default: bool) -> bool:
+    value = os.getenv(key, str(default)).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+
+    logger.setLevel(logging.ERROR)
+    logger.error(
+        f"Configuration error: {key} must be one of "
+        f"{TRUE_VALUES + FALSE_VALUES}, got '{value}'"
+    )
+    raise EtlConfigError(
+        f"Configuration error: {key} must be one of "
+        f"{TRUE_VALUES + FALSE_VALUES}, got '{value}'"
+    )
+
+
+def get_identifier_setting(key: str, default: str) -> str:
+    # Identifiers are put into SQL text, so only plain names are allowed
+    value = os.getenv(key, default)
+    if not value.isidentifier():
+        logger.setLevel(logging.ERROR)
+        logger.error(
+            f"Configuration error: {key} must be a column name, "
+            f"got '{value}'"
+        )
+        raise EtlConfigError(
+            f"Configuration error: {key} must be a column name, "
+            f"got '{value}'"
+        )
+
+    return value
+
+
+def get_choice_setting(key: str, default: str, choices: list) -> str:
+    value = os.getenv(key, default).strip().lower()
+    if value not in choices:
+        logger.setLevel(logging.ERROR)
+        logger.error(
+            f"Configuration error: {key} must be one of {choices}, "
+            f"got '{value}'"
+        )
+        raise EtlConfigError(
+            f"Configuration error: {key} must be one of {choices}, "
+            f"got '{value}'"
+        )
+
+    return value
+
+
+def get_choices_setting(key: str, default: str, choices: list) -> List[str]:
+    # A comma-separated list of choices, e.g. 'merged_data,
+    # customer_spend_tiers'; repeats are dropped, the order is kept
+    value = os.getenv(key, default)
+    selected = [choice.strip().lower() for choice in value.split(',')]
+    if not all(choice in choices for choice in selected):
+        logger.setLevel(logging.ERROR)
+        logger.error(
+            f"Configuration error: {key} must be a list of {choices}, "
+            f"got '{value}'"
+        )
+        raise EtlConfigError(
+            f"Configuration error: {key} must be a list of {choices}, "
+            f"got '{value}'"
+        )
+
+    return list(dict.fromkeys(selected))
+
+
+def get_spend_tiers_setting(
+    key: str,
+    default: str
+) -> List[Tuple[str, float, bool]]:
+    # e.g. 'bronze:100,silver:500,gold:90%' gives
+    # [('bronze', 100.0, False), ('silver', 500.0, False),
+    #  ('gold', 0.9, True)]
+    value = os.getenv(key, default)
+    tiers = []
+    try:
+        for tier in value.split(','):
+            name, bound = (part.strip() for part in tier.split(':'))
+            is_percentile = bound.endswith('%')
+            if is_percentile:
+                bound = float(bound[:-1]) / 100
+                if not 0 <= bound <= 1:
+                    raise ValueError(f"percentile out of range in '{tier}'")
+            else:
+                bound = float(bound)
+            if not name:
+                raise ValueError(f"missing tier name in '{tier}'")
+            tiers.append((name, bound, is_percentile))
+        if len({name for name, _, _ in tiers}) != len(tiers):
+            raise ValueError("tier names repeat")
+    except ValueError as e:
+        logger.setLevel(logging.ERROR)
+        logger.error(
+            f"Configuration error: {key} must be a list of name:bound "
+            f"tiers, e.g. 'bronze:100,gold:90%', got '{value}' ({e})"
+        )
+        raise EtlConfigError(
+            f"Configuration error: {key} must be a list of name:bound "
+            f"tiers, e.g. 'bronze:100,gold:90%', got '{value}' ({e})"
+        )
+
+    return tiers
@@ -2,8 +2,14 @@ import os
 import pandas as pd
 import logging
 import timeit
+from config.etl_config import load_etl_config
 from utils.logging_utils import setup_logger, log_extract_success
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 # Configure the logger
 logger = setup_logger(
     __name__,
@@ -19,12 +25,26 @@ FILE_PATH = os.path.join(
 
 TYPE = 'CUSTOMERS from CSV'
 
+# Declared schema for unclean_customers.csv, so pandas skips type
+# inference. customer_id and age stay float64 so missing values are read
+# as NaN; an int64 customer_id would fail the whole read on the rows
+# without one, which the merge drops instead. country and is_active have
+# only a handful of distinct values, so they are stored as categories
+# rather than one Python string per row
+CUSTOMERS_SCHEMA = {
+    'customer_id': 'float64',
+    'name': 'object',
+    'age': 'float64',
+    'country': 'category',
+    'is_active': 'category'
+}
+
 
 def extract_customers() -> pd.DataFrame:
     start_time = timeit.default_timer()
 
     try:
-        customers = pd.read_csv(FILE_PATH)
+        customers = read_customers_csv(FILE_PATH)
         extract_customers_execution_time = timeit.default_timer() - start_time
         log_extract_success(
             logger,
@@ -38,3 +58,34 @@ def extract_customers() -> pd.DataFrame:
         logger.setLevel(logging.ERROR)
         logger.error(f"Error loading {FILE_PATH}: {e}")
         raise Exception(f"Failed to load CSV file: {FILE_PATH}")
+
+
+def read_customers_csv(file_path: str) -> pd.DataFrame:
+    etl_config = load_etl_config()
+    memory_map = etl_config['customers_memory_map']
+
+    if etl_config['customers_csv_engine'] == 'pyarrow':
+        if pa is None:
+            raise ImportError(
+                "The pyarrow CSV engine needs the pyarrow package"
+            )
+        # pyarrow parses with several threads. It does not take the
+        # memory_map option, so it is given a memory-mapped file instead
+        if memory_map:
+            with pa.memory_map(file_path) as source:
+                return read_customers_csv_with_engine(source, 'pyarrow')
+        return read_customers_csv_with_engine(file_path, 'pyarrow')
+
+    return read_customers_csv_with_engine(
+        file_path, 'c', memory_map=memory_map
+    )
+
+
+def read_customers_csv_with_engine(source, engine: str, **kwargs):
+    return pd.read_csv(
+        source,
+        engine=engine,
+        usecols=list(CUSTOMERS_SCHEMA),
+        dtype=CUSTOMERS_SCHEMA,
+        **kwargs
+    )
@@ -1,17 +1,240 @@
+import io
+from datetime import date, datetime, timedelta
+import numpy as np
 import pandas as pd
 import logging
+import psycopg2
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 from utils.logging_utils import setup_logger
 from utils.db_utils import QueryExecutionError
 
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
 # Configure the logger
 logger = setup_logger(__name__, 'database_query.log', level=logging.DEBUG)
 
+# Postgres type OIDs for text, bpchar and varchar
+TEXT_TYPE_OIDS = {25, 1042, 1043}
+
+# Written by COPY for NULL so it can be told apart from an empty string
+COPY_NULL = '\\N'
+
+
+def execute_extract_query(query, connection, params=None):
+    try:
+        if params is None:
+            return pd.read_sql_query(query, connection)
+        # Bind parameters use the :name style, so the query goes through text()
+        return pd.read_sql_query(text(query), connection, params=params)
+    except pd.errors.DatabaseError as e:
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to execute query: {e}")
+        logger.error(f"The query that failed was: {query}")
+        raise QueryExecutionError(f"Failed to execute query: {e}")
+
+
+def execute_extract_query_copy(query, connection, params=None):
+    # Bulk alternative to execute_extract_query: Postgres streams the result
+    # as CSV through COPY and it is parsed column-wise in one pass, instead
+    # of building a Python tuple per row
+    sql = render_query(query, connection, params)
+    cursor = connection.connection.cursor()
+    try:
+        # An empty run of the query gives the column types, so text
+        # columns stay strings instead of being re-inferred from the CSV
+        cursor.execute(f"SELECT * FROM ({sql}) AS source LIMIT 0")
+        text_columns = [
+            column.name for column in cursor.description
+            if column.type_code in TEXT_TYPE_OIDS
+        ]
+        buffer = io.BytesIO()
+        cursor.copy_expert(
+            f"COPY ({sql}) TO STDOUT "
+            f"WITH (FORMAT csv, HEADER true, NULL '{COPY_NULL}')",
+            buffer
+        )
+    except psycopg2.Error as e:
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to execute query: {e}")
+        logger.error(f"The query that failed was: {sql}")
+        raise QueryExecutionError(f"Failed to execute query: {e}")
+    finally:
+        cursor.close()
+
+    buffer.seek(0)
+    return read_copy_csv(buffer, text_columns)
+
+
+def render_query(query, connection, params=None):
+    # COPY cannot take bind parameters, so they are rendered into the SQL
+    statement = text(strip_query(query))
+    if params:
+        statement = statement.bindparams(**params)
+    return str(statement.compile(
+        dialect=connection.dialect,
+        compile_kwargs={'literal_binds': True}
+    ))
+
 
-def execute_extract_query(query, connection):
+def read_copy_csv(buffer, text_columns):
+    if pa is None:
+        return pd.read_csv(
+            buffer,
+            dtype={column: 'object' for column in text_columns},
+            keep_default_na=False,
+            na_values=[COPY_NULL]
+        )
+
+    # pyarrow's reader is multi-threaded and builds columns directly
+    table = pa_csv.read_csv(
+        buffer,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={column: pa.string() for column in text_columns},
+            null_values=[COPY_NULL],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False
+        )
+    )
+    return table.to_pandas()
+
+
+def execute_extract_query_chunks(query, connection, chunk_size, params=None):
+    # Ask the driver for a server-side cursor so only chunk_size rows
+    # are held on the client at a time, instead of the full result set
+    streaming_connection = connection.execution_options(
+        stream_results=True,
+        max_row_buffer=chunk_size
+    )
     try:
-        return pd.read_sql_query(query, connection)
+        yield from pd.read_sql_query(
+            text(query),
+            streaming_connection,
+            params=params,
+            chunksize=chunk_size
+        )
     except pd.errors.DatabaseError as e:
         logger.setLevel(logging.ERROR)
         logger.error(f"Failed to execute query: {e}")
         logger.error(f"The query that failed was: {query}")
         raise QueryExecutionError(f"Failed to execute query: {e}")
+
+
+# Engines that can run an extract query into a DataFrame, selected by name
+EXTRACT_ENGINES = {
+    'read_sql': execute_extract_query,
+    'copy': execute_extract_query_copy
+}
+
+
+def get_key_range(query, connection, column, params=None):
+    # MIN/MAX over the key is cheap when the column is indexed and gives
+    # the bounds to split the extract into ranges
+    range_query = (
+        f"SELECT MIN({column}) AS lower, MAX({column}) AS upper "
+        f"FROM ({strip_query(query)}) AS source"
+    )
+    try:
+        row = connection.execute(text(range_query), params or {}).one()
+        return (row.lower, row.upper)
+    except SQLAlchemyError as e:
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to execute query: {e}")
+        logger.error(f"The query that failed was: {range_query}")
+        raise QueryExecutionError(f"Failed to execute query: {e}")
+
+
+def get_source_summary(query, connection, column, params=None):
+    # The row count and key range of the rows the query selects. Cheap
+    # next to get_source_fingerprint(), since no row is hashed, but blind
+    # to rows edited in place
+    summary_query = (
+        f"SELECT COUNT(*) AS row_count, MIN({column}) AS lower, "
+        f"MAX({column}) AS upper FROM ({strip_query(query)}) AS source"
+    )
+    try:
+        row = connection.execute(text(summary_query), params or {}).one()
+        return (int(row.row_count), row.lower, row.upper)
+    except SQLAlchemyError as e:
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to execute query: {e}")
+        logger.error(f"The query that failed was: {summary_query}")
+        raise QueryExecutionError(f"Failed to execute query: {e}")
+
+
+def get_source_fingerprint(query, connection, params=None):
+    # A row count and an order-independent sum of row hashes, computed on
+    # the database side, so a changed source is noticed without reading
+    # the rows back. Costs one scan of the rows the query selects
+    fingerprint_query = (
+        f"SELECT COUNT(*) AS row_count, "
+        f"COALESCE(SUM(HASHTEXTEXTENDED(source::TEXT, 0)), 0) "
+        f"AS row_hash_sum "
+        f"FROM ({strip_query(query)}) AS source"
+    )
+    try:
+        row = connection.execute(text(fingerprint_query), params or {}).one()
+        return (int(row.row_count), str(row.row_hash_sum))
+    except SQLAlchemyError as e:
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to execute query: {e}")
+        logger.error(f"The query that failed was: {fingerprint_query}")
+        raise QueryExecutionError(f"Failed to execute query: {e}")
+
+
+def get_partition_bounds(lower, upper, partitions):
+    # Equal-width ranges covering lower..upper inclusive, returned as
+    # (start, end) pairs where end is exclusive. Dates are split into
+    # whole days and timestamps into microseconds, the finest step
+    # PostgreSQL stores
+    if isinstance(lower, datetime):
+        step = timedelta(microseconds=1)
+        return [
+            (lower + start * step, lower + end * step)
+            for start, end in get_integer_bounds(
+                0, (upper - lower) // step, partitions
+            )
+        ]
+    if isinstance(lower, date):
+        return [
+            (date.fromordinal(start), date.fromordinal(end))
+            for start, end in get_integer_bounds(
+                lower.toordinal(), upper.toordinal(), partitions
+            )
+        ]
+    if isinstance(lower, (int, np.integer)):
+        return get_integer_bounds(lower, upper, partitions)
+    raise TypeError(
+        f"Cannot split a partition column of {type(lower).__name__} "
+        f"values into ranges, it must hold integers, dates or timestamps"
+    )
+
+
+def get_integer_bounds(lower, upper, partitions):
+    boundaries = np.unique(
+        np.linspace(lower, upper + 1, partitions + 1).astype('int64')
+    )
+    return [
+        (int(start), int(end))
+        for start, end in zip(boundaries[:-1], boundaries[1:])
+    ]
+
+
+def build_partition_query(query, column, include_nulls=False):
+    # Rows with a NULL key fall outside every range, so one partition
+    # has to pick them up explicitly
+    condition = (
+        f"{column} >= :partition_lower AND {column} < :partition_upper"
+    )
+    if include_nulls:
+        condition = f"({condition} OR {column} IS NULL)"
+    return f"SELECT * FROM ({strip_query(query)}) AS source WHERE {condition}"
+
+
+def strip_query(query):
+    # A trailing semicolon would end the statement inside a subquery
+    return query.strip().rstrip(';')
@@ -2,11 +2,25 @@ import logging
 import os
 import pandas as pd
 import timeit
+from contextlib import nullcontext
+from functools import partial
+from typing import Iterator, Optional
 from config.db_config import load_db_config
-from etl.extract.extract_query import execute_extract_query
+from config.etl_config import load_etl_config
+from etl.extract.extract_query import (
+    build_partition_query,
+    execute_extract_query_chunks,
+    EXTRACT_ENGINES,
+    get_key_range,
+    get_partition_bounds,
+    get_source_fingerprint,
+    get_source_summary
+)
+from utils.concurrency_utils import Cancellation, run_concurrently
 from utils.sql_utils import import_sql_query
-from utils.db_utils import get_db_connection
+from utils.db_utils import cancel_running_query, get_db_connection
 from utils.logging_utils import setup_logger, log_extract_success
+from utils.watermark_utils import load_watermark, save_watermark
 
 # Configure the logger
 logger = setup_logger(
@@ -20,16 +34,29 @@ EXTRACT_TRANSACTIONS_QUERY_FILE = os.path.join(
     '../sql/extract_transactions.sql'
 )
 
+EXTRACT_TRANSACTIONS_INCREMENTAL_QUERY_FILE = os.path.join(
+    os.path.dirname(__file__),
+    '../sql/extract_transactions_incremental.sql'
+)
+
+WATERMARK_NAME = 'transactions'
+
+# transaction_date is free text in mixed formats in the source table,
+# so only the integer key can be compared on the database side
+WATERMARK_COLUMN = 'transaction_id'
+
 EXPECTED_IMPORT_RATE = 0.001
 
 TYPE = 'TRANSACTIONS from database'
 
 
-def extract_transactions() -> pd.DataFrame:
+def extract_transactions(
+    cancellation: Optional[Cancellation] = None
+) -> pd.DataFrame:
     try:
         # Set up performance recording for transaction extraction
         start_time = timeit.default_timer()
-        transactions = extract_transactions_execution()
+        transactions = extract_transactions_execution(cancellation)
         extract_transactions_execution_time = (
             timeit.default_timer() - start_time
         )
@@ -48,22 +75,241 @@ def extract_transactions() -> pd.DataFrame:
         raise Exception(f"Failed to extract data: {e}")
 
 
-def extract_transactions_execution() -> pd.DataFrame:
+def extract_transactions_execution(
+    cancellation: Optional[Cancellation] = None
+) -> pd.DataFrame:
     # Import the SQL query
     # Connect to the database
     # Execute the query
     # Return the dataframe as a result
     connection_details = load_db_config()['source_database']
     print(connection_details)
-    query = import_sql_query(EXTRACT_TRANSACTIONS_QUERY_FILE)
+    query, params = get_extract_transactions_query()
+
+    etl_config = load_etl_config()
+    execute_query = EXTRACT_ENGINES[etl_config['extract_engine']]
+    if etl_config['extract_partitions'] > 1:
+        return extract_transactions_partitioned(
+            connection_details,
+            query,
+            params,
+            etl_config['extract_partitions'],
+            etl_config['extract_partition_column'],
+            execute_query,
+            cancellation
+        )
+
     connection = get_db_connection(connection_details)
-    transactions_df = execute_extract_query(query, connection)
-    connection.close()
+    try:
+        with cancel_query_on(cancellation, connection):
+            transactions_df = execute_query(query, connection, params)
+    finally:
+        connection.close()
     # print(transactions_df)
     # Initially added to debug during dev - remove before production
     return transactions_df
 
 
+def extract_transactions_partitioned(
+    connection_details: dict,
+    query: str,
+    params: dict,
+    partitions: int,
+    column: str,
+    execute_query,
+    cancellation: Optional[Cancellation] = None
+) -> pd.DataFrame:
+    # Split the extract into ranges of an integer, date or timestamp key
+    # column and read each range on its own connection in parallel. If
+    # one range fails, the queries of the others are cancelled
+    cancellation = cancellation or Cancellation()
+    connection = get_db_connection(connection_details)
+    try:
+        lower, upper = get_key_range(query, connection, column, params)
+        if lower is None:
+            # Nothing to split, but the query still gives the columns
+            return execute_query(query, connection, params)
+    finally:
+        connection.close()
+
+    bounds = get_partition_bounds(lower, upper, partitions)
+    logger.setLevel(logging.INFO)
+    logger.info(
+        f"Extracting transactions in {len(bounds)} partitions "
+        f"on {column}: {bounds}"
+    )
+    tasks = [
+        partial(
+            extract_transactions_partition,
+            connection_details,
+            execute_query,
+            build_partition_query(query, column, include_nulls=(index == 0)),
+            {
+                **(params or {}),
+                'partition_lower': start,
+                'partition_upper': end
+            },
+            cancellation
+        )
+        for index, (start, end) in enumerate(bounds)
+    ]
+    partition_frames = run_concurrently(tasks, cancellation=cancellation)
+    return pd.concat(partition_frames, ignore_index=True)
+
+
+def extract_transactions_partition(
+    connection_details: dict,
+    execute_query,
+    query: str,
+    params: dict,
+    cancellation: Optional[Cancellation] = None
+) -> pd.DataFrame:
+    connection = get_db_connection(connection_details)
+    try:
+        with cancel_query_on(cancellation, connection):
+            return execute_query(query, connection, params)
+    finally:
+        connection.close()
+
+
+def cancel_query_on(cancellation: Optional[Cancellation], connection):
+    # The read is a single query, so it is stopped on the database side
+    # rather than between rows
+    if cancellation is None:
+        return nullcontext()
+    return cancellation.on_cancel(partial(cancel_running_query, connection))
+
+
+def extract_transactions_chunks(
+    chunk_size: int = None
+) -> Iterator[pd.DataFrame]:
+    # Streaming alternative to extract_transactions: yields DataFrames of
+    # at most chunk_size rows so the full table is never held in memory
+    if chunk_size is None:
+        chunk_size = load_etl_config()['extract_chunk_size']
+
+    try:
+        # Only the time spent fetching each chunk is counted, not the time
+        # the consumer spends transforming and loading it between fetches
+        chunks = iter(extract_transactions_execution_chunks(chunk_size))
+        extract_transactions_execution_time = 0.0
+        rows = 0
+        columns = 0
+        while True:
+            start_time = timeit.default_timer()
+            chunk = next(chunks, None)
+            extract_transactions_execution_time += (
+                timeit.default_timer() - start_time
+            )
+            if chunk is None:
+                break
+            rows += chunk.shape[0]
+            columns = chunk.shape[1]
+            logger.setLevel(logging.INFO)
+            logger.info(
+                f"Extracted chunk of {chunk.shape[0]} rows "
+                f"({rows} rows so far)"
+            )
+            yield chunk
+
+        log_extract_success(
+            logger,
+            TYPE,
+            (rows, columns),
+            extract_transactions_execution_time,
+            EXPECTED_IMPORT_RATE
+        )
+    except Exception as e:
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to extract data: {e}")
+        raise Exception(f"Failed to extract data: {e}")
+
+
+def extract_transactions_execution_chunks(
+    chunk_size: int
+) -> Iterator[pd.DataFrame]:
+    connection_details = load_db_config()['source_database']
+    query, params = get_extract_transactions_query()
+    connection = get_db_connection(connection_details)
+    try:
+        yield from execute_extract_query_chunks(
+            query,
+            connection,
+            chunk_size,
+            params
+        )
+    finally:
+        # Runs when the stream is exhausted or the consumer stops early
+        connection.close()
+
+
+def get_extract_transactions_query() -> tuple[str, dict]:
+    # Only rows newer than the watermark are read on an incremental run;
+    # otherwise the whole table is extracted without bind parameters
+    last_transaction_id = get_transactions_watermark()
+    if last_transaction_id is None:
+        return (import_sql_query(EXTRACT_TRANSACTIONS_QUERY_FILE), None)
+
+    logger.setLevel(logging.INFO)
+    logger.info(
+        f"Incremental extract of transactions with "
+        f"{WATERMARK_COLUMN} > {last_transaction_id}"
+    )
+    return (
+        import_sql_query(EXTRACT_TRANSACTIONS_INCREMENTAL_QUERY_FILE),
+        {'last_transaction_id': last_transaction_id}
+    )
+
+
+def get_transactions_fingerprint() -> dict:
+    # Identifies the rows extract_transactions would read, for the stage
+    # cache: the query and its parameters, which hold the watermark, plus
+    # a summary of the rows, or with ETL_STAGE_CACHE_KEY=hash a hash of
+    # all of them. Hashing scans every row on every run, cache hit or not
+    query, params = get_extract_transactions_query()
+    connection = get_db_connection(load_db_config()['source_database'])
+    try:
+        if load_etl_config()['stage_cache_key'] == 'hash':
+            row_count, row_hash_sum = get_source_fingerprint(
+                query, connection, params
+            )
+            rows = {'row_count': row_count, 'row_hash_sum': row_hash_sum}
+        else:
+            row_count, lower, upper = get_source_summary(
+                query, connection, WATERMARK_COLUMN, params
+            )
+            rows = {'row_count': row_count, 'lower': lower, 'upper': upper}
+    finally:
+        connection.close()
+    return {'query': query, 'params': params, **rows}
+
+
+def get_transactions_watermark():
+    # None means a full extract: incremental mode is off, a full refresh
+    # has been forced, or no load has completed yet in this environment
+    etl_config = load_etl_config()
+    if not etl_config['extract_incremental'] or etl_config['full_refresh']:
+        return None
+
+    watermark = load_watermark(WATERMARK_NAME)
+    if watermark is None:
+        return None
+    return watermark[WATERMARK_COLUMN]
+
+
+def update_transactions_watermark(transactions: pd.DataFrame):
+    # Call only once the extracted rows have been loaded successfully
+    if transactions.empty:
+        logger.setLevel(logging.INFO)
+        logger.info("No transactions extracted, watermark unchanged")
+        return
+
+    save_watermark(
+        WATERMARK_NAME,
+        {WATERMARK_COLUMN: int(transactions[WATERMARK_COLUMN].max())}
+    )
+
+
 # def log_transactions_success(transactions_shape, execution_time):
 #     logger.setLevel(logging.INFO)
 #     logger.info("Data extraction successful!")
@@ -1,11 +1,33 @@
+import io
 import os
 import pandas as pd
 import logging
-from sqlalchemy import text, Table, MetaData
+import psycopg2
+from functools import partial
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional
+)
+from sqlalchemy import (
+    inspect,
+    text,
+    Table,
+    MetaData,
+    BigInteger,
+    Date,
+    Text
+)
 from sqlalchemy.exc import InternalError, SQLAlchemyError
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import sessionmaker
 from config.db_config import load_db_config, DatabaseConfigError
+from config.etl_config import load_etl_config
+from utils.concurrency_utils import run_concurrently
 from utils.db_utils import (
     get_db_connection,
     DatabaseConnectionError,
@@ -13,36 +35,123 @@ from utils.db_utils import (
 )
 from utils.logging_utils import setup_logger
 from utils.sql_utils import import_sql_query
+from etl.load.differential_load import (
+    add_row_hashes,
+    get_changed_rows,
+    get_missing_keys,
+    ROW_HASH_COLUMN
+)
 from etl.load.post_load_enrichment import enrich_database_data
 
 TARGET_TABLE_NAME = 'transactions_by_customers'
 
+# The table each transform output is loaded into. high_value_customers and
+# customer_spend_tiers already name views over the merged data, so the
+# other outputs' tables take a _table suffix
+LOAD_TABLE_NAMES = {
+    'merged_data': TARGET_TABLE_NAME,
+    'customer_aggregates': 'customer_aggregates_table',
+    'high_value_customers': 'high_value_customers_table',
+    'cleaned_high_value_customers': 'cleaned_high_value_customers_table',
+    'customer_spend_tiers': 'customer_spend_tiers_table'
+}
+
+# The primary key of each output's table
+LOAD_TABLE_KEYS = {
+    'merged_data': 'transaction_id',
+    'customer_aggregates': 'customer_id',
+    'high_value_customers': 'customer_id',
+    'cleaned_high_value_customers': 'customer_id',
+    'customer_spend_tiers': 'customer_id'
+}
+
+# A table is loaded into <table>_loading and only takes its place once
+# every row is in
+LOADING_TABLE_SUFFIX = '_loading'
+
+# The key rows are matched on when upserting
+UPSERT_KEY = 'transaction_id'
+
+# Rows in each INSERT ... ON CONFLICT statement of the to_sql engine's
+# upsert
+UPSERT_BATCH_ROWS = 5000
+
+# Tables reflected for the upsert, by database URL and table name
+_reflected_tables = {}
+
+# transaction_ids in each DELETE of rows missing from a full snapshot
+DELETE_BATCH_ROWS = 10000
+
+# Rows rendered into each COPY buffer, so a large DataFrame is never held
+# as text all at once
+COPY_BATCH_ROWS = 100000
+
+# Written for missing values so they can be told apart from empty strings
+COPY_NULL = '\\N'
+
+# Dates are loaded into DATE columns, which take ISO dates
+COPY_DATE_FORMAT = '%Y-%m-%d'
+
 
 # Configure the logger
 logger = setup_logger(__name__, 'database_query.log', level=logging.DEBUG)
 
 
+# The load_ queries swap a fully loaded <table>_loading for the table
 LOAD_QUERY_FILES = {
     'load_merged_data': os.path.join(
         os.path.dirname(__file__), 'load_merged_data.sql'),
+    'load_customer_aggregates': os.path.join(
+        os.path.dirname(__file__), 'load_customer_aggregates.sql'),
     'load_high_value_customers': os.path.join(
         os.path.dirname(__file__), 'load_high_value_customers.sql'),
     'load_cleaned_high_value_customers': os.path.join(
         os.path.dirname(__file__), 'load_cleaned_high_value_customers.sql'),
+    'load_customer_spend_tiers': os.path.join(
+        os.path.dirname(__file__), 'load_customer_spend_tiers.sql'),
     'set_primary_key': os.path.join(
-        os.path.dirname(__file__), 'set_primary_key.sql')
+        os.path.dirname(__file__), '../sql/set_primary_key.sql')
 }
 
 
-def load_data(data: tuple):
-    (
-        merged_data,
-        high_value_customers,
-        cleaned_high_value_customers
-    ) = data
+def load_data(data: Mapping, incremental: bool = False):
+    """
+    Load the ETL_LOAD_OUTPUTS transform outputs into target tables
+    The tables are loaded at the same time over at most
+    ETL_LOAD_CONNECTIONS connections, with large tables split into ranges
+    of ETL_LOAD_PARTITION_ROWS rows. Each table is replaced in one
+    transaction once all of its rows are in, so a failed load leaves it
+    as it was. Only the outputs listed are computed.
+    :param data: Transform outputs, e.g. from transform_data().
+    :param incremental: The merged data only holds new transactions.
+    """
+    etl_config = load_etl_config()
+    outputs = etl_config['load_outputs']
+    tables = {output: data[output] for output in outputs}
+
+    # Incremental and differential loads add to the merged data already in
+    # the target rather than replacing it. A full run holds every
+    # transaction, so a differential load can also remove the rows that
+    # are gone from the source
+    merge_tasks = []
+    if 'merged_data' in tables and (
+        incremental or etl_config['differential_load']
+    ):
+        merge_tasks.append(partial(
+            create_merged_data_table,
+            tables.pop('merged_data'),
+            incremental,
+            delete_missing=(
+                not incremental and etl_config['differential_delete']
+            )
+        ))
 
-    # Save merged data to an SQL table in target database
-    create_merged_data_table(merged_data)
+    replace_tables(
+        tables,
+        etl_config['load_connections'],
+        etl_config['load_partition_rows'],
+        merge_tasks
+    )
 
     # Perform post-load enrichment of the data in the database
     # This approach would be suitable if the end users want us
@@ -53,16 +162,274 @@ def load_data(data: tuple):
     return None
 
 
-def create_merged_data_table(data: pd.DataFrame):
+def replace_tables(
+    tables: Dict[str, pd.DataFrame],
+    connections: int,
+    partition_rows: int,
+    other_tasks: List[Callable[[], None]] = None
+):
+    """
+    Replace the tables of transform outputs, loading them concurrently
+    Every table is created empty as <table>_loading, then its row ranges
+    are appended on their own connections, each committing separately.
+    Only when every range of every table is in does each table's load_
+    query swap it for the old one, in a single transaction.
+    :param tables: Transform outputs by name, as in LOAD_TABLE_NAMES.
+    :param connections: The most connections loading at once.
+    :param partition_rows: Rows per range.
+    :param other_tasks: Tasks run in the same pool, e.g. an upsert of the
+        merged data, each holding one connection.
+    """
+    connection = get_db_connection(load_db_config()['target_database'])
     try:
-        connection_details = load_db_config()['target_database']
-        connection = get_db_connection(connection_details)
+        for output, data in tables.items():
+            replace_table_to_sql(
+                data.head(0), connection, get_loading_table_name(output)
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+    range_tasks = [
+        partial(append_rows, data_range, get_loading_table_name(output))
+        for output, data in tables.items()
+        for data_range in iter_row_batches(data, partition_rows)
+    ]
+    logger.setLevel(logging.INFO)
+    logger.info(
+        f"Loading {list(tables)} in {len(range_tasks)} ranges over up to "
+        f"{connections} connections"
+    )
+    tasks = range_tasks + list(other_tasks or [])
+    try:
+        if tasks:
+            run_concurrently(tasks, max_workers=connections)
+        publish_tables(tables)
+    except Exception:
+        # The tables that were not swapped in are left as they were
+        drop_loading_tables(tables)
+        raise
+
+
+def publish_tables(tables: Dict[str, pd.DataFrame]):
+    # Connects only once the pool has closed its connections, so no more
+    # than ETL_LOAD_CONNECTIONS are open at a time
+    connection = get_db_connection(load_db_config()['target_database'])
+    try:
+        for output in tables:
+            publish_table(output, connection)
+    finally:
+        connection.close()
+
+
+def get_loading_table_name(output: str) -> str:
+    return f'{LOAD_TABLE_NAMES[output]}{LOADING_TABLE_SUFFIX}'
+
+
+def append_rows(data: pd.DataFrame, table_name: str):
+    # One range of a table, on a connection of its own
+    connection = get_db_connection(load_db_config()['target_database'])
+    try:
+        if (
+            load_etl_config()['load_engine'] == 'copy'
+            and connection.dialect.name == 'postgresql'
+        ):
+            copy_frames(
+                iter_row_batches(data, COPY_BATCH_ROWS),
+                connection,
+                table_name
+            )
+            connection.connection.commit()
+            return
         data.to_sql(
-            TARGET_TABLE_NAME,
+            table_name,
             connection,
-            if_exists='replace',
-            index=False
+            if_exists='append',
+            index=False,
+            dtype=get_column_types(data)
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def publish_table(output: str, connection):
+    table_name = LOAD_TABLE_NAMES[output]
+    try:
+        connection.execute(text(
+            import_sql_query(LOAD_QUERY_FILES[f'load_{output}'])
+        ))
+        connection.commit()
+        forget_reflected_tables()
+        logger.setLevel(logging.INFO)
+        logger.info(f"Replaced {table_name}")
+    except InternalError:
+        # Other objects, e.g. the enrichment views over the merged data,
+        # depend on the table, so it cannot be dropped
+        connection.rollback()
+        logger.setLevel(logging.WARNING)
+        logger.warning(f"Target table {table_name} has dependent objects")
+        logger.setLevel(logging.INFO)
+        logger.info("Upserting the loaded rows into it instead")
+        upsert_from_loading_table(output, connection)
+
+
+def upsert_from_loading_table(output: str, connection):
+    table_name = LOAD_TABLE_NAMES[output]
+    loading_table_name = get_loading_table_name(output)
+    source_columns = [
+        column['name']
+        for column in inspect(connection).get_columns(loading_table_name)
+    ]
+    table_columns = [
+        column.name
+        for column in get_reflected_table(connection, table_name).columns
+    ]
+    try:
+        connection.execute(text(get_upsert_from_query(
+            table_name,
+            loading_table_name,
+            source_columns,
+            table_columns,
+            LOAD_TABLE_KEYS[output]
+        )))
+        connection.execute(text(f"DROP TABLE {loading_table_name}"))
+        connection.commit()
+        logger.setLevel(logging.INFO)
+        logger.info(f"Upserted the loaded rows into {table_name}")
+    except SQLAlchemyError as e:
+        connection.rollback()
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to upsert data into {table_name}: {e}")
+        raise QueryExecutionError(f"Failed to execute upsert query: {e}")
+
+
+def drop_loading_tables(tables: Dict[str, pd.DataFrame]):
+    connection = get_db_connection(load_db_config()['target_database'])
+    try:
+        for output in tables:
+            connection.execute(text(
+                f"DROP TABLE IF EXISTS {get_loading_table_name(output)}"
+            ))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def get_upsert_from_query(
+    table_name: str,
+    source_name: str,
+    source_columns: List[str],
+    table_columns: List[str],
+    key: str
+) -> str:
+    # One set-based upsert of every row of source_name. Every column of the
+    # table is set, as in upsert_with_insert, so those the source does not
+    # have become NULL
+    columns = ', '.join(f'"{column}"' for column in source_columns)
+    updates = ', '.join(
+        f'"{column}" = EXCLUDED."{column}"'
+        if column in source_columns else f'"{column}" = NULL'
+        for column in table_columns if column != key
+    )
+    return (
+        f"INSERT INTO {table_name} ({columns}) "
+        f"SELECT {columns} FROM {source_name} "
+        f"ON CONFLICT ({key}) DO UPDATE SET {updates}"
+    )
+
+
+def load_data_chunks(
+    chunks: Iterable[pd.DataFrame],
+    incremental: bool = False
+):
+    # Each merged chunk is loaded as soon as it is transformed. The first
+    # replaces the table as a full load would, unless the run is
+    # incremental; the rest are upserted into it. No chunk is a full
+    # snapshot, so a differential load never deletes rows here.
+    # A differential load reads the target's row hashes once, before the
+    # first chunk, rather than once per chunk. Each transaction_id is in
+    # one chunk only, so the hashes stay right for the chunks to come
+    target_hashes = read_target_row_hashes()
+    for chunk_number, chunk in enumerate(chunks):
+        create_merged_data_table(
+            chunk,
+            incremental or chunk_number > 0,
+            target_hashes=target_hashes
+        )
+
+    enrich_database_data()
+
+    return None
+
+
+def load_customer_outputs(outputs: Mapping):
+    """
+    Load the ETL_LOAD_OUTPUTS other than merged_data after a streaming run
+    The chunks only carry merged_data. The other outputs come from the
+    customer aggregates, which are final once every chunk is in, and
+    replace their tables as in load_data().
+    :param outputs: Customer outputs, e.g. from get_customer_outputs().
+    """
+    etl_config = load_etl_config()
+    tables = {
+        output: outputs[output]
+        for output in etl_config['load_outputs'] if output != 'merged_data'
+    }
+    if tables:
+        replace_tables(
+            tables,
+            etl_config['load_connections'],
+            etl_config['load_partition_rows']
         )
+
+
+def read_target_row_hashes() -> Optional[pd.DataFrame]:
+    # None unless differential loads are on. A table that does not exist
+    # yet has no hashes, so every row of the stream is new
+    if not load_etl_config()['differential_load']:
+        return None
+
+    connection = get_db_connection(load_db_config()['target_database'])
+    try:
+        if not inspect(connection).has_table(TARGET_TABLE_NAME):
+            return pd.DataFrame({
+                UPSERT_KEY: pd.Series(dtype='int64'),
+                ROW_HASH_COLUMN: pd.Series(dtype='int64')
+            })
+        add_row_hash_column(connection, TARGET_TABLE_NAME)
+        return read_row_hashes(connection, TARGET_TABLE_NAME)
+    finally:
+        connection.close()
+
+
+def create_merged_data_table(
+    data: pd.DataFrame,
+    incremental: bool = False,
+    delete_missing: bool = False,
+    target_hashes: Optional[pd.DataFrame] = None
+):
+    try:
+        connection_details = load_db_config()['target_database']
+        connection = get_db_connection(connection_details)
+        if load_etl_config()['differential_load']:
+            # The hashes are stored with the rows, so the next load can
+            # tell which rows changed
+            data = add_row_hashes(data)
+            if inspect(connection).has_table(TARGET_TABLE_NAME):
+                load_changed_rows(
+                    data, connection, TARGET_TABLE_NAME, delete_missing,
+                    target_hashes
+                )
+                return
+        if incremental:
+            # An incremental extract only holds the new rows, so they are
+            # merged into the existing table rather than replacing it
+            upsert_on_existing_table(data, connection)
+            return
+        replace_table = LOAD_ENGINES[load_etl_config()['load_engine']]
+        replace_table(data, connection, TARGET_TABLE_NAME)
+        forget_reflected_tables()
         set_primary_key(connection)
     except InternalError:
         logger.setLevel(logging.WARNING)
@@ -90,56 +457,365 @@ def create_merged_data_table(data: pd.DataFrame):
         logger.info("Successfully closed database connection.")
 
 
-def upsert_on_existing_table(data: pd.DataFrame, connection):
+def replace_table_to_sql(data: pd.DataFrame, connection, table_name: str):
+    data.to_sql(
+        table_name,
+        connection,
+        if_exists='replace',
+        index=False,
+        dtype=get_column_types(data)
+    )
+
+
+def replace_table_copy(data: pd.DataFrame, connection, table_name: str):
+    # Bulk alternative to replace_table_to_sql: the rows are streamed to
+    # Postgres as CSV through COPY FROM STDIN, instead of being bound as
+    # INSERT parameters one row at a time
+    if connection.dialect.name != 'postgresql':
+        logger.setLevel(logging.WARNING)
+        logger.warning(
+            f"COPY needs a Postgres target, not {connection.dialect.name}; "
+            f"loading with to_sql instead"
+        )
+        replace_table_to_sql(data, connection, table_name)
+        return
+
+    # to_sql creates the empty table, so the column types are the same
+    # whichever engine loads the rows
+    replace_table_to_sql(data.head(0), connection, table_name)
+    copy_frames(
+        iter_row_batches(data, COPY_BATCH_ROWS), connection, table_name
+    )
+    connection.connection.commit()
+
+
+def copy_frames(
+    frames: Iterable[pd.DataFrame],
+    connection,
+    table_name: str
+):
+    # Each frame, e.g. a batch of rows or a transformed chunk, is rendered
+    # into an in-memory CSV buffer and copied into the existing table.
+    # The caller commits, so the copy can be part of a larger transaction
+    cursor = connection.connection.cursor()
     try:
-        data_dict = data.to_dict(orient='records')
+        rows = 0
+        for frame in frames:
+            columns = ', '.join(f'"{column}"' for column in frame.columns)
+            buffer = io.StringIO()
+            frame.to_csv(
+                buffer,
+                index=False,
+                header=False,
+                na_rep=COPY_NULL,
+                date_format=COPY_DATE_FORMAT
+            )
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY {table_name} ({columns}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                buffer
+            )
+            rows += frame.shape[0]
+    except psycopg2.Error as e:
+        connection.connection.rollback()
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to copy data into {table_name}: {e}")
+        raise QueryExecutionError(f"Failed to execute COPY: {e}")
+    finally:
+        cursor.close()
+
+    logger.setLevel(logging.INFO)
+    logger.info(f"Copied {rows} rows into {table_name}")
 
-        # Reflect the table from the database
-        metadata = MetaData()
-        table = Table(TARGET_TABLE_NAME, metadata, autoload_with=connection)
 
-        # Create an insert statement with an upsert (ON CONFLICT) clause
-        insert_stmt = insert(table).values(data_dict)
-        upsert_stmt = insert_stmt.on_conflict_do_update(
-            index_elements=['transaction_id'],
-            set_={
-                    col.name: insert_stmt.excluded[col.name]
-                    for col in table.columns if col.name != 'transaction_id'
-            }
+def iter_row_batches(
+    data: pd.DataFrame,
+    batch_rows: int
+) -> Iterator[pd.DataFrame]:
+    for start in range(0, data.shape[0], batch_rows):
+        yield data.iloc[start:start + batch_rows]
+
+
+# Engines that can replace a table with a DataFrame, selected by name
+LOAD_ENGINES = {
+    'to_sql': replace_table_to_sql,
+    'copy': replace_table_copy
+}
+
+
+def load_changed_rows(
+    data: pd.DataFrame,
+    connection,
+    table_name: str,
+    delete_missing: bool = False,
+    target_hashes: Optional[pd.DataFrame] = None
+):
+    # Upserts only the rows that are new or differ from the table, and
+    # optionally deletes the table's rows that data no longer has. The
+    # table's hashes are read here unless the caller already has them
+    if target_hashes is None:
+        add_row_hash_column(connection, table_name)
+        target_hashes = read_row_hashes(connection, table_name)
+    changed_rows = get_changed_rows(data, target_hashes)
+    logger.setLevel(logging.INFO)
+    logger.info(
+        f"Differential load: {changed_rows.shape[0]} of {data.shape[0]} "
+        f"rows are new or changed"
+    )
+    upsert_on_existing_table(changed_rows, connection, table_name)
+
+    if delete_missing:
+        delete_rows(
+            connection, table_name, get_missing_keys(data, target_hashes)
         )
 
-        # Log the SQL statement and parameters
-        logger.debug(
-            f"Upsert statement: {str(upsert_stmt.compile(
-                dialect=connection.dialect
-            ))}"
+
+def add_row_hash_column(connection, table_name: str):
+    # Tables loaded before differential loads were switched on have no
+    # hashes. Their rows read as hash 0, so they are all sent once more
+    columns = [
+        column['name']
+        for column in inspect(connection).get_columns(table_name)
+    ]
+    if ROW_HASH_COLUMN in columns:
+        return
+
+    connection.execute(text(
+        f"ALTER TABLE {table_name} ADD COLUMN {ROW_HASH_COLUMN} BIGINT"
+    ))
+    connection.commit()
+    forget_reflected_tables()
+    logger.setLevel(logging.INFO)
+    logger.info(f"Added {ROW_HASH_COLUMN} column to {table_name}")
+
+
+def read_row_hashes(connection, table_name: str) -> pd.DataFrame:
+    # NULL is read as 0, so the column stays int64; a float would lose the
+    # hashes' low bits. No row hashes to 0 in practice
+    try:
+        return pd.read_sql_query(
+            f"SELECT transaction_id, COALESCE({ROW_HASH_COLUMN}, 0) "
+            f"AS {ROW_HASH_COLUMN} FROM {table_name}",
+            connection,
+            dtype={'transaction_id': 'int64', ROW_HASH_COLUMN: 'int64'}
         )
-        logger.debug(f"Parameters: {data_dict}")
+    except pd.errors.DatabaseError as e:
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to read row hashes of {table_name}: {e}")
+        raise QueryExecutionError(f"Failed to execute query: {e}")
+
 
-        # Create a session
-        Session = sessionmaker(bind=connection)
-        session = Session()
+def delete_rows(connection, table_name: str, keys):
+    if len(keys) == 0:
+        return
 
-        # # Execute the upsert statement within a transaction
-        session.execute(upsert_stmt)
-        # session.commit()
+    try:
+        for start in range(0, len(keys), DELETE_BATCH_ROWS):
+            connection.execute(
+                text(
+                    f"DELETE FROM {table_name} "
+                    f"WHERE {UPSERT_KEY} = ANY(:keys)"
+                ),
+                {'keys': keys[start:start + DELETE_BATCH_ROWS].tolist()}
+            )
+        connection.commit()
     except SQLAlchemyError as e:
-        if 'session' in locals():
-            session.rollback()
+        connection.rollback()
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to delete rows from {table_name}: {e}")
+        raise QueryExecutionError(f"Failed to execute delete query: {e}")
+
+    logger.setLevel(logging.INFO)
+    logger.info(
+        f"Deleted {len(keys)} rows missing from the snapshot from "
+        f"{table_name}"
+    )
+
+
+def get_column_types(data: pd.DataFrame) -> dict:
+    # pandas would create TIMESTAMP columns; the dates carry no time of day
+    column_types = {
+        column: Date()
+        for column in data.select_dtypes(include='datetime64').columns
+    }
+    # Downcast in-memory types must not narrow the table, or a later upsert
+    # of larger IDs would overflow a SMALLINT column
+    for column in data.columns:
+        dtype = data[column].dtype
+        if pd.api.types.is_integer_dtype(dtype):
+            column_types[column] = BigInteger()
+        elif isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            column_types[column] = Text()
+    return column_types
+
+
+def read_merged_data_table() -> pd.DataFrame:
+    # Everything loaded so far, e.g. to rebuild state kept between runs
+    try:
+        connection_details = load_db_config()['target_database']
+        connection = get_db_connection(connection_details)
+        return pd.read_sql_table(TARGET_TABLE_NAME, connection).drop(
+            columns=ROW_HASH_COLUMN, errors='ignore'
+        )
+    except pd.errors.DatabaseError as e:
         logger.setLevel(logging.ERROR)
-        logger.error(f"Failed to upsert data into {TARGET_TABLE_NAME}: {e}")
+        logger.error(f"Failed to read {TARGET_TABLE_NAME}: {e}")
+        raise QueryExecutionError(f"Failed to execute query: {e}")
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+def upsert_on_existing_table(
+    data: pd.DataFrame,
+    connection,
+    table_name: str = TARGET_TABLE_NAME
+):
+    if data.empty:
+        logger.setLevel(logging.INFO)
+        logger.info(f"No rows to upsert into {table_name}")
+        return
+
+    upsert = UPSERT_ENGINES[load_etl_config()['load_engine']]
+    upsert(data, connection, table_name)
+
+
+def upsert_with_insert(data: pd.DataFrame, connection, table_name: str):
+    # Rows are sent in statements of at most UPSERT_BATCH_ROWS rows, all in
+    # one transaction, so neither the parameter list nor the statement
+    # grows with the size of the load
+    table = get_reflected_table(connection, table_name)
+    batches = (data.shape[0] + UPSERT_BATCH_ROWS - 1) // UPSERT_BATCH_ROWS
+    logger.setLevel(logging.DEBUG)
+    logger.debug(
+        f"Upserting {data.shape[0]} rows into {table_name} in {batches} "
+        f"statements of up to {UPSERT_BATCH_ROWS} rows; columns "
+        f"{list(data.columns)}"
+    )
+
+    # Create a session
+    Session = sessionmaker(bind=connection)
+    session = Session()
+    try:
+        for batch in iter_row_batches(data, UPSERT_BATCH_ROWS):
+            session.execute(build_upsert_statement(table, batch))
+        session.commit()
+        # The session joins the transaction the reflection opened on the
+        # connection, so that outer transaction has to be committed too
+        connection.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to upsert data into {table_name}: {e}")
         raise QueryExecutionError(f"Failed to execute upsert query: {e}")
     except Exception as e:
-        if 'session' in locals():
-            session.rollback()
+        session.rollback()
         logger.setLevel(logging.ERROR)
         logger.error(f"An error occurred when upserting data: {e}")
         raise
     finally:
-        if 'session' in locals():
-            session.close()
+        session.close()
         logger.info("Successfully closed database session.")
 
+    logger.setLevel(logging.INFO)
+    logger.info(f"Upserted {data.shape[0]} rows into {table_name}")
+
+
+def build_upsert_statement(table: Table, data: pd.DataFrame):
+    # Missing values (NaN, or pd.NA in nullable and Arrow columns) are
+    # sent as NULL, as to_sql does
+    data_dict = data.astype(object).where(
+        data.notna(), None
+    ).to_dict(orient='records')
+
+    # Create an insert statement with an upsert (ON CONFLICT) clause
+    insert_stmt = insert(table).values(data_dict)
+    return insert_stmt.on_conflict_do_update(
+        index_elements=[UPSERT_KEY],
+        set_={
+            col.name: insert_stmt.excluded[col.name]
+            for col in table.columns if col.name != UPSERT_KEY
+        }
+    )
+
+
+def upsert_with_copy(data: pd.DataFrame, connection, table_name: str):
+    # The rows are copied into a temporary staging table, then merged into
+    # the target with one set-based INSERT ... SELECT ... ON CONFLICT
+    if connection.dialect.name != 'postgresql':
+        logger.setLevel(logging.WARNING)
+        logger.warning(
+            f"COPY needs a Postgres target, not {connection.dialect.name}; "
+            f"upserting with INSERT statements instead"
+        )
+        upsert_with_insert(data, connection, table_name)
+        return
+
+    staging_table_name = f'{table_name}_staging'
+    table_columns = [
+        column.name
+        for column in get_reflected_table(connection, table_name).columns
+    ]
+    cursor = connection.connection.cursor()
+    try:
+        # Dropped when the upsert commits or rolls back
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging_table_name} "
+            f"(LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        copy_frames(
+            iter_row_batches(data, COPY_BATCH_ROWS),
+            connection,
+            staging_table_name
+        )
+        cursor.execute(get_upsert_from_query(
+            table_name,
+            staging_table_name,
+            list(data.columns),
+            table_columns,
+            UPSERT_KEY
+        ))
+        upserted = cursor.rowcount
+        connection.connection.commit()
+    except (psycopg2.Error, QueryExecutionError) as e:
+        connection.connection.rollback()
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to upsert data into {table_name}: {e}")
+        raise QueryExecutionError(f"Failed to execute upsert query: {e}")
+    finally:
+        cursor.close()
+
+    logger.setLevel(logging.INFO)
+    logger.info(
+        f"Upserted {upserted} rows into {table_name} through "
+        f"{staging_table_name}"
+    )
+
+
+def get_reflected_table(connection, table_name: str) -> Table:
+    # Reflection queries the catalog, so it is done once per database and
+    # table rather than for every upsert
+    key = (connection.engine.url.render_as_string(), table_name)
+    if key not in _reflected_tables:
+        _reflected_tables[key] = Table(
+            table_name, MetaData(), autoload_with=connection
+        )
+    return _reflected_tables[key]
+
+
+def forget_reflected_tables():
+    # Call when a table is replaced, as its columns may have changed
+    _reflected_tables.clear()
+
+
+# Engines that can upsert a DataFrame into an existing table, selected by
+# the same name as the engine that replaces the table
+UPSERT_ENGINES = {
+    'to_sql': upsert_with_insert,
+    'copy': upsert_with_copy
+}
+
 
 def set_primary_key(connection):
     create_primary_key_query = import_sql_query(
@@ -148,6 +824,7 @@ def set_primary_key(connection):
     executable_sql = text(create_primary_key_query)
     try:
         connection.execute(executable_sql)
+        connection.commit()
         logger.info("Primary key set on target table")
     except Exception as e:
         logger.setLevel(logging.ERROR)
@@ -0,0 +1,5 @@
+DROP TABLE IF EXISTS cleaned_high_value_customers_table;
+ALTER TABLE cleaned_high_value_customers_table_loading
+RENAME TO cleaned_high_value_customers_table;
+ALTER TABLE cleaned_high_value_customers_table
+ADD PRIMARY KEY (customer_id);
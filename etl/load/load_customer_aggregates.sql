@@ -0,0 +1,5 @@
+DROP TABLE IF EXISTS customer_aggregates_table;
+ALTER TABLE customer_aggregates_table_loading
+RENAME TO customer_aggregates_table;
+ALTER TABLE customer_aggregates_table
+ADD PRIMARY KEY (customer_id);
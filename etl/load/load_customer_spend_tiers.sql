@@ -0,0 +1,5 @@
+DROP TABLE IF EXISTS customer_spend_tiers_table;
+ALTER TABLE customer_spend_tiers_table_loading
+RENAME TO customer_spend_tiers_table;
+ALTER TABLE customer_spend_tiers_table
+ADD PRIMARY KEY (customer_id);
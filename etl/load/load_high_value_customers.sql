@@ -0,0 +1,5 @@
+DROP TABLE IF EXISTS high_value_customers_table;
+ALTER TABLE high_value_customers_table_loading
+RENAME TO high_value_customers_table;
+ALTER TABLE high_value_customers_table
+ADD PRIMARY KEY (customer_id);
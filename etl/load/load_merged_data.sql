@@ -0,0 +1,5 @@
+DROP TABLE IF EXISTS transactions_by_customers;
+ALTER TABLE transactions_by_customers_loading
+RENAME TO transactions_by_customers;
+ALTER TABLE transactions_by_customers
+ADD CONSTRAINT pk_transaction_id PRIMARY KEY (transaction_id);
@@ -3,6 +3,7 @@ import logging
 from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 from config.db_config import load_db_config
+from config.etl_config import load_etl_config
 from utils.db_utils import create_db_engine
 from utils.file_utils import INDEXES_PATH, QUERY_PATH
 from utils.logging_utils import setup_logger
@@ -17,7 +18,8 @@ HIGH_VALUE_CUSTOMER_LOWER_LIMIT = {
 
 QUERY_FILE_NAMES = {
     'hvcv': 'high_value_customers_view.sql',
-    'hvccv': 'high_value_customers_cleaned_view.sql'
+    'hvccv': 'high_value_customers_cleaned_view.sql',
+    'cstv': 'customer_spend_tiers_view.sql'
 }
 
 
@@ -58,6 +60,20 @@ def apply_indexes():
         session.close()
 
 
+def get_view_parameters() -> dict:
+    # The spend tiers go in as arrays, one element per tier, so a view
+    # definition holds any number of them
+    spend_tiers = load_etl_config()['spend_tiers']
+    return {
+        **HIGH_VALUE_CUSTOMER_LOWER_LIMIT,
+        'tier_names': [name for name, _, _ in spend_tiers],
+        'tier_bounds': [bound for _, bound, _ in spend_tiers],
+        'tier_is_percentile': [
+            is_percentile for _, _, is_percentile in spend_tiers
+        ]
+    }
+
+
 def create_views():
     # Create an SQL query in a file that creates a view of high value customers
     # Import the SQL query from the file
@@ -70,10 +86,7 @@ def create_views():
             engine = create_db_engine(connection_details)
             Session = sessionmaker(bind=engine)
             session = Session()
-            session.execute(
-                executable_sql,
-                HIGH_VALUE_CUSTOMER_LOWER_LIMIT
-            )
+            session.execute(executable_sql, get_view_parameters())
             logger.info(f"{query_file} view created")
             session.commit()
     except Exception as e:
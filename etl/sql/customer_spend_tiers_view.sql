@@ -0,0 +1,63 @@
+CREATE OR REPLACE VIEW customer_spend_tiers AS
+WITH customer_totals AS (
+    SELECT
+        tbc.customer_id,
+        (ARRAY_AGG(tbc.name ORDER BY tbc.transaction_id DESC))[1] AS name,
+        (ARRAY_AGG(tbc.age ORDER BY tbc.transaction_id DESC))[1] AS age,
+        (ARRAY_AGG(tbc.country ORDER BY tbc.transaction_id DESC))[1]
+            AS country,
+        (ARRAY_AGG(tbc.is_active ORDER BY tbc.transaction_id DESC))[1]
+            AS is_active,
+        SUM(tbc.amount) AS total_amount,
+        AVG(tbc.amount) AS average_transaction_amount
+    FROM
+        transactions_by_customers AS tbc
+    GROUP BY
+        tbc.customer_id
+),
+tier_thresholds AS (
+    SELECT
+        tiers.tier_name,
+        tiers.tier_order,
+        CASE
+            WHEN tiers.is_percentile THEN (
+                SELECT
+                    PERCENTILE_CONT(tiers.bound) WITHIN GROUP (
+                        ORDER BY ct.total_amount
+                    )
+                FROM
+                    customer_totals AS ct
+            )
+            ELSE tiers.bound
+        END AS threshold
+    FROM
+        UNNEST(
+            CAST(:tier_names AS TEXT[]),
+            CAST(:tier_bounds AS DOUBLE PRECISION[]),
+            CAST(:tier_is_percentile AS BOOLEAN[])
+        ) WITH ORDINALITY AS tiers (
+            tier_name, bound, is_percentile, tier_order
+        )
+)
+SELECT
+    ct.customer_id,
+    ct.name,
+    ct.age,
+    ct.country,
+    ct.is_active,
+    ct.total_amount,
+    ct.average_transaction_amount,
+    (
+        SELECT
+            tt.tier_name
+        FROM
+            tier_thresholds AS tt
+        WHERE
+            tt.threshold < ct.total_amount
+        ORDER BY
+            tt.threshold DESC,
+            tt.tier_order DESC
+        LIMIT 1
+    ) AS spend_tier
+FROM
+    customer_totals AS ct;
@@ -0,0 +1,9 @@
+SELECT
+    customer_id,
+    transaction_id,
+    transaction_date,
+    amount
+FROM
+    transactions
+WHERE
+    transaction_id > :last_transaction_id
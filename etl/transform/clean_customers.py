@@ -1,26 +1,32 @@
 import pandas as pd
-from utils.file_utils import save_dataframe_to_csv
+from utils.file_utils import save_checkpoint
+from utils.flag_utils import standardise_flags, TRUTHY_VALUES
 
 
 def clean_customers(customers: pd.DataFrame) -> pd.DataFrame:
+    customers = clean_customers_chunk(customers)
+
+    # Save the dataframe as a checkpoint for logging purposes
+    output_dir = 'etl/data/processed'
+    file_name = 'cleaned_customers.csv'
+    save_checkpoint(customers, output_dir, file_name)
+
+    return customers
+
+
+def clean_customers_chunk(customers: pd.DataFrame) -> pd.DataFrame:
     # Remove rows with missing values
     # Standardise country string to uppercase
     # Standardise the is_active column
     # Remove duplicates
     customers = customers.dropna(subset=['country', 'is_active'])
-    customers.loc[:, 'country'] = customers['country'].str.upper()
-    customers.loc[:, 'is_active'] = customers['is_active'].apply(
-        standardise_is_active
+    # Replace the columns rather than setting values in place, as the
+    # extracted columns may be categorical
+    customers = customers.assign(
+        country=customers['country'].str.upper(),
+        is_active=standardise_flags(customers['is_active'])
     )
     customers = customers.drop_duplicates()
-    # Set the is_active column to boolean
-    customers['is_active'] = customers['is_active'].astype(bool)
-
-    # Save the dataframe as a CSV for logging purposes
-    output_dir = 'etl/data/processed'
-    file_name = 'cleaned_customers.csv'
-    save_dataframe_to_csv(customers, output_dir, file_name)
-
     return customers
 
 
@@ -29,7 +35,7 @@ def standardise_is_active(value: str) -> bool:
         return False
     if isinstance(value, bool):
         return value
-    if value.lower() in ['active', '1', 'true']:
+    if value.lower() in TRUTHY_VALUES:
         return True
     return False  # Default to False for any other cases
 
@@ -1,40 +1,96 @@
+import numpy as np
 import pandas as pd
-from utils.date_utils import standardise_date
-from utils.file_utils import save_dataframe_to_csv
+from typing import Tuple
+from utils.date_utils import standardise_dates, DATE_OUTPUT_FORMAT
+from utils.file_utils import save_checkpoint
 
 
-def clean_transactions(transactions: pd.DataFrame) -> pd.DataFrame:
+def clean_transactions(
+    transactions: pd.DataFrame,
+    native_dates: bool = False
+) -> pd.DataFrame:
+    transactions = clean_transactions_chunk(transactions, native_dates)
+
+    # Save the dataframe as a checkpoint for logging purposes
+    # Ensure the directory exists
+    output_dir = 'etl/data/processed'
+    file_name = 'cleaned_transactions.csv'
+    save_checkpoint(
+        transactions, output_dir, file_name, DATE_OUTPUT_FORMAT
+    )
+
+    return transactions
+
+
+def clean_transactions_chunk(
+    transactions: pd.DataFrame,
+    native_dates: bool = False
+) -> pd.DataFrame:
     # Remove rows with missing values
     # Standardise date format
     # Remove duplicates
     transactions = remove_missing_values(transactions)
-    transactions = standardise_date_format(transactions)
+    transactions = standardise_date_format(transactions, native_dates)
     transactions = transactions.drop_duplicates()
     transactions['amount'] = transactions['amount'].astype('float64')
+    return transactions
 
-    # Save the dataframe as a CSV for logging purposes
-    # Ensure the directory exists
-    output_dir = 'etl/data/processed'
-    file_name = 'cleaned_transactions.csv'
-    save_dataframe_to_csv(transactions, output_dir, file_name)
 
-    return transactions
+def remove_seen_transactions(
+    transactions: pd.DataFrame,
+    seen_transaction_ids: np.ndarray
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Drop transactions already seen in an earlier chunk of the same run
+    drop_duplicates() only sees one chunk, so a row repeated in a later
+    chunk is recognised by its transaction_id, the target's primary key.
+    :param transactions: A cleaned chunk of transactions.
+    :param seen_transaction_ids: Sorted IDs from the earlier chunks.
+    :return: The new transactions and the updated sorted IDs.
+    """
+    transaction_ids = transactions['transaction_id'].to_numpy()
+    positions = np.searchsorted(seen_transaction_ids, transaction_ids)
+    seen = np.zeros(len(transaction_ids), dtype=bool)
+    in_range = positions < len(seen_transaction_ids)
+    seen[in_range] = (
+        seen_transaction_ids[positions[in_range]]
+        == transaction_ids[in_range]
+    )
+    transactions = transactions[~seen]
+
+    # Both arrays are sorted runs, which a stable sort merges in linear
+    # time, so the IDs stay cheap to keep sorted as chunks arrive
+    seen_transaction_ids = np.sort(
+        np.concatenate([
+            seen_transaction_ids,
+            np.unique(transactions['transaction_id'].to_numpy())
+        ]),
+        kind='stable'
+    )
+    return transactions, seen_transaction_ids
 
 
 def remove_missing_values(transactions: pd.DataFrame) -> pd.DataFrame:
-    transactions = transactions.dropna(subset='transaction_date')
-    transactions = transactions.dropna(subset=['amount'])
-    transactions = transactions[transactions['amount'] != 'INVALID']
+    # Amounts that are not numbers (e.g. 'INVALID') become NaN and are
+    # dropped along with the missing ones
+    transactions = transactions.assign(
+        amount=pd.to_numeric(transactions['amount'], errors='coerce')
+    )
+    transactions = transactions.dropna(subset=['transaction_date', 'amount'])
     return transactions
 
 
-def standardise_date_format(transactions: pd.DataFrame) -> pd.DataFrame:
-    transactions['transaction_date'] = (
-        transactions['transaction_date'].apply(standardise_date)
-    )
+def standardise_date_format(
+    transactions: pd.DataFrame,
+    native_dates: bool = False
+) -> pd.DataFrame:
     transactions['transaction_date'] = (
-        transactions['transaction_date'].dt.strftime('%d/%m/%Y')
+        standardise_dates(transactions['transaction_date'])
     )
+    if not native_dates:
+        transactions['transaction_date'] = (
+            transactions['transaction_date'].dt.strftime(DATE_OUTPUT_FORMAT)
+        )
     transactions = transactions.dropna(subset=['transaction_date'])
     return transactions
 
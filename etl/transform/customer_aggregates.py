@@ -0,0 +1,199 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+from typing import Optional
+from etl.transform.group_aggregates import (
+    factorize_groups,
+    group_last_positions,
+    group_max,
+    group_size,
+    group_sum
+)
+from utils.logging_utils import setup_logger
+from utils.watermark_utils import WATERMARK_DIR
+
+# Configure the logger
+logger = setup_logger(__name__, 'transform_data.log', level=logging.DEBUG)
+
+CUSTOMER_AGGREGATES_NAME = 'customer_aggregates'
+
+# Running totals per customer plus the customer's latest attributes.
+# last_transaction_id marks which transactions are already counted, so
+# a batch that is transformed twice (e.g. a rerun after a failed load)
+# is not added twice
+CUSTOMER_AGGREGATES_SCHEMA = {
+    'customer_id': 'int64',
+    'transaction_count': 'int64',
+    'total_spend': 'float64',
+    'last_transaction_id': 'int64',
+    'name': 'object',
+    'age': 'float64',
+    'country': 'object',
+    'is_active': 'bool'
+}
+
+CUSTOMER_ATTRIBUTES = ['name', 'age', 'country', 'is_active']
+
+HIGH_VALUE_COLUMNS = [
+    'customer_id', 'total_spend', 'avg_transaction_value',
+    'name', 'age', 'country', 'is_active'
+]
+
+
+def empty_customer_aggregates() -> pd.DataFrame:
+    return pd.DataFrame({
+        column: pd.Series(dtype=dtype)
+        for column, dtype in CUSTOMER_AGGREGATES_SCHEMA.items()
+    })
+
+
+def aggregate_customers(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate merged transactions into per-customer running totals
+    :param data: Merged transactions and customers.
+    :return: One row per customer in CUSTOMER_AGGREGATES_SCHEMA.
+    """
+    # The totals are NumPy passes over the factorized customer_ids. The
+    # attributes are taken from each customer's last row, as groupby's
+    # 'last' would give them, without aggregating the text columns
+    codes, customer_ids = factorize_groups(data['customer_id'])
+    groups = len(customer_ids)
+    aggregates = pd.DataFrame({
+        'customer_id': customer_ids,
+        'transaction_count': group_size(codes, groups),
+        'total_spend': group_sum(codes, data['amount'], groups),
+        'last_transaction_id': group_max(
+            codes, data['transaction_id'], groups
+        )
+    })
+    attributes = data[CUSTOMER_ATTRIBUTES].iloc[
+        group_last_positions(codes, groups)
+    ].reset_index(drop=True)
+    aggregates = pd.concat([aggregates, attributes], axis=1)
+    return aggregates.astype(CUSTOMER_AGGREGATES_SCHEMA)
+
+
+def update_customer_aggregates(
+    aggregates: pd.DataFrame,
+    data: pd.DataFrame,
+    counted: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    """
+    Add a batch of merged transactions to the running aggregates
+    Only the batch is scanned. Transactions at or below a customer's
+    last_transaction_id in counted are already counted and are skipped.
+    Customer attributes are taken from the batch where it has them.
+    :param aggregates: Aggregates from earlier runs.
+    :param data: The new merged transactions.
+    :param counted: The aggregates as saved before this run, when
+        aggregates already holds earlier chunks of it. Chunks are not
+        ordered by transaction_id, so skipping against their
+        last_transaction_id would drop rows of later chunks.
+        Defaults to aggregates.
+    :return: The updated aggregates.
+    """
+    if counted is None:
+        counted = aggregates
+    counted_up_to = data['customer_id'].map(
+        counted.set_index('customer_id')['last_transaction_id']
+    )
+    data = data[~(data['transaction_id'] <= counted_up_to)]
+
+    combined = pd.concat(
+        [aggregates, aggregate_customers(data)], ignore_index=True
+    )
+    updated = combined.groupby('customer_id').agg(
+        transaction_count=('transaction_count', 'sum'),
+        total_spend=('total_spend', 'sum'),
+        last_transaction_id=('last_transaction_id', 'max'),
+        **{column: (column, 'last') for column in CUSTOMER_ATTRIBUTES}
+    ).reset_index()
+    return updated.astype(CUSTOMER_AGGREGATES_SCHEMA)
+
+
+def get_high_value_customers_from_aggregates(
+    aggregates: pd.DataFrame,
+    lower_bound: float
+) -> pd.DataFrame:
+    # The customers whose total spend is above lower_bound, derived from
+    # the running aggregates without rescanning the transactions
+    high_value_customers = aggregates.assign(
+        avg_transaction_value=(
+            aggregates['total_spend'] / aggregates['transaction_count']
+        )
+    )
+    high_value_customers = high_value_customers[
+        high_value_customers['total_spend'] > lower_bound
+    ]
+    return high_value_customers[HIGH_VALUE_COLUMNS]
+
+
+def compare_customer_aggregates(
+    aggregates: pd.DataFrame,
+    expected: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Find customers whose running aggregates differ from a batch rebuild
+    Sums built up batch by batch can differ from a single sum in the
+    last few bits, so totals are compared with np.isclose.
+    :param aggregates: The persisted running aggregates.
+    :param expected: aggregate_customers() over the full history.
+    :return: The customer_ids and values that do not match.
+    """
+    compared = pd.merge(
+        aggregates, expected, on='customer_id', how='outer',
+        suffixes=('', '_expected'), indicator=True
+    )
+    matches = (
+        (compared['_merge'] == 'both')
+        & (
+            compared['transaction_count']
+            == compared['transaction_count_expected']
+        )
+        & np.isclose(
+            compared['total_spend'], compared['total_spend_expected']
+        )
+    )
+    return compared.loc[
+        ~matches,
+        [
+            'customer_id',
+            'transaction_count', 'transaction_count_expected',
+            'total_spend', 'total_spend_expected'
+        ]
+    ]
+
+
+def get_customer_aggregates_path() -> str:
+    # Kept per environment next to the extract watermarks
+    env = os.getenv('ENV', 'dev')
+    return os.path.join(
+        WATERMARK_DIR, f'{CUSTOMER_AGGREGATES_NAME}_{env}.csv'
+    )
+
+
+def load_customer_aggregates() -> Optional[pd.DataFrame]:
+    path = get_customer_aggregates_path()
+    if not os.path.exists(path):
+        return None
+    aggregates = pd.read_csv(path, dtype=CUSTOMER_AGGREGATES_SCHEMA)
+    logger.setLevel(logging.INFO)
+    logger.info(
+        f"Loaded aggregates for {aggregates.shape[0]} customers from {path}"
+    )
+    return aggregates
+
+
+def save_customer_aggregates(aggregates: pd.DataFrame) -> None:
+    # Written next to the final file and renamed, like the watermarks, so
+    # a failed run never leaves half-written aggregates behind
+    path = get_customer_aggregates_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.tmp'
+    aggregates.to_csv(temp_path, index=False)
+    os.replace(temp_path, path)
+    logger.setLevel(logging.INFO)
+    logger.info(
+        f"Saved aggregates for {aggregates.shape[0]} customers to {path}"
+    )
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# Group aggregations over numeric columns, without pandas' groupby
+# machinery. The keys are factorized once into group codes and every
+# aggregate is a single NumPy pass over those codes, so text columns are
+# never aggregated; callers look them up afterwards for the groups they
+# keep. Groups are numbered in sorted key order, as groupby orders them,
+# and rows with a missing key belong to no group, as with dropna=True.
+
+
+def factorize_groups(keys: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Number the groups of a key column
+    :param keys: The column to group by.
+    :return: The group code of every row, -1 where the key is missing,
+        and the keys of the groups in sorted order.
+    """
+    codes, group_keys = pd.factorize(keys, sort=True)
+    return codes, pd.Index(group_keys, name=keys.name)
+
+
+def group_size(codes: np.ndarray, groups: int) -> np.ndarray:
+    return np.bincount(codes[codes >= 0], minlength=groups)
+
+
+def group_sum(codes: np.ndarray, values, groups: int) -> np.ndarray:
+    # Missing values are skipped, as in groupby().sum()
+    values = np.asarray(values, dtype='float64')
+    valid = (codes >= 0) & ~np.isnan(values)
+    return np.bincount(codes[valid], weights=values[valid], minlength=groups)
+
+
+def group_mean(codes: np.ndarray, values, groups: int) -> np.ndarray:
+    # Missing values are skipped, as in groupby().mean()
+    values = np.asarray(values, dtype='float64')
+    valid = (codes >= 0) & ~np.isnan(values)
+    counts = np.bincount(codes[valid], minlength=groups)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+def group_max(codes: np.ndarray, values, groups: int) -> np.ndarray:
+    # For numeric columns without missing values, e.g. IDs
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        lowest = np.iinfo(values.dtype).min
+    else:
+        values = values.astype('float64')
+        lowest = -np.inf
+    valid = codes >= 0
+    maximums = np.full(groups, lowest, dtype=values.dtype)
+    np.maximum.at(maximums, codes[valid], values[valid])
+    return maximums
+
+
+def group_first_positions(codes: np.ndarray, groups: int) -> np.ndarray:
+    # Row position of each group's first row
+    valid = codes >= 0
+    positions = np.full(groups, len(codes), dtype='int64')
+    np.minimum.at(positions, codes[valid], np.flatnonzero(valid))
+    return positions
+
+
+def group_last_positions(codes: np.ndarray, groups: int) -> np.ndarray:
+    # Row position of each group's last row
+    valid = codes >= 0
+    positions = np.full(groups, -1, dtype='int64')
+    np.maximum.at(positions, codes[valid], np.flatnonzero(valid))
+    return positions
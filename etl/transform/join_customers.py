@@ -0,0 +1,62 @@
+import pandas as pd
+
+CUSTOMER_KEY = 'customer_id'
+
+
+def build_customer_index(customers: pd.DataFrame) -> pd.DataFrame:
+    """
+    Key the cleaned customers by customer_id for repeated joins
+    The index's hash table is built here, once, and reused by every
+    join_customers() call, so many small transaction batches can be
+    joined without rebuilding it.
+    :param customers: Cleaned customers with a customer_id column.
+    :return: Customers indexed by customer_id.
+    """
+    customer_index = customers.set_index(CUSTOMER_KEY)
+    # Looking up nothing forces pandas to build and cache the hash table
+    if customer_index.index.is_unique:
+        customer_index.index.get_indexer(customer_index.index[:0])
+    return customer_index
+
+
+def join_customers(
+    transactions: pd.DataFrame,
+    customer_index: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Inner join transactions to an index from build_customer_index()
+    Gives the same rows, row order and columns as
+    pd.merge(transactions, customers, on='customer_id').
+    :param transactions: Cleaned transactions with a customer_id column.
+    :param customer_index: Customers indexed by customer_id.
+    :return: Merged transactions and customers.
+    """
+    if not customer_index.index.is_unique:
+        # A customer_id on several rows matches each of them
+        return pd.merge(
+            transactions, customer_index.reset_index(), on=CUSTOMER_KEY
+        )
+
+    positions = customer_index.index.get_indexer(transactions[CUSTOMER_KEY])
+    matched = positions != -1
+    positions = positions[matched]
+
+    # Gathering column by column is cheaper than DataFrame.iloc across the
+    # mixed-type customer columns
+    columns = {
+        column: get_column_values(transactions[column])[matched]
+        for column in transactions.columns
+    }
+    columns.update({
+        column: get_column_values(customer_index[column]).take(positions)
+        for column in customer_index.columns
+    })
+    return pd.DataFrame(columns, copy=False)
+
+
+def get_column_values(column: pd.Series):
+    # Plain numpy arrays for numpy dtypes; categorical, nullable and Arrow
+    # columns keep their own array type
+    if pd.api.types.is_extension_array_dtype(column.dtype):
+        return column.array
+    return column.to_numpy()
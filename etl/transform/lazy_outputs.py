@@ -0,0 +1,37 @@
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List
+
+
+class LazyOutputs(Mapping):
+    """
+    Named outputs that are only computed when something asks for them
+    Each node is a function taking the outputs, so it can ask for the
+    nodes it depends on. A node runs at most once; outputs[name] runs it
+    on first use and returns the cached result after that.
+    :param nodes: Output names mapped to the functions that compute them.
+    """
+
+    def __init__(self, nodes: Dict[str, Callable[['LazyOutputs'], Any]]):
+        self._nodes = dict(nodes)
+        self._results = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._results:
+            self._results[name] = self._nodes[name](self)
+        return self._results[name]
+
+    def __contains__(self, name) -> bool:
+        # Mapping would look the node up, and so compute it
+        return name in self._nodes
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def computed(self) -> List[str]:
+        return [name for name in self._nodes if name in self._results]
+
+    def skipped(self) -> List[str]:
+        return [name for name in self._nodes if name not in self._results]
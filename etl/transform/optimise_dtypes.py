@@ -0,0 +1,89 @@
+import logging
+import numpy as np
+import pandas as pd
+from utils.logging_utils import setup_logger
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = 'string'
+
+# Configure the logger
+logger = setup_logger(__name__, 'transform_data.log', level=logging.DEBUG)
+
+# Text columns with a handful of distinct values, stored as categories.
+# Other text columns are stored as Arrow-backed strings
+CATEGORY_COLUMNS = ['country']
+
+NULLABLE_INT_DTYPES = ['Int8', 'Int16', 'Int32', 'Int64']
+
+
+def optimise_dtypes(
+    data: pd.DataFrame,
+    category_columns: list = CATEGORY_COLUMNS
+) -> pd.DataFrame:
+    # Shrink each column to the smallest type that holds its values and
+    # log how many bytes that saved
+    optimised = pd.DataFrame(
+        {
+            column: optimise_column(
+                data[column], column in category_columns
+            )
+            for column in data.columns
+        },
+        index=data.index
+    )
+    log_memory_saved(data, optimised)
+    return optimised
+
+
+def optimise_column(column: pd.Series, category: bool) -> pd.Series:
+    if pd.api.types.is_bool_dtype(column):
+        return column
+    if pd.api.types.is_integer_dtype(column):
+        # IDs fit in far fewer than 64 bits
+        return pd.to_numeric(column, downcast='integer')
+    if pd.api.types.is_float_dtype(column):
+        return optimise_float_column(column)
+    if pd.api.types.is_object_dtype(column):
+        return optimise_text_column(column, category)
+    return column
+
+
+def optimise_float_column(column: pd.Series) -> pd.Series:
+    # Whole numbers stored as floats only because of NaN (e.g. age) can use
+    # a nullable integer type; anything with fractions (e.g. amount) stays
+    values = column.dropna()
+    if values.empty or not np.array_equal(values, np.floor(values)):
+        return column
+
+    for dtype in NULLABLE_INT_DTYPES:
+        limits = np.iinfo(dtype.lower())
+        if values.min() >= limits.min and values.max() <= limits.max:
+            return column.astype(dtype)
+    return column
+
+
+def optimise_text_column(column: pd.Series, category: bool) -> pd.Series:
+    if not pd.api.types.infer_dtype(column, skipna=True) == 'string':
+        return column
+    if category:
+        return column.astype('category')
+    return column.astype(STRING_DTYPE)
+
+
+def log_memory_saved(before: pd.DataFrame, after: pd.DataFrame):
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+    logger.setLevel(logging.INFO)
+    for column in before.columns:
+        logger.info(
+            f"{column}: {before[column].dtype} -> {after[column].dtype}, "
+            f"{before_bytes[column]} -> {after_bytes[column]} bytes "
+            f"({before_bytes[column] - after_bytes[column]} saved)"
+        )
+    logger.info(
+        f"Total: {before_bytes.sum()} -> {after_bytes.sum()} bytes "
+        f"({1 - after_bytes.sum() / before_bytes.sum():.0%} saved)"
+    )
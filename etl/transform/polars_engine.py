@@ -0,0 +1,115 @@
+import pandas as pd
+from typing import Tuple
+from utils.date_utils import DATE_FORMATS, DATE_OUTPUT_FORMAT
+from utils.flag_utils import TRUTHY_VALUES, FALSY_VALUES
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# Polars counterparts of the pandas transform steps. Each step builds a
+# lazy query; transform_frames() collects them together so shared work
+# is planned once and run on Polars' thread pool. Results are handed back
+# as pandas DataFrames with the same values and dtypes as the pandas path.
+
+
+def transform_frames(
+    transactions: pd.DataFrame,
+    customers: pd.DataFrame,
+    native_dates: bool = False
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Clean transactions and customers and merge them with Polars
+    :param transactions: Extracted transactions.
+    :param customers: Extracted customers.
+    :param native_dates: Keep transaction_date as a datetime.
+    :return: Cleaned transactions, cleaned customers and merged data.
+    """
+    if pl is None:
+        raise ImportError(
+            "The polars transform engine needs the polars package"
+        )
+
+    cleaned_transactions = clean_transactions(
+        to_lazy_frame(transactions), native_dates
+    )
+    cleaned_customers = clean_customers(to_lazy_frame(customers))
+    merged_data = merge_transactions_customers(
+        cleaned_transactions, cleaned_customers
+    )
+    frames = pl.collect_all(
+        [cleaned_transactions, cleaned_customers, merged_data]
+    )
+    return tuple(to_pandas(frame) for frame in frames)
+
+
+def clean_transactions(transactions, native_dates: bool = False):
+    # Same steps as clean_transactions.clean_transactions_chunk
+    # Text amounts that are not numbers (e.g. 'INVALID') become null, as
+    # with pd.to_numeric(errors='coerce')
+    amount = pl.col('amount')
+    if transactions.collect_schema()['amount'] == pl.Utf8:
+        amount = amount.str.strip_chars()
+    transactions = transactions.with_columns(
+        amount.cast(pl.Float64, strict=False)
+    ).drop_nulls(subset=['transaction_date', 'amount'])
+    transactions = standardise_date_format(transactions, native_dates)
+    return transactions.unique(keep='first', maintain_order=True)
+
+
+def standardise_date_format(transactions, native_dates: bool = False):
+    # Formats are tried in order and the first one that parses wins, as
+    # in utils.date_utils.standardise_dates
+    dates = pl.col('transaction_date').cast(pl.Utf8)
+    parsed = pl.coalesce([
+        dates.str.strptime(pl.Datetime('ns'), fmt, strict=False)
+        for fmt in DATE_FORMATS
+    ])
+    if not native_dates:
+        parsed = parsed.dt.strftime(DATE_OUTPUT_FORMAT)
+    return transactions.with_columns(
+        parsed.alias('transaction_date')
+    ).drop_nulls(subset=['transaction_date'])
+
+
+def clean_customers(customers):
+    # Same steps as clean_customers.clean_customers
+    customers = customers.drop_nulls(subset=['country', 'is_active'])
+    flags = pl.col('is_active').cast(pl.Utf8).str.to_lowercase()
+    customers = customers.with_columns(
+        pl.col('country').cast(pl.Utf8).str.to_uppercase(),
+        pl.when(flags.is_in(TRUTHY_VALUES)).then(True)
+        .when(flags.is_in(FALSY_VALUES)).then(False)
+        .otherwise(False)
+        .alias('is_active')
+    )
+    return customers.unique(keep='first', maintain_order=True)
+
+
+def merge_transactions_customers(transactions, customers):
+    # pd.merge keeps the order of the left rows for an inner join. Polars
+    # only joins keys of one dtype, and customer_id is read from the CSV
+    # as a float, so it is cast to the transactions' dtype; the missing
+    # ones are null and match nothing, as in pandas
+    key_dtype = transactions.collect_schema()['customer_id']
+    customers = customers.with_columns(
+        pl.col('customer_id').cast(key_dtype, strict=False)
+    )
+    return transactions.join(
+        customers, on='customer_id', how='inner', maintain_order='left'
+    )
+
+
+def to_lazy_frame(data: pd.DataFrame):
+    # Categorical columns from the typed customers read become strings,
+    # as they do after the pandas cleaning steps
+    data = data.astype({
+        column: 'object'
+        for column in data.select_dtypes(include='category').columns
+    })
+    return pl.from_pandas(data).lazy()
+
+
+def to_pandas(frame) -> pd.DataFrame:
+    return frame.to_pandas()
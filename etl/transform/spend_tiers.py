@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+
+SPEND_TIER_COLUMN = 'spend_tier'
+
+SPEND_TIERS_COLUMNS = [
+    'customer_id', 'total_spend', 'avg_transaction_value',
+    'name', 'age', 'country', 'is_active', SPEND_TIER_COLUMN
+]
+
+
+def get_tier_thresholds(
+    total_spend: np.ndarray,
+    tiers: List[Tuple[str, float, bool]]
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Resolve spend tiers to total spend thresholds in ascending order
+    :param total_spend: Every customer's total spend.
+    :param tiers: (name, bound, is_percentile) tuples, as from the
+        ETL_SPEND_TIERS setting. Percentile bounds are fractions.
+    :return: The tier names and their thresholds, sorted by threshold.
+    """
+    # Percentiles interpolate linearly, as percentile_cont does in the
+    # target's customer_spend_tiers view. With no customers they are
+    # undefined, and there is no one to tier anyway
+    thresholds = np.array([
+        (np.quantile(total_spend, bound) if total_spend.size else np.nan)
+        if is_percentile else bound
+        for _, bound, is_percentile in tiers
+    ], dtype='float64')
+    order = np.argsort(thresholds, kind='stable')
+    return [tiers[i][0] for i in order], thresholds[order]
+
+
+def assign_spend_tiers(
+    aggregates: pd.DataFrame,
+    tiers: List[Tuple[str, float, bool]]
+) -> pd.DataFrame:
+    """
+    Put every customer in the highest tier whose bound their total spend
+    is above
+    All customers are tiered in one binary search over the sorted
+    thresholds, whatever the number of tiers. Customers at or below the
+    lowest bound get no tier.
+    :param aggregates: Per-customer totals, as from aggregate_customers().
+    :param tiers: (name, bound, is_percentile) tuples, as from the
+        ETL_SPEND_TIERS setting.
+    :return: The customers with their average transaction value and
+        spend tier, an ordered categorical from the lowest tier up.
+    """
+    total_spend = aggregates['total_spend'].to_numpy('float64')
+    names, thresholds = get_tier_thresholds(total_spend, tiers)
+    # The number of thresholds strictly below a total is its tier's
+    # position plus one; 0 means it is above none of them
+    codes = np.searchsorted(thresholds, total_spend, side='left') - 1
+
+    spend_tiers = aggregates.assign(
+        avg_transaction_value=(
+            aggregates['total_spend'] / aggregates['transaction_count']
+        ),
+        **{SPEND_TIER_COLUMN: pd.Categorical.from_codes(
+            codes, dtype=pd.CategoricalDtype(names, ordered=True)
+        )}
+    )
+    return spend_tiers[SPEND_TIERS_COLUMNS]
@@ -1,77 +1,409 @@
+import functools
+import logging
+import os
+import numpy as np
 import pandas as pd
-from typing import Tuple
-from etl.transform.clean_transactions import clean_transactions
+from typing import Iterable, Iterator, Optional, Tuple
+from config.etl_config import load_etl_config
+from etl.transform.clean_transactions import (
+    clean_transactions,
+    clean_transactions_chunk,
+    remove_seen_transactions
+)
 from etl.transform.clean_customers import clean_customers
-from utils.file_utils import save_dataframe_to_csv
+from etl.transform.customer_aggregates import (
+    empty_customer_aggregates,
+    get_customer_aggregates_path,
+    get_high_value_customers_from_aggregates,
+    load_customer_aggregates,
+    update_customer_aggregates
+)
+from etl.transform.join_customers import (
+    build_customer_index,
+    join_customers
+)
+from etl.transform.lazy_outputs import LazyOutputs
+from etl.transform.optimise_dtypes import optimise_dtypes
+from etl.transform.parallel_transform import transform_data_parallel
+from etl.transform.spend_tiers import assign_spend_tiers
+from etl.transform import polars_engine
+from utils.cache_utils import fingerprint, hash_file, run_cached_stage
+from utils.date_utils import DATE_OUTPUT_FORMAT
+from utils.file_utils import save_checkpoint
+from utils.logging_utils import setup_logger
+
+# Configure the logger
+logger = setup_logger(__name__, 'transform_data.log', level=logging.DEBUG)
 
 HIGH_VALUE_LOWER_BOUND = 500
 
+# Settings that change the merged data or the aggregates. The number of
+# workers does not, as the parallel path matches the serial one exactly
+TRANSFORM_CACHE_SETTINGS = [
+    'native_dates', 'optimise_dtypes', 'transform_engine'
+]
+
+TRANSFORM_CACHE_OUTPUTS = ['merged_data', 'customer_aggregates']
+
+
+def transform_data(
+    data,
+    incremental: bool = False,
+    data_cache_key: str = None
+) -> LazyOutputs:
+    """
+    Plan the transform of the extracted transactions and customers
+    Nothing runs until an output is asked for, and only the steps that
+    output needs are run. The loader only takes merged_data, for example,
+    so the high value customer tables and their checkpoints are skipped.
+    :param data: Extracted transactions and customers.
+    :param incremental: The transactions are a batch of new rows only.
+    :param data_cache_key: The extract's stage cache key. When given, the
+        merged data and aggregates are taken from the stage cache if the
+        same data has been transformed with the same settings before.
+        The cleaned and merged checkpoints are then not rewritten.
+    :return: LazyOutputs with merged_data, customer_aggregates,
+        high_value_customers, cleaned_high_value_customers and
+        customer_spend_tiers.
+    """
+    etl_config = load_etl_config()
+    # The merge and the aggregates come out of one pass over the data.
+    # A stage cache hit skips that pass, and with it the cleaned and merged
+    # checkpoints it writes, so the files in etl/data/processed are left
+    # from the run that filled the cache, or from any later run since
+    clean_and_merge = functools.cache(
+        lambda: run_cached_stage(
+            'transform',
+            get_transform_cache_key(data_cache_key, incremental, etl_config),
+            TRANSFORM_CACHE_OUTPUTS,
+            lambda: clean_merge_and_aggregate(
+                data[0], data[1], incremental, etl_config
+            )
+        )
+    )
+    return LazyOutputs({
+        'merged_data': lambda outputs: clean_and_merge()[0],
+        'customer_aggregates': lambda outputs: clean_and_merge()[1],
+        **get_customer_output_steps(etl_config)
+    })
+
+
+def get_customer_outputs(customer_aggregates: pd.DataFrame) -> LazyOutputs:
+    """
+    Plan the outputs derived from final customer aggregates
+    A streaming run has no merged_data output, but once every chunk is
+    folded into the running aggregates it can derive the same customer
+    outputs as transform_data().
+    :param customer_aggregates: Aggregates covering every transaction.
+    :return: LazyOutputs with customer_aggregates, high_value_customers,
+        cleaned_high_value_customers and customer_spend_tiers.
+    """
+    return LazyOutputs({
+        'customer_aggregates': lambda outputs: customer_aggregates,
+        **get_customer_output_steps(load_etl_config())
+    })
+
+
+def get_customer_output_steps(etl_config: dict) -> dict:
+    # The outputs computed from the customer_aggregates output
+    return {
+        'high_value_customers': lambda outputs: get_high_value_output(
+            outputs['customer_aggregates']
+        ),
+        'cleaned_high_value_customers': lambda outputs: (
+            get_cleaned_high_value_output(outputs['high_value_customers'])
+        ),
+        'customer_spend_tiers': lambda outputs: get_spend_tiers_output(
+            outputs['customer_aggregates'], etl_config['spend_tiers']
+        )
+    }
+
+
+def clean_merge_and_aggregate(
+    transactions: pd.DataFrame,
+    customers: pd.DataFrame,
+    incremental: bool,
+    etl_config: dict
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # With native dates, transaction_date stays datetime64 through to the
+    # load and is only rendered as text in the CSV checkpoints
+    native_dates = etl_config['native_dates']
+    # An incremental batch only holds the new transactions, so it is
+    # added to the running per-customer totals instead of replacing them
+    customer_aggregates = get_previous_customer_aggregates(incremental)
+
+    # Polars is multi-threaded already; the pandas steps can be spread
+    # over worker processes instead
+    workers = etl_config['transform_workers']
+    if etl_config['transform_engine'] == 'pandas' and workers > 1:
+        merged_data, customer_aggregates = clean_merge_and_aggregate_parallel(
+            transactions, customers, customer_aggregates, native_dates,
+            workers
+        )
+        if etl_config['optimise_dtypes']:
+            merged_data = optimise_dtypes(merged_data)
+    else:
+        clean_and_merge = TRANSFORM_ENGINES[etl_config['transform_engine']]
+        merged_data = clean_and_merge(transactions, customers, native_dates)
+        if etl_config['optimise_dtypes']:
+            merged_data = optimise_dtypes(merged_data)
+        customer_aggregates = update_customer_aggregates(
+            customer_aggregates, merged_data
+        )
+
+    return merged_data, customer_aggregates
+
+
+def get_transform_cache_key(
+    data_cache_key: str,
+    incremental: bool,
+    etl_config: dict
+) -> Optional[str]:
+    if data_cache_key is None:
+        return None
+    # An incremental run adds to the saved aggregates, so they are an
+    # input too
+    aggregates_path = get_customer_aggregates_path()
+    previous_aggregates = (
+        hash_file(aggregates_path)
+        if incremental and os.path.exists(aggregates_path) else None
+    )
+    return fingerprint(
+        data_cache_key,
+        incremental,
+        previous_aggregates,
+        {setting: etl_config[setting] for setting in TRANSFORM_CACHE_SETTINGS}
+    )
+
 
-def transform_data(data) -> Tuple[pd.DataFrame]:
-    cleaned_transactions = clean_transactions(data[0])
-    cleaned_customers = clean_customers(data[1])
+def log_skipped_outputs(outputs: LazyOutputs) -> None:
+    skipped = outputs.skipped()
+    logger.setLevel(logging.INFO)
+    logger.info(
+        f"Transform outputs computed: {', '.join(outputs.computed())}; "
+        f"skipped as unused: {', '.join(skipped) if skipped else 'none'}"
+    )
+
+
+def clean_and_merge_pandas(
+    transactions: pd.DataFrame,
+    customers: pd.DataFrame,
+    native_dates: bool = False
+) -> pd.DataFrame:
+    cleaned_transactions = clean_transactions(transactions, native_dates)
+    cleaned_customers = clean_customers(customers)
     merged_data = merge_transactions_customers(
         cleaned_transactions,
         cleaned_customers
     )
+    return merged_data
+
+
+def clean_and_merge_polars(
+    transactions: pd.DataFrame,
+    customers: pd.DataFrame,
+    native_dates: bool = False
+) -> pd.DataFrame:
+    # The Polars steps run as one lazy query, so the checkpoints the
+    # pandas steps save along the way are written here afterwards
+    cleaned_transactions, cleaned_customers, merged_data = (
+        polars_engine.transform_frames(transactions, customers, native_dates)
+    )
+    save_clean_and_merge_checkpoints(
+        cleaned_transactions, cleaned_customers, merged_data
+    )
+    return merged_data
+
+
+def clean_merge_and_aggregate_parallel(
+    transactions: pd.DataFrame,
+    customers: pd.DataFrame,
+    customer_aggregates: pd.DataFrame,
+    native_dates: bool,
+    workers: int
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    (
+        cleaned_transactions,
+        cleaned_customers,
+        merged_data,
+        customer_aggregates
+    ) = transform_data_parallel(
+        transactions, customers, customer_aggregates, native_dates, workers
+    )
+    save_clean_and_merge_checkpoints(
+        cleaned_transactions, cleaned_customers, merged_data
+    )
+    return merged_data, customer_aggregates
+
+
+def save_clean_and_merge_checkpoints(
+    cleaned_transactions: pd.DataFrame,
+    cleaned_customers: pd.DataFrame,
+    merged_data: pd.DataFrame
+):
+    # For steps that run outside the pandas functions that save these
+    save_checkpoint(
+        cleaned_transactions,
+        'etl/data/processed',
+        'cleaned_transactions.csv',
+        DATE_OUTPUT_FORMAT
+    )
+    save_checkpoint(
+        cleaned_customers,
+        'etl/data/processed',
+        'cleaned_customers.csv'
+    )
+    save_checkpoint(
+        merged_data,
+        'etl/data/processed/',
+        'merged_data.csv',
+        DATE_OUTPUT_FORMAT
+    )
+
+
+# Engines that clean both sources and merge them, selected by
+# ETL_TRANSFORM_ENGINE. The customer aggregates stay in pandas whichever
+# engine runs, so the totals match to the last bit
+TRANSFORM_ENGINES = {
+    'pandas': clean_and_merge_pandas,
+    'polars': clean_and_merge_polars
+}
+
+
+def get_previous_customer_aggregates(incremental: bool) -> pd.DataFrame:
+    # A full run sees every transaction and starts the totals afresh
+    if not incremental:
+        return empty_customer_aggregates()
+
+    customer_aggregates = load_customer_aggregates()
+    if customer_aggregates is None:
+        logger.setLevel(logging.WARNING)
+        logger.warning(
+            "No saved customer aggregates for an incremental run; totals "
+            "will only cover this batch until they are rebuilt with "
+            "scripts.customer_aggregates"
+        )
+        return empty_customer_aggregates()
+    return customer_aggregates
+
+
+def get_high_value_output(customer_aggregates: pd.DataFrame) -> pd.DataFrame:
     # Create the aggregated data for high value customers
     # This approach would be suitable if the end users want us
     # to create separate tables of data in the database
-    high_value_customers = get_high_value_customers(merged_data)
-    save_dataframe_to_csv(
+    high_value_customers = get_high_value_customers_from_aggregates(
+        customer_aggregates, HIGH_VALUE_LOWER_BOUND
+    )
+    save_checkpoint(
         high_value_customers,
         'etl/data/processed/',
         'high_value_customers.csv'
     )
+    return high_value_customers
 
+
+def get_cleaned_high_value_output(
+    high_value_customers: pd.DataFrame
+) -> pd.DataFrame:
     # Clean high-value customers to remove missing values for age /country
     # This approach would be suitable if the end users want us
     # to create separate tables of data in the database
     cleaned_high_value_customers = high_value_customers.dropna(
         subset=['age', 'country']
     )
-    save_dataframe_to_csv(
+    save_checkpoint(
         cleaned_high_value_customers,
         'etl/data/processed/',
         'cleaned_high_value_customers.csv'
     )
+    return cleaned_high_value_customers
 
-    return (merged_data, high_value_customers, cleaned_high_value_customers)
+
+def get_spend_tiers_output(
+    customer_aggregates: pd.DataFrame,
+    spend_tiers: list
+) -> pd.DataFrame:
+    # Every customer with the ETL_SPEND_TIERS tier they fall in. The
+    # target database has the same table as the customer_spend_tiers view
+    customer_spend_tiers = assign_spend_tiers(
+        customer_aggregates, spend_tiers
+    )
+    save_checkpoint(
+        customer_spend_tiers,
+        'etl/data/processed/',
+        'customer_spend_tiers.csv'
+    )
+    return customer_spend_tiers
+
+
+def transform_data_chunks(
+    transaction_chunks: Iterable[pd.DataFrame],
+    customers: pd.DataFrame
+) -> Iterator[pd.DataFrame]:
+    """
+    Clean and merge transactions one chunk at a time
+    Customers are cleaned and indexed once; each transaction chunk is
+    then cleaned, deduplicated against the earlier chunks and joined to
+    them, so memory holds one chunk rather than the whole table. The
+    customer outputs need every row; get_customer_outputs() derives them
+    from the running aggregates once the stream is done.
+    :param transaction_chunks: Extracted transactions, e.g. from
+        extract_data_chunks().
+    :param customers: Extracted customers.
+    :return: Generator of merged chunks.
+    """
+    etl_config = load_etl_config()
+    native_dates = etl_config['native_dates']
+    customer_index = build_customer_index(clean_customers(customers))
+    seen_transaction_ids = np.array([], dtype='int64')
+
+    for chunk_number, transactions in enumerate(transaction_chunks):
+        transactions = clean_transactions_chunk(transactions, native_dates)
+        transactions, seen_transaction_ids = remove_seen_transactions(
+            transactions, seen_transaction_ids
+        )
+        merged_data = join_customers(transactions, customer_index)
+        if etl_config['optimise_dtypes']:
+            merged_data = optimise_dtypes(merged_data)
+
+        # Each chunk is added to the same checkpoints a full run writes
+        append = chunk_number > 0
+        save_checkpoint(
+            transactions,
+            'etl/data/processed',
+            'cleaned_transactions.csv',
+            DATE_OUTPUT_FORMAT,
+            append
+        )
+        save_checkpoint(
+            merged_data,
+            'etl/data/processed/',
+            'merged_data.csv',
+            DATE_OUTPUT_FORMAT,
+            append
+        )
+
+        yield merged_data
 
 
 def merge_transactions_customers(
     transactions: pd.DataFrame,
     customers: pd.DataFrame
 ) -> pd.DataFrame:
-    merged_data = pd.merge(transactions, customers, on='customer_id')
+    merged_data = join_customers(
+        transactions, build_customer_index(customers)
+    )
 
     # Save the merged data to a CSV file
     output_dir = 'etl/data/processed/'
     file_name = 'merged_data.csv'
-    save_dataframe_to_csv(merged_data, output_dir, file_name)
+    save_checkpoint(
+        merged_data, output_dir, file_name, DATE_OUTPUT_FORMAT
+    )
 
     return merged_data
 
 
-def get_high_value_customers(data: pd.DataFrame) -> pd.DataFrame:
-    # Get the total transaction value for each customer
-    data = data.groupby('customer_id').agg(
-        total_spend=('amount', 'sum'),
-        avg_transaction_value=('amount', 'mean'),
-        name=('name', 'first'),
-        age=('age', 'first'),
-        country=('country', 'first'),
-        is_active=('is_active', 'first')
-    ).reset_index()
-
-    # Get the high value customers
-    high_value_customers = data[
-        data['total_spend'] > HIGH_VALUE_LOWER_BOUND
-    ]
-
-    return high_value_customers
-
-
 """
 ADDITIONAL FUNCTIONALITY NEEDED:
 
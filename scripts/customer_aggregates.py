@@ -0,0 +1,47 @@
+import sys
+from config.env_config import setup_env
+from etl.load.load import read_merged_data_table
+from etl.transform.customer_aggregates import (
+    aggregate_customers,
+    compare_customer_aggregates,
+    load_customer_aggregates,
+    save_customer_aggregates
+)
+
+COMMANDS = ['rebuild', 'check']
+
+
+def main():
+    # Usage: python -m scripts.customer_aggregates <env> rebuild|check
+    if len(sys.argv) != 3 or sys.argv[2] not in COMMANDS:
+        raise ValueError(
+            'Please provide an environment and a command: '
+            f'{COMMANDS}. E.g. customer_aggregates dev check'
+        )
+    setup_env(sys.argv[:2])
+
+    print("Aggregating the loaded transactions...")
+    expected = aggregate_customers(read_merged_data_table())
+
+    if sys.argv[2] == 'rebuild':
+        save_customer_aggregates(expected)
+        print(f"Rebuilt aggregates for {expected.shape[0]} customers.")
+        return
+
+    customer_aggregates = load_customer_aggregates()
+    if customer_aggregates is None:
+        print("No customer aggregates saved; run the rebuild command.")
+        sys.exit(1)
+
+    mismatches = compare_customer_aggregates(customer_aggregates, expected)
+    if not mismatches.empty:
+        print(
+            f"{mismatches.shape[0]} customers differ from the loaded "
+            f"transactions:\n{mismatches.head(20).to_string(index=False)}"
+        )
+        sys.exit(1)
+    print(f"Aggregates for {expected.shape[0]} customers are consistent.")
+
+
+if __name__ == '__main__':
+    main()
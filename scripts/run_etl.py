@@ -1,9 +1,41 @@
 import os
 import sys
+import pandas as pd
 from config.env_config import setup_env
-from etl.extract.extract import extract_data
-from etl.transform.transform import transform_data
-from etl.load.load import load_data
+from config.etl_config import load_etl_config
+from etl.extract.extract import (
+    extract_data,
+    extract_data_chunks,
+    get_extract_cache_key
+)
+from etl.extract.extract_transactions import (
+    get_transactions_watermark,
+    update_transactions_watermark,
+    WATERMARK_COLUMN
+)
+from etl.transform.customer_aggregates import (
+    save_customer_aggregates,
+    update_customer_aggregates
+)
+from etl.transform.transform import (
+    get_customer_outputs,
+    get_previous_customer_aggregates,
+    log_skipped_outputs,
+    transform_data,
+    transform_data_chunks
+)
+from etl.load.load import (
+    load_customer_outputs,
+    load_data,
+    load_data_chunks
+)
+from utils.cache_utils import run_cached_stage
+from utils.file_utils import (
+    start_background_checkpoints,
+    wait_for_checkpoints
+)
+
+EXTRACT_OUTPUTS = ['transactions', 'customers']
 
 
 def main():
@@ -11,23 +43,118 @@ def main():
     setup_env(sys.argv)
     print("Environment setup complete.")
 
+    # Decide up front so the load matches the kind of extract that ran
+    incremental = get_transactions_watermark() is not None
+    etl_config = load_etl_config()
+    if etl_config['background_checkpoints']:
+        start_background_checkpoints()
+    try:
+        if etl_config['streaming']:
+            run_streaming(incremental)
+        else:
+            run(incremental, etl_config)
+    finally:
+        # Raises if a checkpoint could not be written, even when the
+        # rest of the run succeeded
+        wait_for_checkpoints()
+
+    print(
+        f'ETL pipeline run successfully in '
+        f'{os.getenv("ENV", "error")} environment!'
+    )
+
+
+def run(incremental: bool, etl_config: dict):
     print("Extracting data...")
-    extracted_data = extract_data()
+    # With the stage cache on, sources that are unchanged since an
+    # earlier run are not read again, nor their data transformed again
+    data_cache_key = (
+        get_extract_cache_key() if etl_config['stage_cache'] else None
+    )
+    extracted_data = run_cached_stage(
+        'extract', data_cache_key, EXTRACT_OUTPUTS, extract_data
+    )
     print("Data extraction complete.")
 
+    if extracted_data[0].empty:
+        print("No new transactions to process.")
+        return
+
     print("Transforming data...")
-    transformed_data = transform_data(extracted_data)
+    transformed_data = transform_data(
+        extracted_data, incremental, data_cache_key
+    )
     print("Data transformation complete.")
 
     print("Loading data...")
-    load_data(transformed_data)
+    load_data(transformed_data, incremental)
     print("Data loading complete.")
 
-    print(
-        f'ETL pipeline run successfully in '
-        f'{os.getenv("ENV", "error")} environment!'
+    # Only advance the watermark and the customer totals once the rows
+    # are safely in the target
+    save_customer_aggregates(transformed_data['customer_aggregates'])
+    update_transactions_watermark(extracted_data[0])
+
+    log_skipped_outputs(transformed_data)
+    skipped = transformed_data.skipped()
+    if skipped:
+        print(f"Skipped unused transform outputs: {', '.join(skipped)}")
+
+
+def run_streaming(incremental: bool):
+    print("Extracting, transforming and loading data in chunks...")
+    transaction_chunks, customers = extract_data_chunks()
+    # Chunks are not ordered by transaction_id, so the watermark can only
+    # move once every chunk has been loaded
+    chunk_watermarks = []
+    transaction_chunks = track_watermarks(
+        transaction_chunks, chunk_watermarks
+    )
+    previous_aggregates = get_previous_customer_aggregates(incremental)
+    customer_aggregates = [previous_aggregates]
+    merged_chunks = track_customer_aggregates(
+        transform_data_chunks(transaction_chunks, customers),
+        customer_aggregates, previous_aggregates
+    )
+
+    load_data_chunks(merged_chunks, incremental)
+    # The other outputs need every transaction, so they are loaded from
+    # the aggregates once the last chunk is in
+    customer_outputs = get_customer_outputs(customer_aggregates[0])
+    load_customer_outputs(customer_outputs)
+    print("Data loading complete.")
+
+    save_customer_aggregates(customer_aggregates[0])
+    update_transactions_watermark(
+        pd.DataFrame({WATERMARK_COLUMN: chunk_watermarks})
     )
 
+    log_skipped_outputs(customer_outputs)
+
+
+def track_watermarks(chunks, watermarks: list):
+    # Pass the chunks through, noting the highest transaction_id of each
+    for chunk in chunks:
+        if not chunk.empty:
+            watermarks.append(chunk[WATERMARK_COLUMN].max())
+        yield chunk
+
+
+def track_customer_aggregates(
+    chunks,
+    customer_aggregates: list,
+    previous_aggregates: pd.DataFrame
+):
+    # Pass the chunks through, adding each to the running customer totals
+    # held as the only item of customer_aggregates. Rows are only skipped
+    # as counted by the totals saved before this run, because a later
+    # chunk can hold lower transaction_ids than an earlier one
+    for chunk in chunks:
+        customer_aggregates[0] = update_customer_aggregates(
+            customer_aggregates[0], chunk, previous_aggregates
+        )
+        yield chunk
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,36 @@
+import sys
+from config.env_config import setup_env
+from utils.cache_utils import get_stage_cache
+
+COMMANDS = ['list', 'invalidate']
+
+
+def main():
+    # Usage: python -m scripts.stage_cache <env> list|invalidate [stage]
+    if len(sys.argv) not in (3, 4) or sys.argv[2] not in COMMANDS:
+        raise ValueError(
+            'Please provide an environment, a command: '
+            f'{COMMANDS} and optionally a stage. E.g. stage_cache dev '
+            'invalidate transform'
+        )
+    setup_env(sys.argv[:2])
+
+    stage_cache = get_stage_cache()
+    if stage_cache is None:
+        print("The stage cache is off; set ETL_STAGE_CACHE=true to use it.")
+        sys.exit(1)
+
+    if sys.argv[2] == 'list':
+        entries = stage_cache.entries()
+        for name, size, _ in entries:
+            print(f"{name}: {size / (1024 * 1024):.1f} MB")
+        print(f"{len(entries)} cached stage results.")
+        return
+
+    stage = sys.argv[3] if len(sys.argv) == 4 else None
+    removed = stage_cache.invalidate(stage)
+    print(f"Removed {len(removed)} cached stage results.")
+
+
+if __name__ == '__main__':
+    main()
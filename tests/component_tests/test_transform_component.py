@@ -1,6 +1,6 @@
 import os
 import pandas as pd
-from etl.transform.transform import transform_data
+from etl.transform.transform import transform_data, transform_data_chunks
 
 
 def test_transform_data():
@@ -36,7 +36,9 @@ def test_transform_data():
     )
 
     # Call the transform_data function with the test data
-    merge_result = transform_data((transactions_data, customers_data))[0]
+    merge_result = transform_data(
+        (transactions_data, customers_data)
+    )['merged_data']
 
     merge_result = merge_result.sort_values(by='transaction_id').reset_index(
         drop=True
@@ -47,3 +49,58 @@ def test_transform_data():
         merge_result,
         expected_merged_data
     )
+
+
+def test_transform_data_chunks_matches_transform_data():
+    base_path = os.path.dirname(__file__)
+    transactions_data = pd.read_csv(
+        os.path.join(base_path, '../test_data/test_transactions.csv')
+    )
+    customers_data = pd.read_csv(
+        os.path.join(base_path, '../test_data/test_customers.csv')
+    )
+    # Duplicates in the test data land in different chunks
+    transaction_chunks = [
+        transactions_data.iloc[start:start + 1000]
+        for start in range(0, len(transactions_data), 1000)
+    ]
+
+    expected_merged_data = transform_data(
+        (transactions_data.copy(), customers_data.copy())
+    )['merged_data']
+    merged_chunks = list(
+        transform_data_chunks(transaction_chunks, customers_data)
+    )
+
+    merge_result = pd.concat(merged_chunks, ignore_index=True)
+    assert len(merged_chunks) == len(transaction_chunks)
+    assert merge_result['transaction_id'].is_unique
+    pd.testing.assert_frame_equal(
+        merge_result.sort_values(by='transaction_id').reset_index(drop=True),
+        expected_merged_data.sort_values(
+            by='transaction_id'
+        ).reset_index(drop=True)
+    )
+
+
+def test_transform_data_skips_unused_outputs(mocker):
+    base_path = os.path.dirname(__file__)
+    transactions_data = pd.read_csv(
+        os.path.join(base_path, '../test_data/test_transactions.csv')
+    )
+    customers_data = pd.read_csv(
+        os.path.join(base_path, '../test_data/test_customers.csv')
+    )
+    high_value_customers = mocker.patch(
+        'etl.transform.transform.get_high_value_customers_from_aggregates'
+    )
+
+    outputs = transform_data((transactions_data, customers_data))
+    outputs['merged_data']
+    outputs['customer_aggregates']
+
+    high_value_customers.assert_not_called()
+    assert outputs.skipped() == [
+        'high_value_customers', 'cleaned_high_value_customers',
+        'customer_spend_tiers'
+    ]
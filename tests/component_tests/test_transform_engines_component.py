@@ -0,0 +1,137 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from etl.extract.extract_customers import CUSTOMERS_SCHEMA
+from etl.transform import polars_engine
+from etl.transform.clean_customers import clean_customers
+from etl.transform.clean_transactions import clean_transactions
+from etl.transform.transform import (
+    merge_transactions_customers,
+    transform_data
+)
+from utils.file_utils import ROOT_DIR
+
+CHECKPOINT_FILES = [
+    'cleaned_transactions.csv', 'cleaned_customers.csv', 'merged_data.csv',
+    'high_value_customers.csv', 'cleaned_high_value_customers.csv',
+    'customer_spend_tiers.csv'
+]
+
+
+def load_test_data(typed_customers=False):
+    base_path = os.path.dirname(__file__)
+    transactions = pd.read_csv(
+        os.path.join(base_path, '../test_data/test_transactions.csv')
+    )
+    customers = pd.read_csv(
+        os.path.join(base_path, '../test_data/test_customers.csv'),
+        dtype=CUSTOMERS_SCHEMA if typed_customers else None
+    )
+    return transactions, customers
+
+
+def transform_with_pandas(transactions, customers, native_dates):
+    cleaned_transactions = clean_transactions(transactions, native_dates)
+    cleaned_customers = clean_customers(customers)
+    merged_data = merge_transactions_customers(
+        cleaned_transactions, cleaned_customers
+    )
+    return (
+        cleaned_transactions.reset_index(drop=True),
+        cleaned_customers.reset_index(drop=True),
+        merged_data
+    )
+
+
+@pytest.mark.parametrize("native_dates", [False, True])
+@pytest.mark.parametrize("typed_customers", [False, True])
+def test_polars_engine_matches_pandas(native_dates, typed_customers):
+    transactions, customers = load_test_data(typed_customers)
+
+    expected = transform_with_pandas(
+        transactions.copy(), customers.copy(), native_dates
+    )
+    result = polars_engine.transform_frames(
+        transactions, customers, native_dates
+    )
+
+    for result_frame, expected_frame in zip(result, expected):
+        pd.testing.assert_frame_equal(
+            result_frame, expected_frame, check_exact=True
+        )
+
+
+def test_polars_engine_matches_pandas_on_edge_cases():
+    transactions = pd.DataFrame({
+        'customer_id': [1, 1, 2, 2, 3, 3, 1, 4],
+        'transaction_id': [1, 2, 3, 4, 5, 6, 1, 8],
+        'transaction_date': [
+            '2024/03/05', '2024-03-05', '5 Mar 2024', 'Mar 05, 2024',
+            '05 March 2024', '', '2024/03/05', 'yesterday'
+        ],
+        'amount': [
+            '10.5', 'INVALID', ' 12.25 ', None, '1e2', '3', '10.5', '7'
+        ]
+    })
+    customers = pd.DataFrame({
+        'customer_id': [1, 2, 3, 3, 4],
+        'name': ['Carl Gill', 'Jo Fox', 'Ann Lee', 'Ann Lee', None],
+        'age': [83.0, np.nan, 41.0, 41.0, 30.0],
+        'country': ['italy', 'Canada', 'UK', 'UK', None],
+        'is_active': ['Active', 'inactive', 'TRUE', 'TRUE', '1']
+    })
+
+    expected = transform_with_pandas(
+        transactions.copy(), customers.copy(), False
+    )
+    result = polars_engine.transform_frames(transactions, customers)
+
+    for result_frame, expected_frame in zip(result, expected):
+        pd.testing.assert_frame_equal(
+            result_frame, expected_frame, check_exact=True
+        )
+
+
+def read_checkpoints():
+    output_dir = os.path.join(ROOT_DIR, 'etl/data/processed')
+    checkpoints = {}
+    for file_name in CHECKPOINT_FILES:
+        with open(os.path.join(output_dir, file_name)) as file:
+            checkpoints[file_name] = file.read()
+    return checkpoints
+
+
+def test_transform_data_engines_give_identical_outputs(mocker):
+    transactions, customers = load_test_data()
+
+    mocker.patch.dict(os.environ, {'ETL_TRANSFORM_ENGINE': 'pandas'})
+    expected = dict(transform_data((transactions.copy(), customers.copy())))
+    expected_checkpoints = read_checkpoints()
+
+    mocker.patch.dict(os.environ, {'ETL_TRANSFORM_ENGINE': 'polars'})
+    result = dict(transform_data((transactions.copy(), customers.copy())))
+
+    for name, expected_frame in expected.items():
+        pd.testing.assert_frame_equal(
+            result[name], expected_frame, check_exact=True
+        )
+    assert read_checkpoints() == expected_checkpoints
+
+
+@pytest.mark.parametrize("workers", ['2', '3'])
+def test_transform_data_workers_give_identical_outputs(mocker, workers):
+    transactions, customers = load_test_data()
+
+    mocker.patch.dict(os.environ, {'ETL_TRANSFORM_WORKERS': '1'})
+    expected = dict(transform_data((transactions.copy(), customers.copy())))
+    expected_checkpoints = read_checkpoints()
+
+    mocker.patch.dict(os.environ, {'ETL_TRANSFORM_WORKERS': workers})
+    result = dict(transform_data((transactions.copy(), customers.copy())))
+
+    for name, expected_frame in expected.items():
+        pd.testing.assert_frame_equal(
+            result[name], expected_frame, check_exact=True
+        )
+    assert read_checkpoints() == expected_checkpoints
@@ -1,6 +1,12 @@
+import os
+import time
 import timeit
+import pandas as pd
+import pytest
+from etl.extract.extract import extract_data
 from etl.extract.extract_transactions import (
     extract_transactions,
+    extract_transactions_chunks,
     EXPECTED_IMPORT_RATE
 )
 
@@ -37,3 +43,92 @@ def test_extract_transaction_performance():
         f"{str(EXPECTED_IMPORT_RATE)} seconds, but got "
         f"{str(actual_execution_time_per_row)} seconds"
     )
+
+
+def test_extract_transactions_chunks_returns_all_data():
+    expected_shape = (10500, 4)
+    chunk_size = 4000
+
+    chunks = list(extract_transactions_chunks(chunk_size=chunk_size))
+    df = pd.concat(chunks, ignore_index=True)
+
+    assert all(chunk.shape[0] <= chunk_size for chunk in chunks)
+    assert len(chunks) == 3
+    assert df.shape == expected_shape, (
+        f"Expected DataFrame shape to be {expected_shape}, but got {df.shape}"
+    )
+
+
+def test_extract_transactions_partitioned_returns_all_data(mocker):
+    mocker.patch.dict(os.environ, {'ETL_EXTRACT_PARTITIONS': '1'})
+    expected = extract_transactions()
+
+    mocker.patch.dict(os.environ, {'ETL_EXTRACT_PARTITIONS': '4'})
+    df = extract_transactions()
+
+    pd.testing.assert_frame_equal(
+        df.sort_values('transaction_id', kind='stable')
+        .reset_index(drop=True),
+        expected.sort_values('transaction_id', kind='stable')
+        .reset_index(drop=True)
+    )
+
+
+@pytest.mark.parametrize('key', [
+    "DATE '2024-01-01' + transaction_id / 100",
+    "TIMESTAMP '2024-01-01' + transaction_id * INTERVAL '1 minute'"
+])
+def test_extract_transactions_partitioned_on_a_date_key(mocker, key):
+    # The source stores its dates as text, so the key is derived
+    mocker.patch(
+        'etl.extract.extract_transactions.get_extract_transactions_query',
+        return_value=(
+            f'SELECT transaction_id, {key} AS partition_key '
+            f'FROM transactions',
+            None
+        )
+    )
+    mocker.patch.dict(
+        os.environ, {'ETL_EXTRACT_PARTITION_COLUMN': 'partition_key'}
+    )
+
+    mocker.patch.dict(os.environ, {'ETL_EXTRACT_PARTITIONS': '1'})
+    expected = extract_transactions()
+
+    mocker.patch.dict(os.environ, {'ETL_EXTRACT_PARTITIONS': '4'})
+    df = extract_transactions()
+
+    assert sorted(df['transaction_id']) == sorted(expected['transaction_id'])
+
+
+def test_extract_transactions_copy_engine_matches_read_sql(mocker):
+    mocker.patch.dict(os.environ, {'ETL_EXTRACT_ENGINE': 'read_sql'})
+    expected = extract_transactions()
+
+    mocker.patch.dict(os.environ, {'ETL_EXTRACT_ENGINE': 'copy'})
+    df = extract_transactions()
+
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_failed_customers_extract_cancels_the_transactions_query(mocker):
+    # A query that would run for 30 seconds unless it is cancelled
+    mocker.patch(
+        'etl.extract.extract_transactions.get_extract_transactions_query',
+        return_value=('SELECT pg_sleep(30)', None)
+    )
+
+    def failing_customers_extract():
+        time.sleep(1)
+        raise Exception("Failed to load CSV file")
+
+    mocker.patch(
+        'etl.extract.extract.extract_customers',
+        side_effect=failing_customers_extract
+    )
+
+    start_time = time.monotonic()
+    with pytest.raises(Exception, match="Failed to load CSV file"):
+        extract_data()
+
+    assert time.monotonic() - start_time < 10
@@ -0,0 +1,271 @@
+import os
+import pandas as pd
+import pytest
+from sqlalchemy import inspect, text
+from config.db_config import load_db_config
+from etl.load import load
+from etl.load.differential_load import add_row_hashes
+from etl.load.load import (
+    forget_reflected_tables,
+    get_loading_table_name,
+    load_changed_rows,
+    load_data_chunks,
+    LOAD_TABLE_KEYS,
+    LOAD_TABLE_NAMES,
+    replace_table_copy,
+    replace_table_to_sql,
+    replace_tables,
+    upsert_on_existing_table
+)
+from utils.db_utils import get_db_connection, QueryExecutionError
+
+TABLE_NAMES = ['load_test_to_sql', 'load_test_copy']
+
+
+@pytest.fixture
+def connection():
+    connection = get_db_connection(load_db_config()['target_database'])
+    yield connection
+    for table_name in TABLE_NAMES:
+        connection.execute(text(f'DROP TABLE IF EXISTS {table_name}'))
+    connection.commit()
+    connection.close()
+
+
+def test_copy_engine_loads_the_same_table_as_to_sql(connection, mocker):
+    # Several COPY batches, missing values and empty strings
+    mocker.patch('etl.load.load.COPY_BATCH_ROWS', 2)
+    data = pd.DataFrame({
+        'transaction_id': [1, 2, 3, 4, 5],
+        'transaction_date': pd.to_datetime(
+            ['2024-03-05', None, '2023-12-31', '2024-01-01', '2024-02-29']
+        ),
+        'amount': [10.1, None, 0.30000000000000004, -5.0, 1e-7],
+        'name': ['Carl Gill', '', None, 'O\'Brien, "Jo"', 'Line\nbreak'],
+        'country': pd.Categorical(['ITALY', 'UK', None, 'UK', 'SPAIN']),
+        'is_active': [True, False, True, False, True]
+    })
+
+    replace_table_to_sql(data, connection, 'load_test_to_sql')
+    replace_table_copy(data, connection, 'load_test_copy')
+    connection.commit()
+
+    expected = pd.read_sql_table('load_test_to_sql', connection)
+    loaded = pd.read_sql_table('load_test_copy', connection)
+    pd.testing.assert_frame_equal(
+        loaded.sort_values('transaction_id', ignore_index=True),
+        expected.sort_values('transaction_id', ignore_index=True)
+    )
+    assert loaded.shape == (5, 6)
+
+
+@pytest.mark.parametrize('engine', ['to_sql', 'copy'])
+def test_upsert_engines_update_and_insert_rows(connection, mocker, engine):
+    mocker.patch.dict(os.environ, {'ETL_LOAD_ENGINE': engine})
+    mocker.patch('etl.load.load.UPSERT_BATCH_ROWS', 2)
+    existing = pd.DataFrame({
+        'transaction_id': [1, 2, 3],
+        'amount': [10.0, 20.0, 30.0],
+        'name': ['a', 'b', 'c']
+    })
+    replace_table_to_sql(existing, connection, 'load_test_to_sql')
+    connection.execute(text(
+        'ALTER TABLE load_test_to_sql ADD PRIMARY KEY (transaction_id)'
+    ))
+    connection.commit()
+    forget_reflected_tables()
+
+    upsert_on_existing_table(
+        pd.DataFrame({
+            'transaction_id': [2, 3, 4],
+            'amount': [21.0, None, 40.0],
+            'name': ['b2', '', 'd']
+        }),
+        connection,
+        'load_test_to_sql'
+    )
+
+    loaded = pd.read_sql_table('load_test_to_sql', connection)
+    pd.testing.assert_frame_equal(
+        loaded.sort_values('transaction_id', ignore_index=True),
+        pd.DataFrame({
+            'transaction_id': [1, 2, 3, 4],
+            'amount': [10.0, 21.0, None, 40.0],
+            'name': ['a', 'b2', '', 'd']
+        })
+    )
+
+
+@pytest.mark.parametrize('engine', ['to_sql', 'copy'])
+def test_load_changed_rows_writes_only_the_differences(
+    connection, mocker, engine
+):
+    mocker.patch.dict(os.environ, {'ETL_LOAD_ENGINE': engine})
+    existing = pd.DataFrame({
+        'transaction_id': [1, 2, 3],
+        'amount': [10.0, 20.0, 30.0],
+        'name': ['a', 'b', 'c']
+    })
+    # A table loaded before differential loads has no row hashes
+    replace_table_to_sql(existing.iloc[:2], connection, 'load_test_to_sql')
+    connection.execute(text(
+        'ALTER TABLE load_test_to_sql ADD PRIMARY KEY (transaction_id)'
+    ))
+    connection.commit()
+    forget_reflected_tables()
+    load_changed_rows(
+        add_row_hashes(existing), connection, 'load_test_to_sql'
+    )
+    upsert = mocker.spy(load, 'upsert_on_existing_table')
+
+    snapshot = pd.DataFrame({
+        'transaction_id': [1, 3, 4],
+        'amount': [10.0, 31.0, 40.0],
+        'name': ['a', 'c', 'd']
+    })
+    load_changed_rows(
+        add_row_hashes(snapshot), connection, 'load_test_to_sql',
+        delete_missing=True
+    )
+
+    assert upsert.call_args.args[0]['transaction_id'].tolist() == [3, 4]
+    loaded = pd.read_sql_table('load_test_to_sql', connection)
+    pd.testing.assert_frame_equal(
+        loaded.sort_values('transaction_id', ignore_index=True),
+        add_row_hashes(snapshot)
+    )
+
+
+@pytest.fixture
+def output_tables(connection):
+    yield
+    connection.rollback()
+    connection.execute(text('DROP VIEW IF EXISTS load_test_view'))
+    for output in ['merged_data', 'customer_aggregates']:
+        connection.execute(text(
+            f'DROP TABLE IF EXISTS {LOAD_TABLE_NAMES[output]}'
+        ))
+    connection.commit()
+
+
+def get_output_tables():
+    return {
+        'merged_data': pd.DataFrame({
+            'transaction_id': range(1, 8),
+            'amount': [float(value) for value in range(7)]
+        }),
+        'customer_aggregates': pd.DataFrame({
+            'customer_id': [1, 2],
+            'total_spend': [5.0, 16.0]
+        })
+    }
+
+
+def read_output_table(connection, output):
+    return pd.read_sql_table(
+        LOAD_TABLE_NAMES[output], connection
+    ).sort_values(LOAD_TABLE_KEYS[output], ignore_index=True)
+
+
+@pytest.mark.parametrize('engine', ['to_sql', 'copy'])
+def test_replace_tables_loads_every_range(
+    connection, output_tables, mocker, engine
+):
+    mocker.patch.dict(os.environ, {'ETL_LOAD_ENGINE': engine})
+    tables = get_output_tables()
+
+    replace_tables(tables, 3, 2)
+    replace_tables(tables, 3, 2)
+
+    for output, data in tables.items():
+        pd.testing.assert_frame_equal(
+            read_output_table(connection, output), data
+        )
+    assert not inspect(connection).has_table(
+        get_loading_table_name('merged_data')
+    )
+
+
+def test_replace_tables_leaves_tables_as_they_were_on_failure(
+    connection, output_tables, mocker
+):
+    tables = get_output_tables()
+    replace_tables(tables, 2, 3)
+    append_rows = load.append_rows
+
+    def fail_on_last_range(data, table_name):
+        if data['transaction_id'].iloc[0] == 7:
+            raise QueryExecutionError('connection lost')
+        append_rows(data, table_name)
+
+    mocker.patch('etl.load.load.append_rows', fail_on_last_range)
+    changed = {
+        output: data.assign(**{data.columns[1]: -1.0})
+        for output, data in tables.items()
+    }
+
+    with pytest.raises(QueryExecutionError):
+        replace_tables(changed, 2, 3)
+
+    for output, data in tables.items():
+        pd.testing.assert_frame_equal(
+            read_output_table(connection, output), data
+        )
+        assert not inspect(connection).has_table(
+            get_loading_table_name(output)
+        )
+
+
+def test_replace_tables_upserts_into_a_table_with_dependent_views(
+    connection, output_tables
+):
+    replace_tables(get_output_tables(), 1, 10)
+    connection.execute(text(
+        f"CREATE VIEW load_test_view AS "
+        f"SELECT * FROM {LOAD_TABLE_NAMES['merged_data']}"
+    ))
+    connection.commit()
+    merged_data = pd.DataFrame({
+        'transaction_id': [7, 8],
+        'amount': [70.0, 80.0]
+    })
+
+    replace_tables({'merged_data': merged_data}, 1, 10)
+
+    loaded = read_output_table(connection, 'merged_data')
+    assert loaded['transaction_id'].tolist() == list(range(1, 9))
+    assert loaded['amount'].tolist()[-2:] == [70.0, 80.0]
+
+
+def test_streaming_differential_load_reads_the_hashes_once(
+    connection, output_tables, mocker
+):
+    mocker.patch.dict(os.environ, {
+        'ETL_DIFFERENTIAL_LOAD': 'true',
+        'ETL_LOAD_ENGINE': 'copy'
+    })
+    mocker.patch('etl.load.load.enrich_database_data')
+    data = pd.DataFrame({
+        'transaction_id': range(1, 10),
+        'amount': [float(value) for value in range(9)]
+    })
+
+    def stream(data):
+        return (data.iloc[start:start + 3] for start in range(0, 9, 3))
+
+    load_data_chunks(stream(data), incremental=False)
+    read_row_hashes = mocker.spy(load, 'read_row_hashes')
+    upsert = mocker.spy(load, 'upsert_on_existing_table')
+    changed = data.assign(amount=data['amount'].where(
+        data['transaction_id'] != 5, 50.0
+    ))
+    load_data_chunks(stream(changed), incremental=False)
+
+    assert read_row_hashes.call_count == 1
+    assert sum(
+        call.args[0].shape[0] for call in upsert.call_args_list
+    ) == 1
+    pd.testing.assert_frame_equal(
+        read_output_table(connection, 'merged_data'),
+        add_row_hashes(changed)
+    )
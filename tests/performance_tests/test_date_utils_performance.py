@@ -0,0 +1,48 @@
+import os
+import timeit
+import pandas as pd
+from utils.date_utils import standardise_date, standardise_dates
+
+BENCHMARK_ROWS = 1_000_000
+
+# Rows parsed one at a time to estimate the per-row cost of the old path;
+# running it on the full benchmark would take minutes
+SAMPLE_ROWS = 10_000
+
+EXPECTED_SPEEDUP = 50
+
+
+def load_benchmark_dates(rows):
+    test_data_path = os.path.join(
+        os.path.dirname(__file__), '../test_data/test_transactions.csv'
+    )
+    dates = pd.read_csv(test_data_path)['transaction_date']
+    return pd.Series(
+        dates.sample(rows, replace=True, random_state=0).to_numpy()
+    )
+
+
+def test_standardise_dates_speedup():
+    dates = load_benchmark_dates(BENCHMARK_ROWS)
+    sample = dates.head(SAMPLE_ROWS)
+
+    per_row_time = timeit.timeit(
+        lambda: sample.apply(standardise_date), number=1
+    ) / SAMPLE_ROWS
+    vectorized_time = timeit.timeit(
+        lambda: standardise_dates(dates), number=1
+    )
+    estimated_per_row_total = per_row_time * BENCHMARK_ROWS
+    speedup = estimated_per_row_total / vectorized_time
+
+    print(
+        f"\nstandardise_date via apply (estimated, {BENCHMARK_ROWS} rows): "
+        f"{estimated_per_row_total:.2f}s\n"
+        f"standardise_dates ({BENCHMARK_ROWS} rows): "
+        f"{vectorized_time:.2f}s\n"
+        f"Speedup: {speedup:.0f}x"
+    )
+    assert speedup >= EXPECTED_SPEEDUP, (
+        f"Expected standardise_dates to be at least {EXPECTED_SPEEDUP}x "
+        f"faster, but got {speedup:.1f}x"
+    )
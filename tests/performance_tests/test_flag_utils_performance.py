@@ -0,0 +1,31 @@
+import os
+import timeit
+import pandas as pd
+from utils.flag_utils import standardise_flags
+
+BENCHMARK_ROWS = 1_000_000
+
+EXPECTED_TIME = 0.5
+
+
+def test_standardise_flags_performance():
+    test_data_path = os.path.join(
+        os.path.dirname(__file__), '../test_data/test_customers.csv'
+    )
+    values = pd.read_csv(test_data_path)['is_active']
+    values = pd.Series(
+        values.sample(BENCHMARK_ROWS, replace=True, random_state=0)
+        .to_numpy()
+    )
+
+    execution_time = timeit.timeit(
+        lambda: standardise_flags(values), number=1
+    )
+
+    print(
+        f"\nstandardise_flags ({BENCHMARK_ROWS} rows): {execution_time:.3f}s"
+    )
+    assert execution_time <= EXPECTED_TIME, (
+        f"Expected standardise_flags to take at most {EXPECTED_TIME}s, "
+        f"but got {execution_time:.3f}s"
+    )
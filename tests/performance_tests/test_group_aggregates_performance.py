@@ -0,0 +1,64 @@
+import timeit
+import numpy as np
+import pandas as pd
+from etl.transform.customer_aggregates import aggregate_customers
+
+BENCHMARK_TRANSACTIONS = 2_000_000
+BENCHMARK_CUSTOMERS = 200_000
+
+
+def get_benchmark_data():
+    # Merged transactions, with each customer's attributes on every row
+    rng = np.random.default_rng(0)
+    customer_ids = rng.integers(
+        1, BENCHMARK_CUSTOMERS + 1, BENCHMARK_TRANSACTIONS
+    )
+    names = np.array(
+        [f'Customer {i}' for i in range(BENCHMARK_CUSTOMERS + 1)]
+    )
+    countries = np.array(['UK', 'USA', 'ITALY'])
+    return pd.DataFrame({
+        'customer_id': customer_ids,
+        'transaction_id': np.arange(BENCHMARK_TRANSACTIONS),
+        'amount': rng.random(BENCHMARK_TRANSACTIONS) * 100,
+        'name': names[customer_ids].astype(object),
+        'age': (customer_ids % 70 + 18).astype('float64'),
+        'country': countries[customer_ids % 3].astype(object),
+        'is_active': customer_ids % 2 == 0
+    })
+
+
+def groupby_aggregate_customers(data):
+    # aggregate_customers() as it was written with groupby
+    return data.groupby('customer_id', observed=True).agg(
+        transaction_count=('amount', 'size'),
+        total_spend=('amount', 'sum'),
+        last_transaction_id=('transaction_id', 'max'),
+        name=('name', 'last'),
+        age=('age', 'last'),
+        country=('country', 'last'),
+        is_active=('is_active', 'last')
+    ).reset_index()
+
+
+def test_group_aggregates_performance():
+    data = get_benchmark_data()
+
+    groupby_aggregates_time = timeit.timeit(
+        lambda: groupby_aggregate_customers(data), number=1
+    )
+    kernel_aggregates_time = timeit.timeit(
+        lambda: aggregate_customers(data), number=1
+    )
+
+    print(
+        f"\n{BENCHMARK_TRANSACTIONS} transactions, {BENCHMARK_CUSTOMERS} "
+        f"customers\n"
+        f"customer aggregates - groupby: {groupby_aggregates_time:.2f}s, "
+        f"NumPy: {kernel_aggregates_time:.2f}s"
+    )
+    assert kernel_aggregates_time <= groupby_aggregates_time, (
+        f"Expected aggregate_customers to be no slower than groupby, "
+        f"but got {kernel_aggregates_time:.2f}s vs "
+        f"{groupby_aggregates_time:.2f}s"
+    )
@@ -0,0 +1,75 @@
+import timeit
+import numpy as np
+import pandas as pd
+from etl.transform.join_customers import build_customer_index, join_customers
+
+BENCHMARK_TRANSACTIONS = 10_000_000
+BENCHMARK_CUSTOMERS = 1_000_000
+
+# Transaction batches joined against the same customer table, as in a
+# streaming or incremental run
+BENCHMARK_BATCHES = 100
+
+
+def get_benchmark_data():
+    rng = np.random.default_rng(0)
+    customers = pd.DataFrame({
+        'customer_id': np.arange(1, BENCHMARK_CUSTOMERS + 1),
+        'name': [f'Customer {i}' for i in range(BENCHMARK_CUSTOMERS)],
+        'age': rng.integers(18, 90, BENCHMARK_CUSTOMERS).astype('float64'),
+        'country': rng.choice(['UK', 'USA', 'ITALY'], BENCHMARK_CUSTOMERS),
+        'is_active': rng.random(BENCHMARK_CUSTOMERS) < 0.5
+    })
+    # A few transactions have no matching customer
+    transactions = pd.DataFrame({
+        'transaction_id': np.arange(BENCHMARK_TRANSACTIONS),
+        'customer_id': rng.integers(
+            1, int(BENCHMARK_CUSTOMERS * 1.05), BENCHMARK_TRANSACTIONS
+        ),
+        'amount': rng.random(BENCHMARK_TRANSACTIONS) * 500
+    })
+    return transactions, customers
+
+
+def test_join_customers_performance():
+    transactions, customers = get_benchmark_data()
+    batch_size = BENCHMARK_TRANSACTIONS // BENCHMARK_BATCHES
+    batches = [
+        transactions.iloc[start:start + batch_size]
+        for start in range(0, BENCHMARK_TRANSACTIONS, batch_size)
+    ]
+
+    merge_time = timeit.timeit(
+        lambda: pd.merge(transactions, customers, on='customer_id'),
+        number=1
+    )
+    merge_batches_time = timeit.timeit(
+        lambda: [
+            pd.merge(batch, customers, on='customer_id') for batch in batches
+        ],
+        number=1
+    )
+    customer_index = build_customer_index(customers)
+    join_time = timeit.timeit(
+        lambda: join_customers(transactions, customer_index), number=1
+    )
+    join_batches_time = timeit.timeit(
+        lambda: [join_customers(batch, customer_index) for batch in batches],
+        number=1
+    )
+
+    print(
+        f"\n{BENCHMARK_TRANSACTIONS} transactions x {BENCHMARK_CUSTOMERS} "
+        f"customers\n"
+        f"pd.merge: {merge_time:.2f}s, join_customers: {join_time:.2f}s\n"
+        f"{BENCHMARK_BATCHES} batches - pd.merge: {merge_batches_time:.2f}s, "
+        f"join_customers: {join_batches_time:.2f}s"
+    )
+    assert join_time <= merge_time, (
+        f"Expected join_customers to be no slower than pd.merge, "
+        f"but got {join_time:.2f}s vs {merge_time:.2f}s"
+    )
+    assert join_batches_time <= merge_batches_time, (
+        f"Expected batched join_customers to be no slower than pd.merge, "
+        f"but got {join_batches_time:.2f}s vs {merge_batches_time:.2f}s"
+    )
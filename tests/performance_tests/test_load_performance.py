@@ -0,0 +1,213 @@
+import os
+import timeit
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import MetaData, Table, text
+from sqlalchemy.orm import sessionmaker
+from config.db_config import load_db_config
+from etl.load.differential_load import add_row_hashes
+from etl.load.load import (
+    build_upsert_statement,
+    forget_reflected_tables,
+    load_changed_rows,
+    replace_table_copy,
+    replace_table_to_sql,
+    upsert_with_copy,
+    upsert_with_insert
+)
+from utils.db_utils import get_db_connection
+
+# Loads into the test target database. The figures in the commits that
+# added the COPY load, the staging table upsert and the differential load
+# came from larger runs of the same comparisons
+REPLACE_ROWS = 100_000
+UPSERT_ROWS = 20_000
+DIFFERENTIAL_ROWS = 100_000
+
+# Share of the rows changed between two differential loads
+CHANGED_FRACTION = 0.01
+
+EXPECTED_COPY_SPEEDUP = 3
+EXPECTED_STAGING_SPEEDUP = 5
+
+TABLE_NAME = 'load_benchmark'
+
+
+@pytest.fixture
+def connection():
+    connection = get_db_connection(load_db_config()['target_database'])
+    yield connection
+    connection.rollback()
+    connection.execute(text(f'DROP TABLE IF EXISTS {TABLE_NAME}'))
+    connection.commit()
+    connection.close()
+    forget_reflected_tables()
+
+
+def get_benchmark_data(rows):
+    # Merged transactions with the target table's column types
+    rng = np.random.default_rng(0)
+    customer_ids = rng.integers(1, rows // 10 + 2, rows)
+    return pd.DataFrame({
+        'transaction_id': np.arange(1, rows + 1),
+        'customer_id': customer_ids,
+        'transaction_date': pd.Timestamp('2024-01-01') + pd.to_timedelta(
+            rng.integers(0, 365, rows), unit='D'
+        ),
+        'amount': (rng.random(rows) * 500).round(2),
+        'name': [f'Customer {i}' for i in customer_ids],
+        'age': (customer_ids % 70 + 18).astype('float64'),
+        'country': rng.choice(['UK', 'USA', 'ITALY'], rows),
+        'is_active': customer_ids % 2 == 0
+    })
+
+
+def create_keyed_table(connection, data):
+    replace_table_copy(data, connection, TABLE_NAME)
+    connection.execute(text(
+        f'ALTER TABLE {TABLE_NAME} ADD PRIMARY KEY (transaction_id)'
+    ))
+    connection.commit()
+    forget_reflected_tables()
+
+
+def change_rows(data, fraction):
+    changed = data.copy()
+    rows = changed.sample(frac=fraction, random_state=0).index
+    changed.loc[rows, 'amount'] += 1
+    return changed
+
+
+def single_statement_upsert(data, connection):
+    # upsert_on_existing_table() as it was written: one INSERT ... ON
+    # CONFLICT statement with every row, without its debug logging
+    table = Table(TABLE_NAME, MetaData(), autoload_with=connection)
+    session = sessionmaker(bind=connection)()
+    try:
+        session.execute(build_upsert_statement(table, data))
+        session.commit()
+        connection.commit()
+    finally:
+        session.close()
+
+
+def get_wal_bytes(connection, func):
+    # Bytes of write-ahead log the database writes while func runs
+    wal_query = text('SELECT pg_current_wal_lsn()')
+    start = connection.execute(wal_query).scalar()
+    connection.commit()
+    func()
+    end = connection.execute(wal_query).scalar()
+    connection.commit()
+    return connection.execute(
+        text('SELECT pg_wal_lsn_diff(:end, :start)::bigint'),
+        {'end': end, 'start': start}
+    ).scalar()
+
+
+def test_replace_table_copy_performance(connection):
+    data = get_benchmark_data(REPLACE_ROWS)
+
+    def to_sql():
+        replace_table_to_sql(data, connection, TABLE_NAME)
+        connection.commit()
+
+    to_sql_time = timeit.timeit(to_sql, number=1)
+    copy_time = timeit.timeit(
+        lambda: replace_table_copy(data, connection, TABLE_NAME), number=1
+    )
+    speedup = to_sql_time / copy_time
+
+    print(
+        f"\nReplacing a table of {REPLACE_ROWS} rows\n"
+        f"to_sql: {to_sql_time:.2f}s, "
+        f"{REPLACE_ROWS / to_sql_time:,.0f} rows/s\n"
+        f"COPY: {copy_time:.2f}s, {REPLACE_ROWS / copy_time:,.0f} rows/s\n"
+        f"Speedup: {speedup:.1f}x"
+    )
+    assert speedup >= EXPECTED_COPY_SPEEDUP, (
+        f"Expected replace_table_copy to be at least "
+        f"{EXPECTED_COPY_SPEEDUP}x faster than replace_table_to_sql, "
+        f"but got {speedup:.1f}x"
+    )
+
+
+def test_upsert_engines_performance(connection):
+    data = get_benchmark_data(UPSERT_ROWS)
+    create_keyed_table(connection, data)
+    changed = change_rows(data, 1)
+
+    # Every upsert updates every row: the batched INSERT reverts the
+    # change the others make
+    single_time = timeit.timeit(
+        lambda: single_statement_upsert(changed, connection), number=1
+    )
+    insert_time = timeit.timeit(
+        lambda: upsert_with_insert(data, connection, TABLE_NAME), number=1
+    )
+    copy_time = timeit.timeit(
+        lambda: upsert_with_copy(changed, connection, TABLE_NAME), number=1
+    )
+    speedup = insert_time / copy_time
+
+    print(
+        f"\nUpserting {UPSERT_ROWS} changed rows\n"
+        f"single statement: {single_time:.2f}s, "
+        f"{UPSERT_ROWS / single_time:,.0f} rows/s\n"
+        f"batched INSERT: {insert_time:.2f}s, "
+        f"{UPSERT_ROWS / insert_time:,.0f} rows/s\n"
+        f"COPY staging table: {copy_time:.2f}s, "
+        f"{UPSERT_ROWS / copy_time:,.0f} rows/s"
+    )
+    loaded = pd.read_sql_table(TABLE_NAME, connection)
+    assert loaded['amount'].sum() == pytest.approx(changed['amount'].sum())
+    assert speedup >= EXPECTED_STAGING_SPEEDUP, (
+        f"Expected upsert_with_copy to be at least "
+        f"{EXPECTED_STAGING_SPEEDUP}x faster than upsert_with_insert, "
+        f"but got {speedup:.1f}x"
+    )
+
+
+def test_differential_load_performance(connection, mocker):
+    mocker.patch.dict(os.environ, {'ETL_LOAD_ENGINE': 'copy'})
+    data = add_row_hashes(get_benchmark_data(DIFFERENTIAL_ROWS))
+    create_keyed_table(connection, data)
+    changed = add_row_hashes(
+        change_rows(data.drop(columns='row_hash'), CHANGED_FRACTION)
+    )
+    times = {}
+
+    def timed(name, func):
+        def run():
+            times[name] = timeit.timeit(func, number=1)
+        return run
+
+    # Each load applies the same change to the table: the differential
+    # one makes it, the full upsert reverts it
+    differential_wal = get_wal_bytes(connection, timed(
+        'differential',
+        lambda: load_changed_rows(changed, connection, TABLE_NAME)
+    ))
+    full_wal = get_wal_bytes(connection, timed(
+        'full', lambda: upsert_with_copy(data, connection, TABLE_NAME)
+    ))
+
+    print(
+        f"\nLoading {DIFFERENTIAL_ROWS} rows, "
+        f"{CHANGED_FRACTION:.0%} of them changed\n"
+        f"full upsert: {times['full']:.2f}s, "
+        f"{full_wal / 1024 ** 2:.1f} MB of WAL\n"
+        f"differential: {times['differential']:.2f}s, "
+        f"{differential_wal / 1024 ** 2:.1f} MB of WAL"
+    )
+    assert times['differential'] <= times['full'], (
+        f"Expected the differential load to be no slower than a full "
+        f"upsert, but got {times['differential']:.2f}s vs "
+        f"{times['full']:.2f}s"
+    )
+    assert differential_wal <= full_wal * CHANGED_FRACTION * 10, (
+        f"Expected the differential load to write at most "
+        f"{CHANGED_FRACTION * 10:.0%} of the WAL of a full upsert, but got "
+        f"{differential_wal} vs {full_wal} bytes"
+    )
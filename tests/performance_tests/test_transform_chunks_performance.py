@@ -0,0 +1,70 @@
+import os
+import tracemalloc
+import pandas as pd
+from etl.transform.transform import transform_data, transform_data_chunks
+
+BENCHMARK_ROWS = 100_000
+
+CHUNK_SIZE = 10_000
+
+# Streaming should need a fraction of the memory of the full transform
+EXPECTED_MEMORY_RATIO = 0.4
+
+
+def load_benchmark_data():
+    base_path = os.path.dirname(__file__)
+    transactions = pd.read_csv(
+        os.path.join(base_path, '../test_data/test_transactions.csv')
+    )
+    customers = pd.read_csv(
+        os.path.join(base_path, '../test_data/test_customers.csv')
+    )
+    transactions = transactions.sample(
+        BENCHMARK_ROWS, replace=True, random_state=0
+    ).reset_index(drop=True)
+    transactions['transaction_id'] = transactions.index
+    return transactions, customers
+
+
+def get_peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def stream_chunks(transactions):
+    # Chunks are made as they are consumed, as the extract would
+    for start in range(0, len(transactions), CHUNK_SIZE):
+        yield transactions.iloc[start:start + CHUNK_SIZE].copy()
+
+
+def test_transform_data_chunks_memory():
+    transactions, customers = load_benchmark_data()
+
+    full_peak = get_peak_memory(
+        lambda: transform_data(
+            (transactions.copy(), customers)
+        )['merged_data']
+    )
+    streaming_peak = get_peak_memory(
+        lambda: [
+            None for _ in transform_data_chunks(
+                stream_chunks(transactions), customers
+            )
+        ]
+    )
+    ratio = streaming_peak / full_peak
+
+    print(
+        f"\nPeak memory for {BENCHMARK_ROWS} rows - "
+        f"transform_data: {full_peak / 1e6:.0f}MB, "
+        f"transform_data_chunks ({CHUNK_SIZE} rows per chunk): "
+        f"{streaming_peak / 1e6:.0f}MB"
+    )
+    assert ratio <= EXPECTED_MEMORY_RATIO, (
+        f"Expected streaming to peak at most {EXPECTED_MEMORY_RATIO:.0%} "
+        f"of the full transform, but got {ratio:.0%}"
+    )
@@ -8,6 +8,9 @@ TEST_CONFIG = {
     'unit': {'dir': 'tests/unit_tests', 'cov': ['config', 'utils', 'etl']},
     'integration': {'dir': 'tests/integration_tests', 'cov': ['etl']},
     'component': {'dir': 'tests/component_tests', 'cov': ['etl']},
+    'performance': {
+        'dir': 'tests/performance_tests', 'cov': ['etl', 'utils']
+    },
     'all': {'dir': 'tests', 'cov': ['config', 'etl', 'utils']},
 }
 
@@ -129,7 +132,8 @@ def main():
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         raise ValueError(
-            "Usage: run_tests.py <unit|integration|component|all|lint>"
+            "Usage: run_tests.py "
+            "<unit|integration|component|performance|all|lint>"
         )
     else:
         main()
@@ -0,0 +1,129 @@
+import os
+import pandas as pd
+import pytest
+from utils import cache_utils
+from utils.cache_utils import (
+    StageCache,
+    fingerprint,
+    hash_file,
+    run_cached_stage
+)
+
+
+@pytest.fixture
+def frames():
+    return {
+        'transactions': pd.DataFrame({
+            'transaction_id': pd.Series([1, 2], dtype='int32'),
+            'amount': [10.5, None],
+            'transaction_date': pd.to_datetime(['2023-01-01', None]),
+            'country': pd.Categorical(['UK', 'US'])
+        }),
+        'customers': pd.DataFrame({'name': ['a', None]}, index=[5, 7])
+    }
+
+
+@pytest.fixture
+def stage_cache(tmp_path, mocker):
+    stage_cache = StageCache(str(tmp_path / 'cache'), 1024 * 1024)
+    mocker.patch(
+        'utils.cache_utils.get_stage_cache', return_value=stage_cache
+    )
+    return stage_cache
+
+
+def test_fingerprint_ignores_dictionary_order():
+    assert fingerprint({'a': 1, 'b': 2}, 'x') == (
+        fingerprint({'b': 2, 'a': 1}, 'x')
+    )
+    assert fingerprint({'a': 1}, 'x') != fingerprint({'a': 1}, 'y')
+
+
+def test_stage_cache_round_trips_dtypes_and_index(tmp_path, frames):
+    stage_cache = StageCache(str(tmp_path), 1024 * 1024)
+    stage_cache.put('extract', 'key', frames)
+
+    cached = stage_cache.get('extract', 'key')
+
+    assert list(cached) == ['transactions', 'customers']
+    for name, frame in frames.items():
+        pd.testing.assert_frame_equal(cached[name], frame)
+    assert stage_cache.get('extract', 'other') is None
+
+
+def test_stage_cache_ignores_incomplete_entries(tmp_path, frames):
+    stage_cache = StageCache(str(tmp_path), 1024 * 1024)
+    stage_cache.put('extract', 'key', frames)
+    os.remove(tmp_path / 'extract-key' / 'customers.parquet')
+
+    assert stage_cache.get('extract', 'key') is None
+
+
+def test_stage_cache_evicts_least_recently_used(tmp_path, frames):
+    stage_cache = StageCache(str(tmp_path), 1024 * 1024)
+    for key in ['a', 'b', 'c']:
+        stage_cache.put('extract', key, frames)
+    entry_size = stage_cache.entries()[0][1]
+    # Make 'a' the oldest and 'b' the most recently used
+    for key, used in [('a', 1), ('c', 2), ('b', 3)]:
+        marker = tmp_path / f'extract-{key}' / 'complete'
+        os.utime(marker, (used, used))
+    stage_cache.max_bytes = entry_size * 2
+
+    assert stage_cache.evict() == ['extract-a']
+    assert stage_cache.get('extract', 'b') is not None
+    assert stage_cache.get('extract', 'c') is not None
+
+
+def test_stage_cache_invalidates_one_stage(tmp_path, frames):
+    stage_cache = StageCache(str(tmp_path), 1024 * 1024)
+    stage_cache.put('extract', 'key', frames)
+    stage_cache.put('transform', 'key', frames)
+
+    assert stage_cache.invalidate('transform') == ['transform-key']
+    assert stage_cache.get('extract', 'key') is not None
+    assert stage_cache.invalidate() == ['extract-key']
+
+
+def test_run_cached_stage_skips_the_stage_on_a_hit(stage_cache, frames):
+    calls = []
+
+    def run_stage():
+        calls.append(True)
+        return (frames['transactions'], frames['customers'])
+
+    names = ['transactions', 'customers']
+    first = run_cached_stage('extract', 'key', names, run_stage)
+    second = run_cached_stage('extract', 'key', names, run_stage)
+
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(second[0], first[0])
+    pd.testing.assert_frame_equal(second[1], first[1])
+
+
+def test_run_cached_stage_without_a_key_runs_the_stage(stage_cache):
+    calls = []
+
+    def run_stage():
+        calls.append(True)
+        return (pd.DataFrame({'a': [1]}),)
+
+    run_cached_stage('extract', None, ['a'], run_stage)
+    run_cached_stage('extract', None, ['a'], run_stage)
+
+    assert len(calls) == 2
+    assert stage_cache.entries() == []
+
+
+def test_hash_file_reuses_hash_of_unchanged_file(tmp_path, mocker):
+    mocker.patch('utils.cache_utils.CACHE_DIR', str(tmp_path / 'cache'))
+    path = tmp_path / 'customers.csv'
+    path.write_text('customer_id\n1\n')
+    first = hash_file(str(path))
+    read = mocker.spy(cache_utils.hashlib, 'sha256')
+
+    assert hash_file(str(path)) == first
+    read.assert_not_called()
+
+    path.write_text('customer_id\n22\n')
+    assert hash_file(str(path)) != first
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from etl.transform.clean_transactions import remove_seen_transactions
+
+
+def test_remove_seen_transactions_drops_ids_from_earlier_chunks():
+    transactions = pd.DataFrame({
+        'transaction_id': [7, 3, 12, 1],
+        'amount': [10.0, 20.0, 30.0, 40.0]
+    })
+
+    result, seen_transaction_ids = remove_seen_transactions(
+        transactions, np.array([1, 5, 7], dtype='int64')
+    )
+
+    assert result['transaction_id'].tolist() == [3, 12]
+    assert seen_transaction_ids.tolist() == [1, 3, 5, 7, 12]
+
+
+def test_remove_seen_transactions_first_chunk_keeps_everything():
+    transactions = pd.DataFrame({'transaction_id': [4, 2], 'amount': [1, 2]})
+
+    result, seen_transaction_ids = remove_seen_transactions(
+        transactions, np.array([], dtype='int64')
+    )
+
+    pd.testing.assert_frame_equal(result, transactions)
+    assert seen_transaction_ids.tolist() == [2, 4]
+
+
+def test_remove_seen_transactions_across_chunks():
+    chunks = [
+        pd.DataFrame({'transaction_id': [1, 2]}),
+        pd.DataFrame({'transaction_id': [2, 3]}),
+        pd.DataFrame({'transaction_id': [1, 3, 4]})
+    ]
+    seen_transaction_ids = np.array([], dtype='int64')
+
+    kept = []
+    for chunk in chunks:
+        chunk, seen_transaction_ids = remove_seen_transactions(
+            chunk, seen_transaction_ids
+        )
+        kept.extend(chunk['transaction_id'].tolist())
+
+    assert kept == [1, 2, 3, 4]
@@ -0,0 +1,66 @@
+import threading
+import pytest
+from concurrent.futures import CancelledError
+from utils.concurrency_utils import Cancellation, run_concurrently
+
+
+def test_run_concurrently_returns_results_in_task_order():
+    results = run_concurrently([lambda: 'first', lambda: 'second'])
+
+    assert results == ['first', 'second']
+
+
+def test_run_concurrently_runs_tasks_at_the_same_time():
+    # Both tasks must be running at once to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    results = run_concurrently([barrier.wait, barrier.wait])
+
+    assert sorted(results) == [0, 1]
+
+
+def test_run_concurrently_cancels_pending_tasks_on_failure():
+    calls = []
+
+    def failing_task():
+        raise ValueError("Source unavailable")
+
+    def pending_task():
+        calls.append('ran')
+
+    with pytest.raises(ValueError, match="Source unavailable"):
+        run_concurrently([failing_task, pending_task], max_workers=1)
+
+    assert calls == []
+
+
+def test_run_concurrently_cancels_running_tasks_on_failure():
+    cancellation = Cancellation()
+    started = threading.Event()
+    stopped = threading.Event()
+
+    def failing_task():
+        started.wait(timeout=5)
+        raise ValueError("Source unavailable")
+
+    def running_task():
+        with cancellation.on_cancel(stopped.set):
+            started.set()
+            # Stands in for a query that only ends when cancelled
+            assert stopped.wait(timeout=5)
+
+    with pytest.raises(ValueError, match="Source unavailable"):
+        run_concurrently(
+            [failing_task, running_task], cancellation=cancellation
+        )
+
+    assert stopped.is_set()
+
+
+def test_cancellation_stops_tasks_that_start_afterwards():
+    cancellation = Cancellation()
+    cancellation.cancel()
+
+    with pytest.raises(CancelledError):
+        with cancellation.on_cancel(lambda: None):
+            pass
@@ -0,0 +1,145 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from etl.transform.customer_aggregates import (
+    aggregate_customers,
+    compare_customer_aggregates,
+    empty_customer_aggregates,
+    get_high_value_customers_from_aggregates,
+    load_customer_aggregates,
+    save_customer_aggregates,
+    update_customer_aggregates
+)
+from etl.transform.transform import HIGH_VALUE_LOWER_BOUND
+
+
+def get_merged_data():
+    rng = np.random.default_rng(0)
+    customer_ids = rng.integers(1, 40, 300)
+    return pd.DataFrame({
+        'customer_id': customer_ids,
+        'transaction_id': np.arange(1, 301),
+        'transaction_date': '05/03/2024',
+        'amount': rng.random(300).round(2) * 200,
+        'name': [f'Customer {i}' for i in customer_ids],
+        'age': np.where(customer_ids % 5 == 0, np.nan, customer_ids + 20.0),
+        'country': pd.Series('UK', index=range(300)).where(
+            customer_ids % 7 != 0
+        ),
+        'is_active': customer_ids % 2 == 0
+    })
+
+
+@pytest.fixture
+def state_dir(mocker, tmp_path):
+    mocker.patch(
+        'etl.transform.customer_aggregates.WATERMARK_DIR', str(tmp_path)
+    )
+    mocker.patch.dict(os.environ, {'ENV': 'test'})
+    return tmp_path
+
+
+def groupby_high_value_customers(data):
+    # The high value customers computed directly from the transactions
+    data = data.groupby('customer_id').agg(
+        total_spend=('amount', 'sum'),
+        avg_transaction_value=('amount', 'mean'),
+        name=('name', 'last'),
+        age=('age', 'last'),
+        country=('country', 'last'),
+        is_active=('is_active', 'last')
+    ).reset_index()
+    return data[data['total_spend'] > HIGH_VALUE_LOWER_BOUND]
+
+
+def test_high_value_customers_from_aggregates_match_groupby():
+    # Customers without a country are dropped by the cleaning
+    data = get_merged_data().dropna(subset=['country'])
+
+    result = get_high_value_customers_from_aggregates(
+        aggregate_customers(data), HIGH_VALUE_LOWER_BOUND
+    )
+
+    pd.testing.assert_frame_equal(
+        result.reset_index(drop=True),
+        groupby_high_value_customers(data).reset_index(drop=True),
+        check_exact=False,
+        rtol=1e-12
+    )
+
+
+def test_update_customer_aggregates_in_batches_matches_full_history():
+    data = get_merged_data()
+
+    customer_aggregates = empty_customer_aggregates()
+    for start in range(0, len(data), 70):
+        customer_aggregates = update_customer_aggregates(
+            customer_aggregates, data.iloc[start:start + 70]
+        )
+
+    mismatches = compare_customer_aggregates(
+        customer_aggregates, aggregate_customers(data)
+    )
+    assert mismatches.empty
+
+
+def test_update_customer_aggregates_with_unordered_chunks():
+    # Streamed chunks are not ordered by transaction_id
+    data = get_merged_data()
+    counted = aggregate_customers(data.head(100))
+    chunks = data.iloc[100:].sample(frac=1, random_state=0)
+
+    customer_aggregates = counted
+    for start in range(0, len(chunks), 50):
+        customer_aggregates = update_customer_aggregates(
+            customer_aggregates, chunks.iloc[start:start + 50], counted
+        )
+
+    assert compare_customer_aggregates(
+        customer_aggregates, aggregate_customers(data)
+    ).empty
+
+
+def test_update_customer_aggregates_skips_counted_transactions():
+    data = get_merged_data()
+    customer_aggregates = aggregate_customers(data.head(200))
+
+    # The batch overlaps rows that are already counted, as on a rerun
+    customer_aggregates = update_customer_aggregates(
+        customer_aggregates, data.iloc[150:]
+    )
+
+    assert compare_customer_aggregates(
+        customer_aggregates, aggregate_customers(data)
+    ).empty
+
+
+def test_compare_customer_aggregates_reports_differences():
+    expected = aggregate_customers(get_merged_data())
+    customer_aggregates = expected.copy()
+    customer_aggregates.loc[0, 'transaction_count'] += 1
+    customer_aggregates = customer_aggregates.drop(index=1)
+
+    mismatches = compare_customer_aggregates(customer_aggregates, expected)
+
+    assert sorted(mismatches['customer_id']) == sorted(
+        expected.loc[[0, 1], 'customer_id']
+    )
+
+
+def test_load_customer_aggregates_missing_returns_none(state_dir):
+    assert load_customer_aggregates() is None
+
+
+def test_save_then_load_customer_aggregates(state_dir):
+    customer_aggregates = aggregate_customers(
+        get_merged_data().dropna(subset=['country'])
+    )
+
+    save_customer_aggregates(customer_aggregates)
+
+    pd.testing.assert_frame_equal(
+        load_customer_aggregates(), customer_aggregates
+    )
+    assert os.listdir(state_dir) == ['customer_aggregates_test.csv']
@@ -1,6 +1,7 @@
+import os
 import pytest
 import pandas as pd
-from utils.date_utils import standardise_date
+from utils.date_utils import standardise_date, standardise_dates
 
 
 @pytest.mark.parametrize("date_str, expected", [
@@ -26,3 +27,33 @@ def test_standardise_date(date_str, expected):
         assert pd.isna(result)
     else:
         assert result == expected
+
+
+def test_standardise_dates_matches_standardise_date():
+    test_data_path = os.path.join(
+        os.path.dirname(__file__), '../test_data/test_transactions.csv'
+    )
+    dates = pd.read_csv(test_data_path)['transaction_date']
+
+    expected = dates.apply(standardise_date)
+
+    pd.testing.assert_series_equal(standardise_dates(dates), expected)
+
+
+def test_standardise_dates_edge_cases():
+    dates = pd.Series(
+        ['2021/13/01', '', None, '01-02-2021', '01-02-2021', 'invalid date'],
+        index=[10, 11, 12, 13, 14, 15],
+        name='transaction_date'
+    )
+
+    expected = dates.apply(standardise_date)
+
+    pd.testing.assert_series_equal(standardise_dates(dates), expected)
+
+
+def test_standardise_dates_empty():
+    result = standardise_dates(pd.Series([], dtype='object'))
+
+    assert result.dtype == 'datetime64[ns]'
+    assert result.empty
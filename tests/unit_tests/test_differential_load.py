@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from etl.load.differential_load import (
+    add_row_hashes,
+    get_changed_rows,
+    get_missing_keys
+)
+
+
+def get_merged_data():
+    return pd.DataFrame({
+        'transaction_id': [1, 2, 3],
+        'amount': [10.0, None, 30.0],
+        'name': ['a', 'b', None]
+    })
+
+
+def test_add_row_hashes_changes_only_for_changed_rows():
+    data = add_row_hashes(get_merged_data())
+    changed = get_merged_data()
+    changed.loc[1, 'amount'] = 20.0
+
+    hashes = add_row_hashes(changed)['row_hash']
+
+    assert data['row_hash'].dtype == 'int64'
+    assert (hashes == data['row_hash']).tolist() == [True, False, True]
+    pd.testing.assert_series_equal(
+        add_row_hashes(get_merged_data())['row_hash'], data['row_hash']
+    )
+
+
+def test_get_changed_rows_selects_new_and_changed_rows():
+    data = add_row_hashes(get_merged_data())
+    target_hashes = pd.DataFrame({
+        'transaction_id': [3, 1, 9],
+        'row_hash': [data['row_hash'][2], data['row_hash'][0] + 1, 5]
+    })
+
+    changed = get_changed_rows(data, target_hashes)
+
+    # 1 differs, 2 is new and 3 is unchanged
+    assert changed['transaction_id'].tolist() == [1, 2]
+
+
+def test_get_changed_rows_sends_every_row_to_an_empty_table():
+    data = add_row_hashes(get_merged_data())
+    target_hashes = pd.DataFrame({
+        'transaction_id': np.array([], dtype='int64'),
+        'row_hash': np.array([], dtype='int64')
+    })
+
+    pd.testing.assert_frame_equal(get_changed_rows(data, target_hashes), data)
+
+
+def test_get_missing_keys_finds_rows_gone_from_the_snapshot():
+    target_hashes = pd.DataFrame({
+        'transaction_id': [1, 4, 2, 5],
+        'row_hash': [0, 0, 0, 0]
+    })
+
+    missing = get_missing_keys(get_merged_data(), target_hashes)
+
+    assert missing.tolist() == [4, 5]
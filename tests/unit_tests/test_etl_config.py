@@ -0,0 +1,154 @@
+import os
+import pytest
+from config.etl_config import (
+    load_etl_config,
+    EtlConfigError,
+    DEFAULT_EXTRACT_CHUNK_SIZE,
+    DEFAULT_LOAD_PARTITION_ROWS,
+    DEFAULT_STAGE_CACHE_MAX_MB
+)
+
+
+def test_load_etl_config_defaults(mocker):
+    mocker.patch.dict(os.environ, {}, clear=True)
+
+    config = load_etl_config()
+
+    assert config['extract_chunk_size'] == DEFAULT_EXTRACT_CHUNK_SIZE
+    assert config['extract_incremental'] is False
+    assert config['full_refresh'] is False
+    assert config['extract_partitions'] == 1
+    assert config['extract_partition_column'] == 'transaction_id'
+    assert config['extract_engine'] == 'read_sql'
+    assert config['optimise_dtypes'] is False
+    assert config['streaming'] is False
+    assert config['transform_engine'] == 'pandas'
+    assert config['transform_workers'] == 1
+    assert config['spend_tiers'] == [('high_value', 500.0, False)]
+    assert config['background_checkpoints'] is False
+    assert config['checkpoint_format'] == 'csv'
+    assert config['checkpoint_csv_engine'] == 'pandas'
+    assert config['stage_cache'] is False
+    assert config['stage_cache_max_mb'] == DEFAULT_STAGE_CACHE_MAX_MB
+    assert config['stage_cache_key'] == 'summary'
+    assert config['load_engine'] == 'to_sql'
+    assert config['differential_load'] is False
+    assert config['differential_delete'] is False
+    assert config['load_outputs'] == ['merged_data']
+    assert config['load_connections'] == 1
+    assert config['load_partition_rows'] == DEFAULT_LOAD_PARTITION_ROWS
+
+
+def test_load_etl_config_from_env(mocker):
+    mocker.patch.dict(os.environ, {'ETL_EXTRACT_CHUNK_SIZE': '1000'})
+
+    config = load_etl_config()
+
+    assert config['extract_chunk_size'] == 1000
+
+
+@pytest.mark.parametrize("chunk_size", ['0', '-5', 'lots'])
+def test_load_etl_config_invalid_chunk_size(mocker, chunk_size):
+    mocker.patch.dict(os.environ, {'ETL_EXTRACT_CHUNK_SIZE': chunk_size})
+
+    with pytest.raises(EtlConfigError, match=(
+        "Configuration error: ETL_EXTRACT_CHUNK_SIZE must be a positive "
+        f"integer, got '{chunk_size}'"
+    )):
+        load_etl_config()
+
+
+@pytest.mark.parametrize("value, expected", [
+    ('true', True),
+    ('TRUE', True),
+    ('1', True),
+    ('false', False),
+    ('0', False),
+    ('', False),
+])
+def test_load_etl_config_bool_settings(mocker, value, expected):
+    mocker.patch.dict(os.environ, {
+        'ETL_EXTRACT_INCREMENTAL': value,
+        'ETL_FULL_REFRESH': value
+    })
+
+    config = load_etl_config()
+
+    assert config['extract_incremental'] is expected
+    assert config['full_refresh'] is expected
+
+
+def test_load_etl_config_invalid_bool_setting(mocker):
+    mocker.patch.dict(os.environ, {'ETL_FULL_REFRESH': 'maybe'})
+
+    with pytest.raises(EtlConfigError, match="ETL_FULL_REFRESH must be one of"):
+        load_etl_config()
+
+
+def test_load_etl_config_invalid_partition_column(mocker):
+    mocker.patch.dict(
+        os.environ,
+        {'ETL_EXTRACT_PARTITION_COLUMN': 'id; DROP TABLE transactions'}
+    )
+
+    with pytest.raises(
+        EtlConfigError,
+        match="ETL_EXTRACT_PARTITION_COLUMN must be a column name"
+    ):
+        load_etl_config()
+
+
+def test_load_etl_config_invalid_extract_engine(mocker):
+    mocker.patch.dict(os.environ, {'ETL_EXTRACT_ENGINE': 'odbc'})
+
+    with pytest.raises(
+        EtlConfigError,
+        match="ETL_EXTRACT_ENGINE must be one of"
+    ):
+        load_etl_config()
+
+
+def test_load_etl_config_spend_tiers(mocker):
+    mocker.patch.dict(
+        os.environ, {'ETL_SPEND_TIERS': 'bronze:100, silver:500,gold:90%'}
+    )
+
+    config = load_etl_config()
+
+    assert config['spend_tiers'] == [
+        ('bronze', 100.0, False),
+        ('silver', 500.0, False),
+        ('gold', 0.9, True)
+    ]
+
+
+@pytest.mark.parametrize("tiers", [
+    'gold', 'gold:lots', ':500', 'gold:150%', 'gold:500,gold:900'
+])
+def test_load_etl_config_invalid_spend_tiers(mocker, tiers):
+    mocker.patch.dict(os.environ, {'ETL_SPEND_TIERS': tiers})
+
+    with pytest.raises(EtlConfigError, match="ETL_SPEND_TIERS must be"):
+        load_etl_config()
+
+
+def test_load_etl_config_load_outputs(mocker):
+    mocker.patch.dict(os.environ, {
+        'ETL_LOAD_OUTPUTS': 'merged_data, Customer_Spend_Tiers,merged_data'
+    })
+
+    config = load_etl_config()
+
+    assert config['load_outputs'] == ['merged_data', 'customer_spend_tiers']
+
+
+def test_load_etl_config_invalid_load_outputs(mocker):
+    mocker.patch.dict(
+        os.environ, {'ETL_LOAD_OUTPUTS': 'merged_data,cleaned_customers'}
+    )
+
+    with pytest.raises(
+        EtlConfigError,
+        match="ETL_LOAD_OUTPUTS must be a list of"
+    ):
+        load_etl_config()
@@ -0,0 +1,39 @@
+import pytest
+import pandas as pd
+from etl.extract.extract import extract_data
+
+
+def test_extract_data_returns_both_sources(mocker, capsys):
+    transactions = pd.DataFrame({'transaction_id': [1, 2]})
+    customers = pd.DataFrame({'customer_id': [1]})
+    mocker.patch(
+        "etl.extract.extract.extract_transactions",
+        return_value=transactions
+    )
+    mocker.patch(
+        "etl.extract.extract.extract_customers",
+        return_value=customers
+    )
+
+    result = extract_data()
+
+    assert result[0] is transactions
+    assert result[1] is customers
+    assert capsys.readouterr().out == (
+        "Extracted transactions: 2 rows, columns ['transaction_id']\n"
+        "Extracted customers: 1 rows, columns ['customer_id']\n"
+    )
+
+
+def test_extract_data_raises_when_a_source_fails(mocker):
+    mocker.patch(
+        "etl.extract.extract.extract_transactions",
+        side_effect=Exception("Failed to extract data: timeout")
+    )
+    mocker.patch(
+        "etl.extract.extract.extract_customers",
+        return_value=pd.DataFrame({'customer_id': [1]})
+    )
+
+    with pytest.raises(Exception, match="Failed to extract data: timeout"):
+        extract_data()
@@ -1,7 +1,10 @@
+import os
 import pytest
 import pandas as pd
 from etl.extract.extract_customers import (
     extract_customers,
+    read_customers_csv,
+    CUSTOMERS_SCHEMA,
     TYPE,
     FILE_PATH,
     EXPECTED_PERFORMANCE,
@@ -74,3 +77,56 @@ def test_log_customers_error(mocker, mock_logger):
     mock_logger.error.assert_called_once_with(
          f"Error loading {FILE_PATH}: Failed to load CSV file: {FILE_PATH}"
     )
+
+
+TEST_CUSTOMERS_PATH = os.path.join(
+    os.path.dirname(__file__), '../test_data/test_customers.csv'
+)
+
+
+@pytest.mark.parametrize("engine, memory_map", [
+    ('c', 'false'),
+    ('c', 'true'),
+    ('pyarrow', 'false'),
+    ('pyarrow', 'true'),
+])
+def test_read_customers_csv_applies_schema(mocker, engine, memory_map):
+    mocker.patch.dict(os.environ, {
+        'ETL_CUSTOMERS_CSV_ENGINE': engine,
+        'ETL_CUSTOMERS_MEMORY_MAP': memory_map
+    })
+    expected = pd.read_csv(TEST_CUSTOMERS_PATH).astype(CUSTOMERS_SCHEMA)
+
+    customers = read_customers_csv(TEST_CUSTOMERS_PATH)
+
+    assert customers.dtypes.astype(str).to_dict() == CUSTOMERS_SCHEMA
+    pd.testing.assert_frame_equal(customers, expected)
+
+
+@pytest.mark.parametrize("engine", ['c', 'pyarrow'])
+def test_read_customers_csv_keeps_rows_without_customer_id(
+    mocker, tmp_path, engine
+):
+    mocker.patch.dict(os.environ, {'ETL_CUSTOMERS_CSV_ENGINE': engine})
+    path = tmp_path / 'customers.csv'
+    path.write_text(
+        'customer_id,name,age,country,is_active\n'
+        '1,Alice,30,UK,1\n'
+        ',Bob,,US,0\n'
+    )
+
+    customers = read_customers_csv(str(path))
+
+    assert customers.shape[0] == 2
+    assert customers['customer_id'].isna().tolist() == [False, True]
+
+
+def test_read_customers_csv_pyarrow_engine_needs_pyarrow(mocker):
+    mocker.patch.dict(os.environ, {
+        'ETL_CUSTOMERS_CSV_ENGINE': 'pyarrow',
+        'ETL_CUSTOMERS_MEMORY_MAP': 'true'
+    })
+    mocker.patch('etl.extract.extract_customers.pa', None)
+
+    with pytest.raises(ImportError, match="needs the pyarrow package"):
+        read_customers_csv(TEST_CUSTOMERS_PATH)
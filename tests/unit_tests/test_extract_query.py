@@ -1,8 +1,18 @@
+import io
+from datetime import date, datetime, timedelta
+import psycopg2
 import pytest
 import pandas as pd
 from unittest.mock import MagicMock, call
+from sqlalchemy.dialects import postgresql
 from etl.extract.extract_query import (
+    build_partition_query,
     execute_extract_query,
+    execute_extract_query_chunks,
+    execute_extract_query_copy,
+    get_partition_bounds,
+    read_copy_csv,
+    render_query,
     QueryExecutionError
 )
 
@@ -17,6 +27,20 @@ def test_function_calls_pandas_read_sql_query(mocker):
     mock_read_sql.assert_called_once_with(query, mock_connection)
 
 
+def test_execute_extract_query_binds_params(mocker):
+    mock_read_sql = mocker.patch('pandas.read_sql_query')
+    mock_connection = MagicMock()
+    query = "SELECT * FROM transactions WHERE transaction_id > :last_id"
+    params = {'last_id': 10}
+
+    execute_extract_query(query, mock_connection, params)
+
+    args, kwargs = mock_read_sql.call_args
+    assert str(args[0]) == query
+    assert args[1] == mock_connection
+    assert kwargs == {'params': params}
+
+
 def test_execute_extract_query_invalid_query(mocker):
     mock_read_sql = mocker.patch(
         'pandas.read_sql_query',
@@ -52,3 +76,167 @@ def test_execute_extract_query_invalid_query_logging(mocker):
         call("Failed to execute query: Invalid query"),
         call(f"The query that failed was: {query}")
     ])
+
+
+def test_execute_extract_query_chunks_streams_results(mocker):
+    chunks = [
+        pd.DataFrame({'transaction_id': [1, 2]}),
+        pd.DataFrame({'transaction_id': [3]})
+    ]
+    mock_read_sql = mocker.patch(
+        'pandas.read_sql_query',
+        return_value=iter(chunks)
+    )
+    mock_connection = MagicMock()
+    query = "SELECT * FROM transactions"
+
+    result = list(execute_extract_query_chunks(query, mock_connection, 2))
+
+    mock_connection.execution_options.assert_called_once_with(
+        stream_results=True,
+        max_row_buffer=2
+    )
+    args, kwargs = mock_read_sql.call_args
+    assert str(args[0]) == query
+    assert args[1] == mock_connection.execution_options.return_value
+    assert kwargs == {'params': None, 'chunksize': 2}
+    assert result == chunks
+
+
+def test_execute_extract_query_chunks_invalid_query(mocker):
+    mocker.patch(
+        'pandas.read_sql_query',
+        side_effect=pd.errors.DatabaseError("Invalid query")
+    )
+    mock_connection = MagicMock()
+    query = "SELECT unrecognized_column FROM transactions"
+
+    with pytest.raises(QueryExecutionError):
+        list(execute_extract_query_chunks(query, mock_connection, 2))
+
+
+@pytest.mark.parametrize("lower, upper, partitions, expected", [
+    (1, 10, 2, [(1, 6), (6, 11)]),
+    (1, 10500, 4, [(1, 2626), (2626, 5251), (5251, 7876), (7876, 10501)]),
+    (5, 6, 4, [(5, 6), (6, 7)]),
+    (7, 7, 3, [(7, 8)]),
+])
+def test_get_partition_bounds(lower, upper, partitions, expected):
+    assert get_partition_bounds(lower, upper, partitions) == expected
+
+
+def test_get_partition_bounds_splits_dates_into_days():
+    bounds = get_partition_bounds(date(2024, 1, 1), date(2024, 1, 10), 2)
+
+    assert bounds == [
+        (date(2024, 1, 1), date(2024, 1, 6)),
+        (date(2024, 1, 6), date(2024, 1, 11))
+    ]
+
+
+def test_get_partition_bounds_splits_timestamps():
+    lower = datetime(2024, 1, 1)
+    upper = datetime(2024, 1, 3) - timedelta(microseconds=1)
+
+    bounds = get_partition_bounds(lower, upper, 2)
+
+    assert bounds == [
+        (lower, datetime(2024, 1, 2)),
+        (datetime(2024, 1, 2), datetime(2024, 1, 3))
+    ]
+
+
+def test_get_partition_bounds_rejects_text_keys():
+    with pytest.raises(TypeError, match='integers, dates or timestamps'):
+        get_partition_bounds('05/03/2024', '31/12/2024', 2)
+
+
+def test_build_partition_query():
+    query = "SELECT transaction_id FROM transactions;"
+
+    assert build_partition_query(query, 'transaction_id') == (
+        "SELECT * FROM (SELECT transaction_id FROM transactions) AS source "
+        "WHERE transaction_id >= :partition_lower "
+        "AND transaction_id < :partition_upper"
+    )
+
+
+def test_build_partition_query_include_nulls():
+    query = "SELECT transaction_id FROM transactions"
+
+    assert build_partition_query(
+        query, 'transaction_id', include_nulls=True
+    ).endswith(
+        "WHERE (transaction_id >= :partition_lower "
+        "AND transaction_id < :partition_upper "
+        "OR transaction_id IS NULL)"
+    )
+
+
+def test_render_query_inlines_params():
+    connection = MagicMock()
+    connection.dialect = postgresql.dialect()
+    query = "SELECT * FROM transactions WHERE transaction_id > :last_id;"
+
+    assert render_query(query, connection, {'last_id': 10}) == (
+        "SELECT * FROM transactions WHERE transaction_id > 10"
+    )
+
+
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+def test_read_copy_csv_keeps_text_and_nulls(mocker, use_pyarrow):
+    if not use_pyarrow:
+        mocker.patch('etl.extract.extract_query.pa', None)
+    buffer = io.BytesIO(
+        b'transaction_id,transaction_date,amount\n'
+        b'1,2024-01-01,62.14\n'
+        b'2,\\N,""\n'
+    )
+
+    result = read_copy_csv(buffer, ['transaction_date', 'amount'])
+
+    assert result['transaction_id'].tolist() == [1, 2]
+    assert result['amount'].tolist() == ['62.14', '']
+    assert result['transaction_date'].iloc[0] == '2024-01-01'
+    assert pd.isna(result['transaction_date'].iloc[1])
+
+
+def test_execute_extract_query_copy_streams_csv(mocker):
+    mock_cursor = MagicMock()
+    mock_cursor.description = [
+        MagicMock(type_code=23), MagicMock(type_code=25)
+    ]
+    mock_cursor.description[0].name = 'transaction_id'
+    mock_cursor.description[1].name = 'amount'
+    mock_cursor.copy_expert.side_effect = (
+        lambda sql, buffer: buffer.write(b'transaction_id,amount\n1,2.5\n')
+    )
+    connection = MagicMock()
+    connection.dialect = postgresql.dialect()
+    connection.connection.cursor.return_value = mock_cursor
+
+    result = execute_extract_query_copy(
+        "SELECT transaction_id, amount FROM transactions", connection
+    )
+
+    copy_sql = mock_cursor.copy_expert.call_args[0][0]
+    assert copy_sql.startswith(
+        "COPY (SELECT transaction_id, amount FROM transactions) TO STDOUT"
+    )
+    assert result['amount'].tolist() == ['2.5']
+    mock_cursor.close.assert_called_once()
+
+
+def test_execute_extract_query_copy_invalid_query(mocker):
+    mock_cursor = MagicMock()
+    mock_cursor.execute.side_effect = psycopg2.Error("Invalid query")
+    connection = MagicMock()
+    connection.dialect = postgresql.dialect()
+    connection.connection.cursor.return_value = mock_cursor
+
+    with pytest.raises(QueryExecutionError):
+        execute_extract_query_copy(
+            "SELECT unrecognized_column FROM transactions", connection
+        )
+
+    mock_cursor.close.assert_called_once()
@@ -2,6 +2,10 @@ import pytest
 import pandas as pd
 from etl.extract.extract_transactions import (
     extract_transactions,
+    extract_transactions_chunks,
+    get_extract_transactions_query,
+    get_transactions_fingerprint,
+    update_transactions_watermark,
     TYPE,
     # EXTRACT_TRANSACTIONS_QUERY_FILE,
     EXPECTED_IMPORT_RATE,
@@ -68,3 +72,156 @@ def test_log_transactions_error(mocker, mock_logger):
     mock_logger.error.assert_called_once_with(
         "Failed to extract data: Exception message"
     )
+
+
+def test_extract_transactions_chunks_yields_chunks(
+    mocker,
+    mock_log_extract_success,
+    mock_logger
+):
+    chunks = [
+        pd.DataFrame({'transaction_id': [1, 2], 'amount': ['1.0', '2.0']}),
+        pd.DataFrame({'transaction_id': [3], 'amount': ['3.0']})
+    ]
+    mock_execution = mocker.patch(
+        "etl.extract.extract_transactions."
+        "extract_transactions_execution_chunks",
+        return_value=iter(chunks)
+    )
+    # Start and end of each of the three fetches, the last finding the
+    # stream exhausted. The gaps between them are the consumer's time
+    mocker.patch(
+        "etl.extract.extract_transactions.timeit.default_timer",
+        side_effect=[100.0, 100.2, 105.0, 105.2, 110.0, 110.1]
+    )
+
+    result = list(extract_transactions_chunks(chunk_size=2))
+
+    assert result == chunks
+    mock_execution.assert_called_once_with(2)
+    mock_log_extract_success.assert_called_once_with(
+        mock_logger,
+        TYPE,
+        (3, 2),
+        0.5,
+        EXPECTED_IMPORT_RATE,
+    )
+
+
+def test_extract_transactions_chunks_error(mocker, mock_logger):
+    mocker.patch(
+        "etl.extract.extract_transactions."
+        "extract_transactions_execution_chunks",
+        side_effect=Exception("Exception message")
+    )
+
+    with pytest.raises(Exception, match="Exception message"):
+        list(extract_transactions_chunks(chunk_size=2))
+
+    mock_logger.error.assert_called_once_with(
+        "Failed to extract data: Exception message"
+    )
+
+
+@pytest.fixture
+def mock_etl_config(mocker):
+    config = {'extract_incremental': True, 'full_refresh': False}
+    mocker.patch(
+        "etl.extract.extract_transactions.load_etl_config",
+        return_value=config
+    )
+    return config
+
+
+def test_get_extract_transactions_query_incremental(mocker, mock_etl_config):
+    mocker.patch(
+        "etl.extract.extract_transactions.load_watermark",
+        return_value={'transaction_id': 10500}
+    )
+
+    query, params = get_extract_transactions_query()
+
+    assert 'transaction_id > :last_transaction_id' in query
+    assert params == {'last_transaction_id': 10500}
+
+
+@pytest.mark.parametrize("incremental, full_refresh, watermark", [
+    (False, False, {'transaction_id': 10500}),
+    (True, True, {'transaction_id': 10500}),
+    (True, False, None),
+])
+def test_get_extract_transactions_query_full(
+    mocker,
+    mock_etl_config,
+    incremental,
+    full_refresh,
+    watermark
+):
+    mock_etl_config['extract_incremental'] = incremental
+    mock_etl_config['full_refresh'] = full_refresh
+    mocker.patch(
+        "etl.extract.extract_transactions.load_watermark",
+        return_value=watermark
+    )
+
+    query, params = get_extract_transactions_query()
+
+    assert 'WHERE' not in query
+    assert params is None
+
+
+def test_update_transactions_watermark_saves_max_id(mocker):
+    mock_save = mocker.patch(
+        "etl.extract.extract_transactions.save_watermark"
+    )
+    transactions = pd.DataFrame({'transaction_id': [7, 12, 3]})
+
+    update_transactions_watermark(transactions)
+
+    mock_save.assert_called_once_with(
+        'transactions',
+        {'transaction_id': 12}
+    )
+
+
+def test_update_transactions_watermark_ignores_empty_extract(mocker):
+    mock_save = mocker.patch(
+        "etl.extract.extract_transactions.save_watermark"
+    )
+
+    update_transactions_watermark(pd.DataFrame({'transaction_id': []}))
+
+    mock_save.assert_not_called()
+
+
+@pytest.mark.parametrize("cache_key, keys", [
+    ('summary', ['row_count', 'lower', 'upper']),
+    ('hash', ['row_count', 'row_hash_sum']),
+])
+def test_get_transactions_fingerprint_hashes_rows_only_on_request(
+    mocker,
+    mock_etl_config,
+    cache_key,
+    keys
+):
+    mock_etl_config['stage_cache_key'] = cache_key
+    mocker.patch(
+        "etl.extract.extract_transactions.load_watermark",
+        return_value={'transaction_id': 10500}
+    )
+    mocker.patch("etl.extract.extract_transactions.get_db_connection")
+    mock_summary = mocker.patch(
+        "etl.extract.extract_transactions.get_source_summary",
+        return_value=(20, 10501, 10520)
+    )
+    mock_fingerprint = mocker.patch(
+        "etl.extract.extract_transactions.get_source_fingerprint",
+        return_value=(20, 123456)
+    )
+
+    fingerprint = get_transactions_fingerprint()
+
+    assert list(fingerprint) == ['query', 'params'] + keys
+    assert fingerprint['params'] == {'last_transaction_id': 10500}
+    assert mock_fingerprint.called == (cache_key == 'hash')
+    assert mock_summary.called == (cache_key == 'summary')
@@ -0,0 +1,178 @@
+import os
+import threading
+import pandas as pd
+import pytest
+from utils import file_utils
+from utils.file_utils import (
+    BackgroundWriter,
+    CheckpointWriteError,
+    load_checkpoint,
+    save_checkpoint,
+    save_dataframe_to_csv,
+    start_background_checkpoints,
+    wait_for_checkpoints
+)
+
+
+@pytest.fixture(autouse=True)
+def stop_background_checkpoints():
+    yield
+    file_utils._background_writer = None
+
+
+def test_save_dataframe_to_csv_appends(tmp_path):
+    save_dataframe_to_csv(pd.DataFrame({'a': [1]}), str(tmp_path), 'out.csv')
+    save_dataframe_to_csv(
+        pd.DataFrame({'a': [2]}), str(tmp_path), 'out.csv', append=True
+    )
+
+    assert (tmp_path / 'out.csv').read_text() == 'a\n1\n2\n'
+
+
+def test_background_checkpoints_are_written_in_order(tmp_path):
+    start_background_checkpoints()
+    for value in range(10):
+        save_dataframe_to_csv(
+            pd.DataFrame({'a': [value]}), str(tmp_path), 'out.csv',
+            append=value > 0
+        )
+    wait_for_checkpoints()
+
+    assert (tmp_path / 'out.csv').read_text() == (
+        'a\n' + ''.join(f'{value}\n' for value in range(10))
+    )
+    assert file_utils._background_writer is None
+
+
+def test_background_checkpoints_do_not_see_later_column_changes(tmp_path):
+    data = pd.DataFrame({'a': [1]})
+    release = threading.Event()
+    start_background_checkpoints()
+    # Hold the writer until the caller has changed its DataFrame
+    file_utils._background_writer.submit(release.wait, 'blocker')
+
+    save_dataframe_to_csv(data, str(tmp_path), 'out.csv')
+    data['b'] = 2
+    release.set()
+    wait_for_checkpoints()
+
+    assert (tmp_path / 'out.csv').read_text() == 'a\n1\n'
+
+
+def test_background_writer_reports_failures_after_running_the_rest():
+    calls = []
+
+    def failing_write():
+        raise OSError("Disk full")
+
+    writer = BackgroundWriter()
+    writer.submit(failing_write, 'first.csv')
+    writer.submit(lambda: calls.append('second'), 'second.csv')
+
+    with pytest.raises(
+        CheckpointWriteError, match="Failed to write 1 checkpoint"
+    ) as error:
+        writer.close()
+
+    assert calls == ['second']
+    assert 'first.csv' in str(error.value)
+    assert isinstance(error.value.__cause__, OSError)
+
+
+def test_background_writer_blocks_when_queue_is_full():
+    release = threading.Event()
+    writer = BackgroundWriter(max_queued=1)
+    writer.submit(release.wait, 'running')
+    writer.submit(lambda: None, 'queued')
+
+    submitted = threading.Event()
+
+    def submit_blocked():
+        writer.submit(lambda: None, 'blocked')
+        submitted.set()
+
+    threading.Thread(target=submit_blocked).start()
+
+    assert not submitted.wait(timeout=0.2)
+    release.set()
+    assert submitted.wait(timeout=5)
+    writer.close()
+
+
+def test_wait_for_checkpoints_without_background_writer():
+    wait_for_checkpoints()
+
+
+def get_typed_data():
+    return pd.DataFrame({
+        'transaction_id': pd.Series([1, 2, 3], dtype='int16'),
+        'transaction_date': pd.to_datetime(
+            ['2024-03-05', None, '2024-03-07']
+        ),
+        'amount': [10.5, 20.0, 30.25],
+        'name': pd.Series(['Carl Gill', None, 'Jo Fox'], dtype='string'),
+        'age': pd.Series([83, None, 41], dtype='Int8'),
+        'country': pd.Series(['ITALY', 'UK', 'ITALY'], dtype='category'),
+        'is_active': [True, False, True]
+    })
+
+
+@pytest.mark.parametrize("checkpoint_format", ['parquet', 'arrow'])
+def test_columnar_checkpoints_keep_dtypes(
+    mocker, tmp_path, checkpoint_format
+):
+    mocker.patch.dict(
+        os.environ, {'ETL_CHECKPOINT_FORMAT': checkpoint_format}
+    )
+    data = get_typed_data()
+
+    save_checkpoint(data, str(tmp_path), 'merged_data.csv')
+
+    assert (tmp_path / f'merged_data.{checkpoint_format}').is_dir()
+    pd.testing.assert_frame_equal(
+        load_checkpoint(str(tmp_path), 'merged_data.csv'), data
+    )
+
+
+@pytest.mark.parametrize("checkpoint_format", ['parquet', 'arrow'])
+def test_columnar_checkpoints_append_parts_in_order(
+    mocker, tmp_path, checkpoint_format
+):
+    mocker.patch.dict(
+        os.environ, {'ETL_CHECKPOINT_FORMAT': checkpoint_format}
+    )
+    data = pd.DataFrame({'transaction_id': range(25)})
+    save_checkpoint(pd.DataFrame({'stale': [1]}), str(tmp_path), 'out.csv')
+
+    for part_number, start in enumerate(range(0, 25, 2)):
+        save_checkpoint(
+            data.iloc[start:start + 2], str(tmp_path), 'out.csv',
+            append=part_number > 0
+        )
+
+    pd.testing.assert_frame_equal(
+        load_checkpoint(str(tmp_path), 'out.csv'), data
+    )
+
+
+def test_pyarrow_csv_engine_formats_dates_and_appends(mocker, tmp_path):
+    mocker.patch.dict(os.environ, {
+        'ETL_CHECKPOINT_FORMAT': 'csv',
+        'ETL_CHECKPOINT_CSV_ENGINE': 'pyarrow'
+    })
+    data = pd.DataFrame({
+        'transaction_id': [1, 2],
+        'transaction_date': pd.to_datetime(['2024-03-05', None]),
+        'is_active': [True, False]
+    })
+
+    save_checkpoint(data.iloc[:1], str(tmp_path), 'out.csv', '%d/%m/%Y')
+    save_checkpoint(
+        data.iloc[1:], str(tmp_path), 'out.csv', '%d/%m/%Y', append=True
+    )
+
+    assert (tmp_path / 'out.csv').read_text() == (
+        '"transaction_id","transaction_date","is_active"\n'
+        '1,"05/03/2024",true\n'
+        '2,,false\n'
+    )
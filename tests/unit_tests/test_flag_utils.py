@@ -0,0 +1,35 @@
+import pandas as pd
+from etl.transform.clean_customers import standardise_is_active
+from utils.flag_utils import standardise_flags
+
+
+def test_standardise_flags_matches_standardise_is_active():
+    values = pd.Series(
+        ['active', '1', 'True', True, 'inactive', '0', 'False', False,
+         None, 'ACTIVE', 'unknown', 'active'],
+        index=range(100, 112),
+        name='is_active'
+    )
+
+    expected = values.apply(standardise_is_active).astype(bool)
+
+    pd.testing.assert_series_equal(standardise_flags(values), expected)
+
+
+def test_standardise_flags_categorical():
+    values = pd.Series(['0', '1', 'active', None], dtype='category')
+
+    result = standardise_flags(values)
+
+    assert result.dtype == bool
+    assert result.tolist() == [False, True, True, False]
+
+
+def test_standardise_flags_custom_lookup():
+    values = pd.Series(['Y', 'n', 'maybe', None])
+
+    result = standardise_flags(
+        values, truthy=['y', 'yes'], falsy=['n', 'no'], default=True
+    )
+
+    assert result.tolist() == [True, False, True, True]
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from etl.transform.customer_aggregates import (
+    aggregate_customers,
+    CUSTOMER_AGGREGATES_SCHEMA
+)
+from etl.transform.group_aggregates import (
+    factorize_groups,
+    group_first_positions,
+    group_last_positions,
+    group_max,
+    group_mean,
+    group_size,
+    group_sum
+)
+
+
+def get_merged_data():
+    rng = np.random.default_rng(1)
+    customer_ids = rng.integers(1, 60, 2000)
+    return pd.DataFrame({
+        'customer_id': customer_ids,
+        'transaction_id': rng.permutation(2000) + 1,
+        'amount': rng.random(2000) * 50,
+        'name': [f'Customer {i}' for i in customer_ids],
+        'age': np.where(customer_ids % 5 == 0, np.nan, customer_ids + 20.0),
+        # Customers without a country are dropped by the cleaning
+        'country': np.where(customer_ids % 7 == 0, 'ITALY', 'UK'),
+        'is_active': customer_ids % 2 == 0
+    })
+
+
+def groupby_aggregate_customers(data):
+    # aggregate_customers() as it was written with groupby
+    return data.groupby('customer_id', observed=True).agg(
+        transaction_count=('amount', 'size'),
+        total_spend=('amount', 'sum'),
+        last_transaction_id=('transaction_id', 'max'),
+        name=('name', 'last'),
+        age=('age', 'last'),
+        country=('country', 'last'),
+        is_active=('is_active', 'last')
+    ).reset_index().astype(CUSTOMER_AGGREGATES_SCHEMA)
+
+
+def test_group_kernels_match_groupby():
+    keys = pd.Series([3.0, 1.0, np.nan, 3.0, 2.0, 1.0], name='customer_id')
+    values = pd.Series([1.5, 2.0, 9.0, np.nan, 4.0, 6.0])
+    ids = pd.Series([10, 11, 12, 13, 14, 15])
+    grouped = pd.DataFrame(
+        {'values': values, 'ids': ids, 'keys': keys}
+    ).groupby('keys')
+
+    codes, group_keys = factorize_groups(keys)
+    groups = len(group_keys)
+
+    assert list(group_keys) == [1.0, 2.0, 3.0]
+    assert group_keys.name == 'customer_id'
+    np.testing.assert_array_equal(
+        group_size(codes, groups), grouped.size()
+    )
+    np.testing.assert_allclose(
+        group_sum(codes, values, groups), grouped['values'].sum()
+    )
+    np.testing.assert_allclose(
+        group_mean(codes, values, groups), grouped['values'].mean()
+    )
+    np.testing.assert_array_equal(
+        group_max(codes, ids, groups), grouped['ids'].max()
+    )
+    np.testing.assert_array_equal(
+        group_first_positions(codes, groups), [1, 4, 0]
+    )
+    np.testing.assert_array_equal(
+        group_last_positions(codes, groups), [5, 4, 3]
+    )
+
+
+def test_aggregate_customers_matches_groupby():
+    data = get_merged_data()
+
+    pd.testing.assert_frame_equal(
+        aggregate_customers(data),
+        groupby_aggregate_customers(data),
+        check_exact=False,
+        rtol=1e-12
+    )
+
+
+def test_aggregate_customers_matches_groupby_for_optimised_dtypes():
+    data = get_merged_data().astype({
+        'customer_id': 'int16',
+        'name': 'string[pyarrow]',
+        'age': 'Int8',
+        'country': 'category'
+    })
+
+    pd.testing.assert_frame_equal(
+        aggregate_customers(data),
+        groupby_aggregate_customers(data),
+        check_exact=False,
+        rtol=1e-12
+    )
+
+
+def test_aggregate_customers_empty():
+    data = get_merged_data().head(0)
+
+    pd.testing.assert_frame_equal(
+        aggregate_customers(data), groupby_aggregate_customers(data)
+    )
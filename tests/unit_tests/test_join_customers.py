@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+from etl.transform.join_customers import build_customer_index, join_customers
+
+
+def get_transactions():
+    return pd.DataFrame({
+        'transaction_id': [1, 2, 3, 4],
+        'customer_id': [20, 10, 99, 20],
+        'amount': [120.5, 99.99, 310.0, 15.0]
+    })
+
+
+def get_customers():
+    return pd.DataFrame({
+        'customer_id': [10, 20, 30],
+        'name': ['Carl Gill', 'Jo Fox', 'Ann Lee'],
+        'age': [83.0, np.nan, 41.0],
+        'country': ['ITALY', 'CANADA', 'UK'],
+        'is_active': [True, False, True]
+    })
+
+
+def test_build_customer_index_keys_by_customer_id():
+    customer_index = build_customer_index(get_customers())
+
+    assert customer_index.index.name == 'customer_id'
+    assert list(customer_index.columns) == [
+        'name', 'age', 'country', 'is_active'
+    ]
+
+
+def test_join_customers_matches_merge():
+    transactions = get_transactions()
+    customers = get_customers()
+
+    result = join_customers(transactions, build_customer_index(customers))
+
+    pd.testing.assert_frame_equal(
+        result, pd.merge(transactions, customers, on='customer_id')
+    )
+
+
+def test_join_customers_matches_merge_for_optimised_dtypes():
+    transactions = get_transactions().astype({'customer_id': 'int16'})
+    customers = get_customers().astype({
+        'customer_id': 'int16',
+        'name': 'string',
+        'age': 'Int8',
+        'country': 'category'
+    })
+
+    result = join_customers(transactions, build_customer_index(customers))
+
+    pd.testing.assert_frame_equal(
+        result, pd.merge(transactions, customers, on='customer_id')
+    )
+
+
+def test_join_customers_reuses_index_across_batches():
+    transactions = get_transactions()
+    customers = get_customers()
+    customer_index = build_customer_index(customers)
+
+    batches = [
+        join_customers(transactions.iloc[start:start + 2], customer_index)
+        for start in range(0, len(transactions), 2)
+    ]
+
+    pd.testing.assert_frame_equal(
+        pd.concat(batches, ignore_index=True),
+        pd.merge(transactions, customers, on='customer_id')
+    )
+
+
+def test_join_customers_duplicate_customer_ids_match_every_row():
+    transactions = get_transactions()
+    customers = pd.concat(
+        [get_customers(), get_customers().head(1)], ignore_index=True
+    )
+    customers.loc[3, 'name'] = 'Carl Gill Jr'
+
+    result = join_customers(transactions, build_customer_index(customers))
+
+    pd.testing.assert_frame_equal(
+        result, pd.merge(transactions, customers, on='customer_id')
+    )
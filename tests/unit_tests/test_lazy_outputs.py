@@ -0,0 +1,49 @@
+import pytest
+from etl.transform.lazy_outputs import LazyOutputs
+
+
+def get_outputs(calls):
+    def count(name, value):
+        calls.append(name)
+        return value
+
+    return LazyOutputs({
+        'base': lambda outputs: count('base', 2),
+        'double': lambda outputs: count('double', outputs['base'] * 2),
+        'unused': lambda outputs: count('unused', 0)
+    })
+
+
+def test_lazy_outputs_compute_nothing_up_front():
+    calls = []
+    outputs = get_outputs(calls)
+
+    assert calls == []
+    assert 'base' in outputs
+    assert calls == []
+    assert outputs.skipped() == ['base', 'double', 'unused']
+
+
+def test_lazy_outputs_compute_dependencies_once():
+    calls = []
+    outputs = get_outputs(calls)
+
+    assert outputs['double'] == 4
+    assert outputs['double'] == 4
+    assert outputs['base'] == 2
+
+    assert calls == ['base', 'double']
+    assert outputs.computed() == ['base', 'double']
+    assert outputs.skipped() == ['unused']
+
+
+def test_lazy_outputs_materialise_everything_as_dict():
+    outputs = get_outputs([])
+
+    assert dict(outputs) == {'base': 2, 'double': 4, 'unused': 0}
+    assert outputs.skipped() == []
+
+
+def test_lazy_outputs_unknown_name():
+    with pytest.raises(KeyError):
+        get_outputs([])['missing']
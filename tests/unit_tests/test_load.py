@@ -0,0 +1,258 @@
+import os
+import threading
+import pandas as pd
+import pytest
+from sqlalchemy import BigInteger, Date, Text, create_engine
+from etl.load import load
+from etl.load.load import (
+    forget_reflected_tables,
+    get_column_types,
+    get_reflected_table,
+    get_upsert_from_query,
+    iter_row_batches,
+    load_customer_outputs,
+    load_data,
+    load_data_chunks,
+    replace_table_copy,
+    replace_tables,
+    upsert_with_insert
+)
+from etl.transform.lazy_outputs import LazyOutputs
+
+
+def test_get_column_types_maps_datetimes_to_date():
+    data = pd.DataFrame({
+        'transaction_id': [1],
+        'transaction_date': pd.to_datetime(['2024-03-05']),
+        'name': ['Carl Gill']
+    })
+
+    column_types = get_column_types(data)
+
+    assert isinstance(column_types['transaction_date'], Date)
+    assert 'name' not in column_types
+
+
+def test_get_column_types_ignores_text_dates():
+    data = pd.DataFrame({'transaction_date': ['05/03/2024']})
+
+    assert get_column_types(data) == {}
+
+
+def test_get_column_types_keeps_downcast_columns_wide():
+    data = pd.DataFrame({
+        'transaction_id': pd.Series([1], dtype='int16'),
+        'age': pd.Series([None], dtype='Int8'),
+        'name': pd.Series(['Carl Gill'], dtype='string'),
+        'country': pd.Series(['ITALY'], dtype='category')
+    })
+
+    column_types = get_column_types(data)
+
+    assert isinstance(column_types['transaction_id'], BigInteger)
+    assert isinstance(column_types['age'], BigInteger)
+    assert isinstance(column_types['name'], Text)
+    assert isinstance(column_types['country'], Text)
+
+
+def test_load_data_chunks_replaces_then_upserts(mocker):
+    create_table = mocker.patch('etl.load.load.create_merged_data_table')
+    enrich = mocker.patch('etl.load.load.enrich_database_data')
+    chunks = [pd.DataFrame({'transaction_id': [i]}) for i in range(3)]
+
+    load_data_chunks(iter(chunks), incremental=False)
+
+    assert [call.args[1] for call in create_table.call_args_list] == [
+        False, True, True
+    ]
+    enrich.assert_called_once()
+
+
+def test_load_data_chunks_incremental_upserts_every_chunk(mocker):
+    create_table = mocker.patch('etl.load.load.create_merged_data_table')
+    mocker.patch('etl.load.load.enrich_database_data')
+    chunks = [pd.DataFrame({'transaction_id': [i]}) for i in range(2)]
+
+    load_data_chunks(iter(chunks), incremental=True)
+
+    assert [call.args[1] for call in create_table.call_args_list] == [
+        True, True
+    ]
+
+
+def test_replace_table_copy_falls_back_to_to_sql(mocker):
+    connection = create_engine('sqlite://').connect()
+    copy_frames = mocker.patch('etl.load.load.copy_frames')
+    data = pd.DataFrame({'transaction_id': [1, 2], 'name': ['a', None]})
+
+    replace_table_copy(data, connection, 'merged')
+
+    copy_frames.assert_not_called()
+    pd.testing.assert_frame_equal(
+        pd.read_sql_table('merged', connection), data
+    )
+    connection.close()
+
+
+def test_iter_row_batches_covers_every_row():
+    data = pd.DataFrame({'transaction_id': range(5)})
+
+    batches = list(iter_row_batches(data, 2))
+
+    assert [batch.shape[0] for batch in batches] == [2, 2, 1]
+    pd.testing.assert_frame_equal(pd.concat(batches), data)
+
+
+def test_get_reflected_table_reflects_once(mocker):
+    forget_reflected_tables()
+    reflect = mocker.patch('etl.load.load.Table')
+    connection = create_engine('sqlite://').connect()
+
+    first = get_reflected_table(connection, 'merged')
+    second = get_reflected_table(connection, 'merged')
+
+    assert first is second
+    reflect.assert_called_once()
+    forget_reflected_tables()
+    get_reflected_table(connection, 'merged')
+    assert reflect.call_count == 2
+    forget_reflected_tables()
+    connection.close()
+
+
+def test_upsert_with_insert_logs_a_summary_not_the_rows(mocker):
+    mocker.patch('etl.load.load.UPSERT_BATCH_ROWS', 2)
+    mocker.patch('etl.load.load.get_reflected_table')
+    build_statement = mocker.patch('etl.load.load.build_upsert_statement')
+    mocker.patch('etl.load.load.sessionmaker')
+    debug = mocker.patch('etl.load.load.logger.debug')
+    data = pd.DataFrame({'transaction_id': range(5), 'name': 'secret'})
+
+    upsert_with_insert(data, mocker.Mock(), 'merged')
+
+    assert [
+        call.args[1].shape[0] for call in build_statement.call_args_list
+    ] == [2, 2, 1]
+    logged = ' '.join(call.args[0] for call in debug.call_args_list)
+    assert 'in 3 statements' in logged
+    assert 'secret' not in logged
+
+
+def test_get_upsert_from_query_clears_columns_the_source_lacks():
+    query = get_upsert_from_query(
+        'merged', 'merged_loading', ['transaction_id', 'amount'],
+        ['transaction_id', 'amount', 'row_hash'], 'transaction_id'
+    )
+
+    assert query == (
+        'INSERT INTO merged ("transaction_id", "amount") '
+        'SELECT "transaction_id", "amount" FROM merged_loading '
+        'ON CONFLICT (transaction_id) DO UPDATE SET '
+        '"amount" = EXCLUDED."amount", "row_hash" = NULL'
+    )
+
+
+@pytest.mark.parametrize('incremental, differential, merged', [
+    (False, 'false', True),
+    (True, 'false', False),
+    (False, 'true', False)
+])
+def test_load_data_replaces_or_merges_the_merged_data(
+    mocker, incremental, differential, merged
+):
+    mocker.patch.dict(os.environ, {
+        'ETL_LOAD_OUTPUTS': 'merged_data,customer_spend_tiers',
+        'ETL_DIFFERENTIAL_LOAD': differential
+    })
+    replace_tables = mocker.patch('etl.load.load.replace_tables')
+    create_table = mocker.patch('etl.load.load.create_merged_data_table')
+    mocker.patch('etl.load.load.enrich_database_data')
+    outputs = LazyOutputs({
+        name: (lambda outputs, name=name: pd.DataFrame({name: [1]}))
+        for name in [
+            'merged_data', 'high_value_customers', 'customer_spend_tiers'
+        ]
+    })
+
+    load_data(outputs, incremental)
+
+    tables, _, _, other_tasks = replace_tables.call_args.args
+    assert ('merged_data' in tables) == merged
+    assert 'customer_spend_tiers' in tables
+    assert outputs.skipped() == ['high_value_customers']
+    assert len(other_tasks) == (0 if merged else 1)
+    for task in other_tasks:
+        task()
+    assert create_table.call_count == (0 if merged else 1)
+
+
+class CountedConnection:
+    # Tracks how many connections are open at once
+    lock = threading.Lock()
+    open_connections = 0
+    peak = 0
+
+    def __init__(self, *args):
+        with self.lock:
+            CountedConnection.open_connections += 1
+            CountedConnection.peak = max(
+                CountedConnection.peak, CountedConnection.open_connections
+            )
+
+    def commit(self):
+        pass
+
+    def close(self):
+        with self.lock:
+            CountedConnection.open_connections -= 1
+
+
+def test_replace_tables_opens_at_most_the_configured_connections(mocker):
+    mocker.patch.object(CountedConnection, 'open_connections', 0)
+    mocker.patch.object(CountedConnection, 'peak', 0)
+    mocker.patch('etl.load.load.get_db_connection', CountedConnection)
+    mocker.patch('etl.load.load.replace_table_to_sql')
+    mocker.patch('etl.load.load.publish_table')
+    # Both workers hold a connection at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    def append_rows(data, table_name):
+        connection = load.get_db_connection({})
+        try:
+            barrier.wait()
+        finally:
+            connection.close()
+
+    mocker.patch('etl.load.load.append_rows', append_rows)
+    tables = {'merged_data': pd.DataFrame({'transaction_id': range(8)})}
+
+    replace_tables(tables, 2, 2)
+
+    assert CountedConnection.peak == 2
+    assert CountedConnection.open_connections == 0
+
+
+@pytest.mark.parametrize('load_outputs, loaded', [
+    ('merged_data', None),
+    ('merged_data,customer_aggregates', ['customer_aggregates'])
+])
+def test_load_customer_outputs_loads_the_other_configured_outputs(
+    mocker, load_outputs, loaded
+):
+    mocker.patch.dict(os.environ, {'ETL_LOAD_OUTPUTS': load_outputs})
+    replace_tables = mocker.patch('etl.load.load.replace_tables')
+    outputs = LazyOutputs({
+        name: (lambda outputs, name=name: pd.DataFrame({name: [1]}))
+        for name in ['customer_aggregates', 'high_value_customers']
+    })
+
+    load_customer_outputs(outputs)
+
+    if loaded is None:
+        replace_tables.assert_not_called()
+    else:
+        assert list(replace_tables.call_args.args[0]) == loaded
+    assert outputs.skipped() == (
+        ['high_value_customers'] if loaded
+        else ['customer_aggregates', 'high_value_customers']
+    )
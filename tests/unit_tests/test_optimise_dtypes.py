@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+from etl.transform.optimise_dtypes import optimise_dtypes
+
+
+def get_merged_data():
+    return pd.DataFrame({
+        'customer_id': [3554, 1100, 3554],
+        'transaction_id': [3950, 2602, 1776],
+        'transaction_date': ['05/03/2024', '03/01/2024', '16/10/2024'],
+        'amount': [120.5, 99.99, 310.0],
+        'name': ['Carl Gill', 'Jo Fox', 'Carl Gill'],
+        'age': [83.0, np.nan, 83.0],
+        'country': ['ITALY', 'CANADA', 'ITALY'],
+        'is_active': [True, False, True]
+    })
+
+
+def test_optimise_dtypes_downcasts_columns():
+    optimised = optimise_dtypes(get_merged_data())
+
+    assert optimised['customer_id'].dtype == 'int16'
+    assert optimised['transaction_id'].dtype == 'int16'
+    assert optimised['amount'].dtype == 'float64'
+    assert optimised['age'].dtype == 'Int8'
+    assert optimised['country'].dtype == 'category'
+    assert isinstance(optimised['name'].dtype, pd.StringDtype)
+    assert isinstance(optimised['transaction_date'].dtype, pd.StringDtype)
+    assert optimised['is_active'].dtype == 'bool'
+
+
+def test_optimise_dtypes_keeps_values():
+    data = get_merged_data()
+
+    optimised = optimise_dtypes(data)
+
+    pd.testing.assert_frame_equal(
+        optimised.astype(object).where(optimised.notna(), None),
+        data.astype(object).where(data.notna(), None),
+        check_dtype=False
+    )
+
+
+def test_optimise_dtypes_keeps_large_ids_and_fractional_floats():
+    data = pd.DataFrame({
+        'transaction_id': [1, 70000],
+        'age': [20.5, np.nan]
+    })
+
+    optimised = optimise_dtypes(data)
+
+    assert optimised['transaction_id'].dtype == 'int32'
+    assert optimised['age'].dtype == 'float64'
+
+
+def test_optimise_dtypes_halves_memory():
+    data = pd.concat([get_merged_data()] * 1000, ignore_index=True)
+
+    optimised = optimise_dtypes(data)
+
+    assert (
+        optimised.memory_usage(deep=True).sum()
+        < data.memory_usage(deep=True).sum() / 2
+    )
@@ -0,0 +1,67 @@
+import pandas as pd
+from etl.transform.customer_aggregates import empty_customer_aggregates
+from etl.transform.parallel_transform import (
+    partition_by_customer,
+    transform_partition
+)
+
+
+def test_partition_by_customer_keeps_each_customer_in_one_partition():
+    data = pd.DataFrame({
+        'customer_id': [1, 2, 3, 1, 2, 3, 4, 5],
+        'amount': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0]
+    })
+
+    partitions = partition_by_customer(data, 3)
+
+    assert len(partitions) == 3
+    assert sum(len(partition) for partition in partitions) == len(data)
+    for customer_id in data['customer_id'].unique():
+        holding = [
+            number for number, partition in enumerate(partitions)
+            if customer_id in partition['customer_id'].values
+        ]
+        assert len(holding) == 1
+
+
+def test_partition_by_customer_matches_int_and_float_ids():
+    # Customer ids read with missing values come back as float
+    ints = pd.DataFrame({'customer_id': [1, 2, 3, 4, 5, 6]})
+    floats = ints.astype({'customer_id': 'float64'})
+
+    int_partitions = partition_by_customer(ints, 4)
+    float_partitions = partition_by_customer(floats, 4)
+
+    for int_partition, float_partition in zip(
+        int_partitions, float_partitions
+    ):
+        assert list(int_partition.index) == list(float_partition.index)
+
+
+def test_transform_partition_keeps_row_positions():
+    transactions = pd.DataFrame({
+        'transaction_id': [1, 2, 3],
+        'customer_id': [10, 20, 10],
+        'transaction_date': ['2024-03-05', '2024/03/06', '2024-03-07'],
+        'amount': ['10.5', '20', '30']
+    }, index=[4, 7, 9])
+    customers = pd.DataFrame({
+        'customer_id': [10, 20],
+        'name': ['Carl Gill', 'Jo Fox'],
+        'age': [83.0, 41.0],
+        'country': ['italy', 'uk'],
+        'is_active': ['yes', 'no']
+    })
+
+    (
+        cleaned_transactions,
+        _,
+        merged_data,
+        customer_aggregates
+    ) = transform_partition(
+        transactions, customers, empty_customer_aggregates(), False
+    )
+
+    assert list(cleaned_transactions.index) == [4, 7, 9]
+    assert list(merged_data['_position']) == [4, 7, 9]
+    assert list(customer_aggregates['transaction_count']) == [2, 1]
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from etl.transform.spend_tiers import (
+    assign_spend_tiers,
+    get_tier_thresholds
+)
+
+
+def get_aggregates(total_spend):
+    count = len(total_spend)
+    return pd.DataFrame({
+        'customer_id': np.arange(1, count + 1),
+        'transaction_count': np.full(count, 2),
+        'total_spend': np.array(total_spend, dtype='float64'),
+        'last_transaction_id': np.arange(1, count + 1),
+        'name': [f'Customer {i}' for i in range(count)],
+        'age': np.full(count, 40.0),
+        'country': ['UK'] * count,
+        'is_active': np.full(count, True)
+    })
+
+
+def test_assign_spend_tiers_uses_highest_bound_exceeded():
+    aggregates = get_aggregates([50, 100, 100.5, 500, 750, 2000])
+    # Tiers in any order are sorted by their bounds
+    tiers = [
+        ('gold', 1000.0, False),
+        ('bronze', 100.0, False),
+        ('silver', 500.0, False)
+    ]
+
+    result = assign_spend_tiers(aggregates, tiers)
+
+    assert list(result['spend_tier'].astype(object).fillna('none')) == [
+        'none', 'none', 'bronze', 'bronze', 'silver', 'gold'
+    ]
+    assert list(result['spend_tier'].cat.categories) == [
+        'bronze', 'silver', 'gold'
+    ]
+    assert result['spend_tier'].cat.ordered
+    assert list(result['avg_transaction_value']) == [
+        25.0, 50.0, 50.25, 250.0, 375.0, 1000.0
+    ]
+
+
+def test_assign_spend_tiers_matches_high_value_filter():
+    aggregates = get_aggregates(np.random.default_rng(0).random(500) * 1000)
+
+    result = assign_spend_tiers(aggregates, [('high_value', 500.0, False)])
+
+    pd.testing.assert_series_equal(
+        result['spend_tier'] == 'high_value',
+        aggregates['total_spend'] > 500,
+        check_names=False
+    )
+
+
+def test_get_tier_thresholds_resolves_percentiles():
+    total_spend = np.arange(1, 101, dtype='float64')
+    tiers = [('top', 0.9, True), ('middle', 50.0, False)]
+
+    names, thresholds = get_tier_thresholds(total_spend, tiers)
+
+    assert names == ['middle', 'top']
+    np.testing.assert_allclose(
+        thresholds, [50.0, np.quantile(total_spend, 0.9)]
+    )
+
+
+def test_assign_spend_tiers_without_customers():
+    result = assign_spend_tiers(
+        get_aggregates([]), [('gold', 0.9, True), ('silver', 500.0, False)]
+    )
+
+    assert result.empty
+    assert 'spend_tier' in result.columns
@@ -0,0 +1,31 @@
+import os
+import pytest
+from utils.watermark_utils import (
+    get_watermark_path,
+    load_watermark,
+    save_watermark
+)
+
+
+@pytest.fixture
+def watermark_dir(mocker, tmp_path):
+    mocker.patch('utils.watermark_utils.WATERMARK_DIR', str(tmp_path))
+    mocker.patch.dict(os.environ, {'ENV': 'test'})
+    return tmp_path
+
+
+def test_get_watermark_path_is_per_environment(watermark_dir):
+    assert get_watermark_path('transactions') == os.path.join(
+        str(watermark_dir), 'transactions_watermark_test.json'
+    )
+
+
+def test_load_watermark_missing_returns_none(watermark_dir):
+    assert load_watermark('transactions') is None
+
+
+def test_save_then_load_watermark(watermark_dir):
+    save_watermark('transactions', {'transaction_id': 10500})
+
+    assert load_watermark('transactions') == {'transaction_id': 10500}
+    assert os.listdir(watermark_dir) == ['transactions_watermark_test.json']
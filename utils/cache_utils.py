@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from config.etl_config import load_etl_config
+from utils.file_utils import ROOT_DIR
+from utils.logging_utils import setup_logger
+
+try:
+    import pyarrow as pa
+    from pyarrow import parquet as pa_parquet
+except ImportError:
+    pa = None
+
+# Configure the logger
+logger = setup_logger(__name__, 'stage_cache.log', level=logging.DEBUG)
+
+CACHE_DIR = os.path.join(ROOT_DIR, 'etl', 'data', 'cache')
+
+# Written last, so an entry without it was interrupted and is ignored.
+# Its modification time records when the entry was last used
+COMPLETE_MARKER = 'complete'
+
+FILE_HASHES_NAME = 'file_hashes.json'
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def fingerprint(*parts) -> str:
+    """
+    Hash stage inputs and parameters into a cache key.
+
+    Args:
+        parts: JSON-serialisable values, e.g. file hashes, query text,
+            bind parameters and settings. Dictionary order does not matter.
+
+    Returns:
+        str: A hex digest that changes when any part changes.
+    """
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class StageCache:
+    """
+    Stage results kept as Parquet files, keyed by their inputs' fingerprint.
+
+    Each entry is a directory of one Parquet file per DataFrame, so dtypes
+    and indexes come back as they were stored. When the entries take more
+    than max_bytes, the least recently used ones are removed.
+
+    Args:
+        directory (str): Where the entries are kept.
+        max_bytes (int): The most disk space the entries may take.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def get(self, stage: str, key: str) -> Optional[Dict[str, pd.DataFrame]]:
+        path = self._entry_path(stage, key)
+        marker = os.path.join(path, COMPLETE_MARKER)
+        if not os.path.exists(marker):
+            return None
+
+        try:
+            with open(marker) as file:
+                names = json.load(file)
+            frames = {
+                name: pa_parquet.read_table(
+                    os.path.join(path, f'{name}.parquet')
+                ).to_pandas()
+                for name in names
+            }
+        except (pa.ArrowException, OSError, ValueError) as e:
+            # A damaged entry is a miss; the stage runs and replaces it
+            logger.setLevel(logging.WARNING)
+            logger.warning(f"Ignoring unreadable {stage} cache entry: {e}")
+            return None
+        os.utime(marker)
+        return frames
+
+    def put(self, stage: str, key: str, frames: Dict[str, pd.DataFrame]):
+        # Written to a temporary directory and renamed into place, so a
+        # failed write never leaves a partial entry behind
+        path = self._entry_path(stage, key)
+        temp_path = f'{path}.tmp'
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        try:
+            for name, frame in frames.items():
+                pa_parquet.write_table(
+                    pa.Table.from_pandas(frame),
+                    os.path.join(temp_path, f'{name}.parquet'),
+                    compression='zstd'
+                )
+            with open(os.path.join(temp_path, COMPLETE_MARKER), 'w') as file:
+                json.dump(list(frames), file)
+        except (pa.ArrowException, OSError) as e:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            logger.setLevel(logging.WARNING)
+            logger.warning(f"Could not cache the {stage} stage: {e}")
+            return
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """
+        List the complete entries, least recently used first.
+
+        Returns:
+            list: (entry name, size in bytes, last used time) tuples.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            marker = os.path.join(path, COMPLETE_MARKER)
+            if not os.path.exists(marker):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(path, file))
+                for file in os.listdir(path)
+            )
+            entries.append((name, size, os.path.getmtime(marker)))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self) -> List[str]:
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for name, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(os.path.join(self.directory, name))
+            total -= size
+            evicted.append(name)
+        if evicted:
+            logger.setLevel(logging.INFO)
+            logger.info(f"Evicted least recently used entries: {evicted}")
+        return evicted
+
+    def invalidate(self, stage: str = None) -> List[str]:
+        """
+        Remove the cached entries of a stage, or of every stage.
+
+        Args:
+            stage (str): The stage to invalidate; all stages by default.
+
+        Returns:
+            list: The names of the removed entries.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+
+        removed = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path) and (
+                stage is None or name.startswith(f'{stage}-')
+            ):
+                shutil.rmtree(path)
+                removed.append(name)
+        return removed
+
+    def _entry_path(self, stage: str, key: str) -> str:
+        return os.path.join(self.directory, f'{stage}-{key}')
+
+
+def get_stage_cache() -> Optional[StageCache]:
+    # One cache per environment, as the sources differ between them
+    etl_config = load_etl_config()
+    if not etl_config['stage_cache']:
+        return None
+    if pa is None:
+        raise ImportError("The stage cache needs the pyarrow package")
+    return StageCache(
+        os.path.join(CACHE_DIR, os.getenv('ENV', 'dev')),
+        etl_config['stage_cache_max_mb'] * 1024 * 1024
+    )
+
+
+def run_cached_stage(
+    stage: str,
+    key: Optional[str],
+    names: Sequence[str],
+    run_stage: Callable[[], tuple]
+) -> tuple:
+    """
+    Run a stage, or take its results from the stage cache.
+
+    Args:
+        stage (str): The stage's name, e.g. 'extract'.
+        key (str): The fingerprint of the stage's inputs and parameters.
+            None runs the stage without the cache.
+        names (list): A name for each DataFrame the stage returns.
+        run_stage (callable): Runs the stage and returns its DataFrames.
+
+    Returns:
+        tuple: The stage's DataFrames, in the order of names.
+    """
+    stage_cache = get_stage_cache()
+    if stage_cache is None or key is None:
+        return run_stage()
+
+    frames = stage_cache.get(stage, key)
+    if frames is not None:
+        logger.setLevel(logging.INFO)
+        logger.info(f"Stage cache hit for {stage}, skipping the stage")
+        print(f"Using cached {stage} results.")
+        return tuple(frames[name] for name in names)
+
+    logger.setLevel(logging.INFO)
+    logger.info(f"Stage cache miss for {stage}")
+    start_time = time.perf_counter()
+    results = run_stage()
+    stage_cache.put(stage, key, dict(zip(names, results)))
+    logger.info(
+        f"Ran {stage} in {time.perf_counter() - start_time:.2f}s and cached "
+        f"the results"
+    )
+    return results
+
+
+def hash_file(path: str) -> str:
+    """
+    Hash a file's contents.
+
+    The hash is remembered with the file's size and modification time,
+    so an unchanged file is not read again on the next run.
+
+    Args:
+        path (str): The file to hash.
+
+    Returns:
+        str: The SHA-256 hex digest of the contents.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    hashes_path = os.path.join(CACHE_DIR, FILE_HASHES_NAME)
+    hashes = {}
+    if os.path.exists(hashes_path):
+        with open(hashes_path) as file:
+            hashes = json.load(file)
+
+    known = hashes.get(path)
+    if known and known['size'] == stat.st_size and (
+        known['mtime_ns'] == stat.st_mtime_ns
+    ):
+        return known['sha256']
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+
+    hashes[path] = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest.hexdigest()
+    }
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    temp_path = f'{hashes_path}.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(hashes, file)
+    os.replace(temp_path, hashes_path)
+    return digest.hexdigest()
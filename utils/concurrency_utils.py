@@ -0,0 +1,93 @@
+import threading
+from concurrent.futures import (
+    CancelledError,
+    FIRST_EXCEPTION,
+    ThreadPoolExecutor,
+    wait
+)
+from contextlib import contextmanager
+from typing import Any, Callable, List, Optional
+
+
+class Cancellation:
+    """
+    Lets the tasks of run_concurrently() stop early when another fails.
+
+    A running thread cannot be stopped from outside, so a long task
+    registers a callback with on_cancel() that interrupts its work, e.g.
+    by cancelling its database query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.cancelled = False
+
+    def cancel(self):
+        # The callbacks run under the lock, so a task cannot leave its
+        # on_cancel() block, and e.g. close its connection, while its
+        # callback is still running
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            for callback in self._callbacks:
+                callback()
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]):
+        """
+        Call callback if the tasks are cancelled while inside the block.
+
+        Raises:
+            CancelledError: If the tasks are already cancelled, so the
+                work in the block is not started at all.
+        """
+        with self._lock:
+            if self.cancelled:
+                raise CancelledError()
+            self._callbacks.append(callback)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.remove(callback)
+
+
+def run_concurrently(
+    tasks: List[Callable[[], Any]],
+    max_workers: int = None,
+    cancellation: Optional[Cancellation] = None
+) -> List[Any]:
+    """
+    Run independent tasks in a thread pool and collect their results.
+
+    If a task fails, tasks that have not started yet are cancelled, and so
+    is cancellation, which tasks already running watch to stop early. The
+    error is re-raised once the running tasks have finished, so no work is
+    left running in the background (e.g. holding a connection).
+
+    Args:
+        tasks (list): Callables taking no arguments.
+        max_workers (int): The size of the pool, one thread per task
+            by default.
+        cancellation (Cancellation): Shared with the tasks, to interrupt
+            the ones already running when another fails.
+
+    Returns:
+        list: The result of each task, in the same order as the tasks.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(tasks))
+    futures = [executor.submit(task) for task in tasks]
+    try:
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in futures:
+            if future in done and future.exception() is not None:
+                for pending in not_done:
+                    pending.cancel()
+                if cancellation is not None:
+                    cancellation.cancel()
+                raise future.exception()
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
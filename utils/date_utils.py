@@ -1,18 +1,57 @@
+import numpy as np
 import pandas as pd
 
+DATE_FORMATS = [
+    '%Y/%m/%d', '%Y-%m-%d', '%d %b %Y', '%b %d, %Y', '%d %B %Y',
+    '%d-%m-%Y', '%d/%m/%Y'
+]
+
+# How standardised dates are written out as text
+DATE_OUTPUT_FORMAT = '%d/%m/%Y'
+
 
 def standardise_date(date_str):
     if pd.isna(date_str) or date_str == '':
         return pd.NaT
 
-    formats = [
-        '%Y/%m/%d', '%Y-%m-%d', '%d %b %Y', '%b %d, %Y', '%d %B %Y',
-        '%d-%m-%Y', '%d/%m/%Y'
-    ]
-    for fmt in formats:
+    for fmt in DATE_FORMATS:
         try:
             return pd.to_datetime(date_str, format=fmt)
         except ValueError:
             continue
 
     return pd.NaT
+
+
+def standardise_dates(dates: pd.Series) -> pd.Series:
+    """
+    Vectorized equivalent of applying standardise_date to every value.
+
+    Each distinct string is parsed only once. Each format is tried on all
+    the strings still unparsed at once, and the first format that matches
+    a string wins, as in standardise_date.
+
+    Args:
+        dates (pd.Series): The date strings to parse.
+
+    Returns:
+        pd.Series: datetime64 values, NaT where no format matched.
+    """
+    codes, uniques = pd.factorize(dates)
+    uniques = pd.Series(uniques, dtype='object')
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    unparsed = uniques != ''
+
+    for fmt in DATE_FORMATS:
+        if not unparsed.any():
+            break
+        attempt = pd.to_datetime(
+            uniques[unparsed], format=fmt, errors='coerce'
+        )
+        matched = attempt.index[attempt.notna()]
+        parsed[matched] = attempt[matched]
+        unparsed[matched] = False
+
+    # factorize codes missing values as -1, which picks the trailing NaT
+    values = np.append(parsed.to_numpy(), np.datetime64('NaT', 'ns'))
+    return pd.Series(values[codes], index=dates.index, name=dates.name)
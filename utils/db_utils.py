@@ -78,3 +78,16 @@ def create_db_engine(connection_params):
         raise DatabaseConnectionError(
             f"Invalid Connection Parameters: {e}"
         )
+
+
+def cancel_running_query(connection):
+    # Asks Postgres to stop the query running on connection. Safe to call
+    # from another thread than the one waiting on the query, which then
+    # gets a QueryCanceled error
+    try:
+        connection.connection.dbapi_connection.cancel()
+        logger.setLevel(logging.INFO)
+        logger.info("Cancelled the running query.")
+    except Exception as e:
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Failed to cancel the running query: {e}")
@@ -1,5 +1,30 @@
 import os
+import queue
+import shutil
+import functools
+import logging
+import threading
 import pandas as pd
+from typing import Callable, List, Optional, Tuple
+from config.etl_config import load_etl_config
+from utils.logging_utils import setup_logger
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    from pyarrow import dataset as pa_dataset
+    from pyarrow import feather as pa_feather
+    from pyarrow import parquet as pa_parquet
+except ImportError:
+    pa = None
+
+
+class CheckpointWriteError(Exception):
+    pass
+
+
+# Configure the logger
+logger = setup_logger(__name__, 'transform_data.log', level=logging.DEBUG)
 
 
 def find_project_root(marker_file='README.md'):
@@ -26,21 +51,307 @@ ROOT_DIR = find_project_root()
 INDEXES_PATH = os.path.join(ROOT_DIR, 'etl', 'sql', 'indexes')
 QUERY_PATH = os.path.join(ROOT_DIR, 'etl', 'sql')
 
+# Columnar checkpoints are directories of part files, one per save, so
+# streamed chunks can be appended; the extension replaces the .csv one
+CHECKPOINT_EXTENSIONS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow'
+}
+
+CHECKPOINT_COMPRESSION = 'zstd'
+
+# Checkpoints waiting for the background writer. When the queue is full
+# the next save waits, so a slow disk cannot pile up DataFrames in memory
+DEFAULT_MAX_QUEUED_CHECKPOINTS = 4
+
+
+def save_checkpoint(
+    df: pd.DataFrame,
+    relative_output_dir: str,
+    filename: str,
+    date_format: str = None,
+    append: bool = False
+) -> None:
+    """
+    Save a pipeline snapshot in the ETL_CHECKPOINT_FORMAT format.
+
+    CSV goes through save_dataframe_to_csv(). Parquet and Arrow IPC are
+    zstd-compressed and keep the dtypes, so load_checkpoint() gives back
+    the same DataFrame; date_format only applies to CSV.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to save.
+        relative_output_dir (str): The directory to save the file to.
+        filename (str): The name of the CSV file; the other formats swap
+            its extension.
+        date_format (str): How to render datetime columns in CSV.
+        append (bool): Add the rows to the end of an existing snapshot.
+    """
+    etl_config = load_etl_config()
+    checkpoint_format = etl_config['checkpoint_format']
+    if checkpoint_format == 'csv':
+        save_dataframe_to_csv(
+            df, relative_output_dir, filename, date_format, append,
+            etl_config['checkpoint_csv_engine']
+        )
+        return
+
+    output_dir = os.path.join(ROOT_DIR, relative_output_dir)
+    submit_write(
+        functools.partial(
+            write_columnar,
+            df.copy(deep=False),
+            output_dir,
+            get_checkpoint_name(filename, checkpoint_format),
+            checkpoint_format,
+            append
+        ),
+        os.path.join(output_dir, filename)
+    )
+
+
+def load_checkpoint(relative_output_dir: str, filename: str) -> pd.DataFrame:
+    """
+    Load a snapshot saved by save_checkpoint().
+
+    Args:
+        relative_output_dir (str): The directory the snapshot is in.
+        filename (str): The name of the CSV file, as given when saving.
+
+    Returns:
+        pd.DataFrame: The snapshot. Parquet and Arrow IPC snapshots come
+            back with the dtypes they were saved with.
+    """
+    checkpoint_format = load_etl_config()['checkpoint_format']
+    output_dir = os.path.join(ROOT_DIR, relative_output_dir)
+    if checkpoint_format == 'csv':
+        return pd.read_csv(os.path.join(output_dir, filename))
+
+    dataset = pa_dataset.dataset(
+        os.path.join(
+            output_dir, get_checkpoint_name(filename, checkpoint_format)
+        ),
+        format='parquet' if checkpoint_format == 'parquet' else 'ipc'
+    )
+    return dataset.to_table().to_pandas()
+
+
+def get_checkpoint_name(filename: str, checkpoint_format: str) -> str:
+    if checkpoint_format == 'csv':
+        return filename
+    return (
+        os.path.splitext(filename)[0]
+        + CHECKPOINT_EXTENSIONS[checkpoint_format]
+    )
+
 
 def save_dataframe_to_csv(
-    df: pd.DataFrame, relative_output_dir: str, filename: str
+    df: pd.DataFrame,
+    relative_output_dir: str,
+    filename: str,
+    date_format: str = None,
+    append: bool = False,
+    engine: str = 'pandas'
 ) -> None:
     """
     Save a pandas DataFrame to a CSV file.
 
+    After start_background_checkpoints() the file is written on the
+    background writer's thread and this returns straight away.
+
     Args:
         df (pd.DataFrame): The DataFrame to save.
         output_dir (str): The directory to save the file to.
         filename (str): The name of the file to save.
+        date_format (str): How to render datetime columns, ISO by default.
+        append (bool): Add the rows to the end of an existing file,
+            without repeating the header.
+        engine (str): 'pandas', or 'pyarrow' to format the file in
+            Arrow's C++ writer, several times faster. pyarrow quotes text,
+            writes booleans in lower case and whole floats without '.0'.
     """
     output_dir = os.path.join(ROOT_DIR, relative_output_dir)
+    # A shallow copy, so columns the caller adds or drops afterwards do
+    # not change what is written in the background
+    submit_write(
+        functools.partial(
+            write_csv,
+            df.copy(deep=False), output_dir, filename, date_format, append,
+            engine
+        ),
+        os.path.join(output_dir, filename)
+    )
+
+
+def submit_write(write: Callable[[], None], path: str) -> None:
+    if _background_writer is None:
+        write()
+    else:
+        _background_writer.submit(write, path)
+
+
+def write_csv(
+    df: pd.DataFrame,
+    output_dir: str,
+    filename: str,
+    date_format: str = None,
+    append: bool = False,
+    engine: str = 'pandas'
+) -> None:
     os.makedirs(output_dir, exist_ok=True)
-    df.to_csv(os.path.join(output_dir, filename), index=False)
-    print(f"Data saved to {os.path.join(output_dir, filename)}")
+    path = os.path.join(output_dir, filename)
+    if engine == 'pyarrow':
+        write_csv_with_pyarrow(df, path, date_format, append)
+    else:
+        df.to_csv(
+            path,
+            index=False,
+            date_format=date_format,
+            mode='a' if append else 'w',
+            header=not append
+        )
+    print(f"Data saved to {path}")
+
+
+def write_csv_with_pyarrow(
+    df: pd.DataFrame,
+    path: str,
+    date_format: str = None,
+    append: bool = False
+) -> None:
+    if pa is None:
+        raise ImportError("The pyarrow CSV writer needs the pyarrow package")
+    if date_format is not None:
+        df = df.assign(**{
+            column: df[column].dt.strftime(date_format)
+            for column in df.select_dtypes(include='datetime64').columns
+        })
+    with open(path, 'ab' if append else 'wb') as file:
+        pa_csv.write_csv(
+            pa.Table.from_pandas(df, preserve_index=False),
+            file,
+            write_options=pa_csv.WriteOptions(include_header=not append)
+        )
+
+
+def write_columnar(
+    df: pd.DataFrame,
+    output_dir: str,
+    name: str,
+    checkpoint_format: str,
+    append: bool = False
+) -> None:
+    if pa is None:
+        raise ImportError(
+            f"{checkpoint_format} checkpoints need the pyarrow package"
+        )
+    path = os.path.join(output_dir, name)
+    # A fresh snapshot replaces every part of the previous one
+    if not append and os.path.isdir(path):
+        shutil.rmtree(path)
+    os.makedirs(path, exist_ok=True)
+    # Zero-padded so the parts sort, and read back, in the order written
+    part_path = os.path.join(
+        path,
+        f'part-{len(os.listdir(path)):05d}'
+        f'{CHECKPOINT_EXTENSIONS[checkpoint_format]}'
+    )
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if checkpoint_format == 'parquet':
+        pa_parquet.write_table(
+            table, part_path, compression=CHECKPOINT_COMPRESSION
+        )
+    else:
+        pa_feather.write_feather(
+            table, part_path, compression=CHECKPOINT_COMPRESSION
+        )
+    print(f"Data saved to {part_path}")
+
+
+class BackgroundWriter:
+    """
+    Run file writes one at a time on a background thread.
+
+    Writes run in the order they were submitted, so appends to a file
+    stay in order. A failed write does not stop the ones after it; the
+    failures are kept and raised together by close().
+
+    Args:
+        max_queued (int): How many writes can wait before submit() blocks.
+    """
 
+    def __init__(self, max_queued: int = DEFAULT_MAX_QUEUED_CHECKPOINTS):
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._failures: List[Tuple[str, Exception]] = []
+        self._thread = threading.Thread(
+            target=self._run, name='checkpoint-writer', daemon=True
+        )
+        self._thread.start()
 
+    def submit(self, write: Callable[[], None], path: str) -> None:
+        self._queue.put((write, path))
+
+    def close(self) -> None:
+        """
+        Wait for every submitted write to finish and stop the thread.
+
+        Raises:
+            CheckpointWriteError: If any of the writes failed.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self._failures:
+            paths = ', '.join(path for path, _ in self._failures)
+            raise CheckpointWriteError(
+                f"Failed to write {len(self._failures)} checkpoint(s): "
+                f"{paths}"
+            ) from self._failures[0][1]
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            write, path = item
+            try:
+                write()
+            except Exception as e:
+                logger.setLevel(logging.ERROR)
+                logger.error(f"Failed to write checkpoint {path}: {e}")
+                self._failures.append((path, e))
+
+
+_background_writer: Optional[BackgroundWriter] = None
+
+
+def start_background_checkpoints(
+    max_queued: int = DEFAULT_MAX_QUEUED_CHECKPOINTS
+) -> None:
+    """
+    Send save_dataframe_to_csv() writes to a background thread.
+
+    The pipeline carries on while the checkpoints are written. Call
+    wait_for_checkpoints() before the process exits.
+
+    Args:
+        max_queued (int): How many checkpoints can wait to be written
+            before the next save blocks.
+    """
+    global _background_writer
+    if _background_writer is None:
+        _background_writer = BackgroundWriter(max_queued)
+
+
+def wait_for_checkpoints() -> None:
+    """
+    Wait for the background checkpoint writes and go back to writing
+    checkpoints straight away.
+
+    Raises:
+        CheckpointWriteError: If any background write failed.
+    """
+    global _background_writer
+    writer, _background_writer = _background_writer, None
+    if writer is not None:
+        writer.close()
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+TRUTHY_VALUES = ['active', '1', 'true']
+FALSY_VALUES = ['inactive', '0', 'false']
+
+
+def standardise_flags(
+    values: pd.Series,
+    truthy: list = TRUTHY_VALUES,
+    falsy: list = FALSY_VALUES,
+    default: bool = False
+) -> pd.Series:
+    """
+    Normalise a flag-like column of mixed values to booleans.
+
+    Values are compared case-insensitively as strings, so True, 'TRUE' and
+    'true' all match 'true'. Only the distinct values are lowercased and
+    looked up; the results are then spread back over the rows by code.
+
+    Args:
+        values (pd.Series): The raw flag values, e.g. 'active', '0', True.
+        truthy (list): Lowercase values that mean True.
+        falsy (list): Lowercase values that mean False.
+        default (bool): The flag for missing values and values that are in
+            neither list.
+
+    Returns:
+        pd.Series: A bool Series with the same index as values.
+    """
+    codes, uniques = pd.factorize(values)
+    keys = pd.Index(uniques).astype(str).str.lower()
+    lookup = np.where(
+        keys.isin(truthy),
+        True,
+        np.where(keys.isin(falsy), False, default)
+    ).astype(bool)
+
+    # factorize codes missing values as -1, which picks the trailing default
+    flags = np.append(lookup, default)
+    return pd.Series(flags[codes], index=values.index, name=values.name)
@@ -44,6 +44,10 @@ def log_extract_success(logger, type, shape, execution_time, expected_rate):
     )
     logger.info(f"Execution time: {execution_time} seconds")
 
+    if shape[0] == 0:
+        # Nothing was extracted so there is no per-row rate to check
+        return
+
     if (execution_time / shape[0] <= expected_rate):
         logger.info(
             "Execution time per row: "
@@ -0,0 +1,67 @@
+import os
+import json
+import logging
+from typing import Optional
+from utils.file_utils import ROOT_DIR
+from utils.logging_utils import setup_logger
+
+# Configure the logger
+logger = setup_logger(__name__, 'extract_data.log', level=logging.DEBUG)
+
+WATERMARK_DIR = os.path.join(ROOT_DIR, 'etl', 'data', 'state')
+
+
+def get_watermark_path(name: str) -> str:
+    """
+    Get the path of the watermark file for the current environment.
+
+    Each environment reads from a different source database, so the
+    watermarks are kept apart by the ENV variable.
+
+    Args:
+        name (str): The name of the extracted source, e.g. 'transactions'.
+
+    Returns:
+        str: The absolute path to the watermark file.
+    """
+    env = os.getenv('ENV', 'dev')
+    return os.path.join(WATERMARK_DIR, f'{name}_watermark_{env}.json')
+
+
+def load_watermark(name: str) -> Optional[dict]:
+    """
+    Load the last persisted watermark for a source.
+
+    Args:
+        name (str): The name of the extracted source.
+
+    Returns:
+        dict: The watermark values, or None if no watermark has been saved.
+    """
+    path = get_watermark_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        watermark = json.load(file)
+    logger.info(f"Loaded {name} watermark {watermark} from {path}")
+    return watermark
+
+
+def save_watermark(name: str, watermark: dict) -> None:
+    """
+    Persist the watermark for a source.
+
+    The file is written next to its final location and then renamed, so
+    a failed run never leaves a half-written watermark behind.
+
+    Args:
+        name (str): The name of the extracted source.
+        watermark (dict): The watermark values to save.
+    """
+    path = get_watermark_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(watermark, file)
+    os.replace(temp_path, path)
+    logger.info(f"Saved {name} watermark {watermark} to {path}")